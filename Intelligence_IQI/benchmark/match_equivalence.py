@@ -0,0 +1,166 @@
+"""
+Equivalence check for the CSV comparison tool's vectorized matcher.
+
+Builds seeded pairs of synthetic customer/database files (suffix, unit, state and zip
+spelling variants, sale dates a few days to a year apart, plus unrelated rows),
+prepares them with ``prepare_df`` and compares ``match_data`` against
+``reference_match``, the original row-by-row loop: matched pairs, unmatched file1 rows
+and unmatched file2 rows must be identical. Runs with blocking are reported too; those
+may legitimately miss pairs that share no blocking key, so they don't fail the check.
+
+    python match_equivalence.py            # exits 1 when the outputs differ
+"""
+import os
+import sys
+import random
+import logging
+import argparse
+
+import pandas as pd
+
+# Ensure module paths work when running as script
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tool_for_comparing_csv_data import tool_for_comparing_csv_data as matcher
+
+# === 🔧 CONFIGURATION ===
+ROWS = 200
+SEEDS = 3
+START_DATE = pd.Timestamp('2024-01-01')
+STREET_NAMES = ['Main', 'Oak', 'Pine', 'Maple', 'Cedar', 'Elm', 'Lake', 'Hill', 'Park', 'Sunset']
+SUFFIXES = [('Street', 'St'), ('Avenue', 'Ave'), ('Road', 'Rd'), ('Drive', 'Dr'), ('Lane', 'Ln')]
+PLACES = [('Miami', 'FL', 'Florida', '33101'), ('Austin', 'TX', 'Texas', '73301'),
+          ('Boston', 'MA', 'Massachusetts', '02101')]
+DATE_OFFSETS_DAYS = [0, 10, 31, 60, 120, 400]
+
+
+def build_files(seed, rows=ROWS):
+    """``(file1, file2)`` in the tool's input formats; most file1 rows have a respelled twin in file2."""
+    rnd = random.Random(seed)
+    file1, file2 = [], []
+    for _ in range(rows):
+        city, state, state_name, zip_code = rnd.choice(PLACES)
+        long_suffix, short_suffix = rnd.choice(SUFFIXES)
+        street = f"{rnd.randint(1, 400)}{rnd.choice(['', ' N'])} {rnd.choice(STREET_NAMES)} {short_suffix}"
+        unit = rnd.choice(['', '', '4', 'B'])
+        sold = START_DATE + pd.Timedelta(days=rnd.randint(0, 700))
+        file1.append({'street_address': street, 'unit_number': unit, 'city': city, 'state': state,
+                      'zip_code': zip_code, 'sale_date': sold.strftime('%Y-%m-%d')})
+        if rnd.random() < 0.7:
+            designator = rnd.choice(['Apt ', '#', 'Unit '])
+            file2.append({
+                'Address': street.replace(short_suffix, rnd.choice([long_suffix, short_suffix]))
+                           + (f' {designator}{unit}' if unit else ''),
+                'City': city.upper(),
+                'State': rnd.choice([state, state_name]),
+                'Zip Code': float(zip_code) if rnd.random() < 0.3 else zip_code,
+                'Sale Date': (sold + pd.Timedelta(days=rnd.choice(DATE_OFFSETS_DAYS))).strftime('%m/%d/%Y'),
+            })
+    for _ in range(rows // 3):
+        city, state, _, zip_code = rnd.choice(PLACES)
+        file2.append({
+            'Address': f"{rnd.randint(1, 400)} {rnd.choice(STREET_NAMES)} {rnd.choice(SUFFIXES)[1]}",
+            'City': city, 'State': state, 'Zip Code': zip_code,
+            'Sale Date': (START_DATE + pd.Timedelta(days=rnd.randint(0, 700))).strftime('%Y%m%d'),
+        })
+    rnd.shuffle(file2)
+    return pd.DataFrame(file1), pd.DataFrame(file2)
+
+
+def reference_match(df1, df2, num_keys, threshold):
+    """The original every-row-against-every-row loop, kept as the ground truth."""
+    matched, unmatched_rows_file1 = [], []
+    original_file1_cols = [col for col in df1.columns if not col.startswith('match_key') and col != '__source']
+    original_file2_cols = [col for col in df2.columns if not col.startswith('match_key') and col != '__source']
+
+    for _, row1 in df1.iterrows():
+        found_match = False
+        for _, row2 in df2.iterrows():
+            scores = []
+            for i in range(num_keys):
+                val1, val2 = row1[f'match_key_{i}'], row2[f'match_key_{i}']
+                if isinstance(val1, pd.Timestamp) and isinstance(val2, pd.Timestamp):
+                    if pd.isnull(val1) or pd.isnull(val2):
+                        scores.append(0)
+                    else:
+                        scores.append(100 if abs((val1 - val2).days) <= matcher.date_tolerance_days else 0)
+                else:
+                    scores.append(matcher.fuzz.token_sort_ratio(str(val1), str(val2)))
+            avg_score = sum(scores) / len(scores)
+            if avg_score >= threshold:
+                found_match = True
+                match = {f'file1_{col}': row1.get(col, '') for col in original_file1_cols}
+                match.update({f'file2_{col}': row2.get(col, '') for col in original_file2_cols})
+                match['similarity'] = round(avg_score, 2)
+                matched.append(match)
+        if not found_match:
+            unmatched_rows_file1.append(row1)
+
+    unmatched_df1 = pd.DataFrame(unmatched_rows_file1)
+    unmatched_df1.drop(columns=[c for c in unmatched_df1.columns if c.startswith('match_key') or c == '__source'],
+                       inplace=True, errors='ignore')
+    matched_indexes_file2 = set()
+    for match in matched:
+        val = match.get(f'file2_{original_file2_cols[0]}')
+        matched_indexes_file2.update(df2[df2[original_file2_cols[0]] == val].index.tolist())
+    unmatched_df2 = df2.drop(index=matched_indexes_file2, errors='ignore')
+    unmatched_df2.drop(columns=[c for c in unmatched_df2.columns if c.startswith('match_key') or c == '__source'],
+                       inplace=True, errors='ignore')
+    return pd.DataFrame(matched), unmatched_df1, unmatched_df2
+
+
+def as_rows(df):
+    """Order-independent, type-tolerant view of an output frame."""
+    return sorted(map(tuple, df.astype(str).values.tolist()))
+
+
+def differences(expected, actual):
+    """Names of the outputs (matched, unmatched file1, unmatched file2) that differ."""
+    names = ['matched', 'unmatched file1', 'unmatched file2']
+    return [name for name, a, b in zip(names, expected, actual) if as_rows(a) != as_rows(b)]
+
+
+def check_equivalence(rows=ROWS, seeds=SEEDS, threshold=matcher.similarity_threshold):
+    """``(report, failures)`` over ``seeds`` fixture pairs; ``report`` holds ``(passed, line)``."""
+    file1_keys = [pair[0] for pair in matcher.comparison_keys]
+    file2_keys = [pair[1] for pair in matcher.comparison_keys]
+    num_keys = len(matcher.comparison_keys)
+    report, failures = [], []
+    for seed in range(seeds):
+        file1, file2 = build_files(seed, rows)
+        df1 = matcher.prepare_df(file1, file1_keys, 'file1')
+        df2 = matcher.prepare_df(file2, file2_keys, 'file2')
+        expected = reference_match(df1, df2, num_keys, threshold)
+        unblocked = matcher.match_data(df1, df2, num_keys, threshold)
+        blocked = matcher.match_data(df1, df2, num_keys, threshold, matcher.blocking_keys)
+
+        differing = differences(expected, unblocked)
+        if differing:
+            failures.append(f"seed {seed}: match_data differs from the reference loop in {', '.join(differing)}")
+        missed = len(expected[0]) - len(blocked[0])
+        report.append((not differing, f"seed {seed}: reference {len(expected[0])} matches, match_data "
+                                      f"{len(unblocked[0])}, with blocking {len(blocked[0])}"
+                                      + (f" ({missed} fewer: no shared blocking key)" if missed else '')))
+    return report, failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fail when match_data and the original matching loop disagree.")
+    parser.add_argument('--rows', type=int, default=ROWS, help="File1 rows per fixture (default: %(default)s)")
+    parser.add_argument('--seeds', type=int, default=SEEDS, help="Fixture pairs to check (default: %(default)s)")
+    args = parser.parse_args()
+
+    # Per-pair debug logging would dominate the run
+    logging.getLogger().setLevel(logging.WARNING)
+    report, failures = check_equivalence(args.rows, args.seeds)
+    for passed, line in report:
+        print(f"   {'🟢' if passed else '🔴'} {line}")
+    if failures:
+        for failure in failures:
+            print(f"❌ {failure}")
+        sys.exit(1)
+    print(f"✅ match_data matches the reference loop on {args.seeds} fixture pairs")
+
+
+if __name__ == "__main__":
+    main()
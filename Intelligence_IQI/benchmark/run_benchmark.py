@@ -0,0 +1,302 @@
+"""
+Benchmark harness for the completeness executors and scripts.
+
+Times every suite in the registry (plus the full zebra sweep) through the same
+``run_environment`` path ``query_executor.py`` uses, and the standalone scripts
+(suspicious realtor classifier, AVM disparity, active-buyer labels, bulk address
+lookup), against the
+synthetic database built by ``synthetic_data.py``. Results are saved per commit so
+two commits can be compared:
+
+    python run_benchmark.py run                    # -> results/<commit>.json
+    python run_benchmark.py compare main HEAD      # exits 1 on a regression
+
+A case regresses when its median wall time grows by more than ``--threshold``
+(and by at least ``MIN_REGRESSION_SECONDS``), or its throughput drops by as much.
+"""
+import io
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import statistics
+import subprocess
+import importlib.util
+from contextlib import redirect_stdout
+from datetime import datetime
+
+# Ensure module paths work when running as script
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sql_queries.data_completeness_queries import zebra_tables
+from data_completeness_report.suite_registry import discover_suites, merge_suites
+from data_completeness_report.zebra_sweep import build_zebra_suites
+from data_completeness_report.query_executor import (
+    run_environment, ASYNC_CONCURRENCY, QUERY_TIMEOUT_SECONDS, MAX_THREADS, ADAPTIVE_CONCURRENCY, RANGE_PARTITIONS
+)
+from data_completeness_report.suspicious_realtor_classifier import classify_realtors
+from db_connection.connection_pool import connect_db
+
+# === 🔧 CONFIGURATION ===
+ENV = 'bench' # 👈 Environment prefix of the local database in .env
+REPEAT = 3
+WARMUP = 1
+REGRESSION_THRESHOLD = 0.15      # 15% slower median (or 15% lower throughput) is a regression
+MIN_REGRESSION_SECONDS = 0.05    # Ignore slowdowns smaller than this; they are noise
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+HIQ_SCRIPTS_DIR = os.path.join(REPO_ROOT, 'soalabs | HIQ', 'avm_query_executor')
+ADDRESS_SAMPLE_ROWS = 20000     # CSV rows fed to the bulk address lookup
+BENCH_TABLES = ['loan_officers', 'realtors', 'properties', 'sales', 'loans', *zebra_tables.values()]
+
+
+# === 🧪 CASES ===
+def load_script(name):
+    """Import one of the HIQ scripts by path (its folder name isn't importable)."""
+    spec = importlib.util.spec_from_file_location(name, os.path.join(HIQ_SCRIPTS_DIR, f'{name}.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def suite_case(queries, engine):
+    args = argparse.Namespace(
+        engine=engine, concurrency=ASYNC_CONCURRENCY, query_timeout=QUERY_TIMEOUT_SECONDS,
+        max_threads=MAX_THREADS, adaptive_concurrency=ADAPTIVE_CONCURRENCY, partitions=RANGE_PARTITIONS,
+        use_cache=False, approximate=False, explain=False
+    )
+
+    def run(env):
+        rows = run_environment(env, queries, args, [])
+        errors = [row for row in rows if isinstance(row['Count'], str)]
+        if errors:
+            raise RuntimeError(f"{len(errors)} queries failed, e.g. {errors[0]['Count']}")
+        return len(rows)
+    return run
+
+
+def suspicious_classifier_case(env):
+    with connect_db(env) as conn:
+        _, flagged = classify_realtors(conn)
+    conn.close()
+    return len(flagged)
+
+
+def avm_disparity_case(env):
+    script = load_script('avm_query_executor')
+    script.ENV = env
+    with tempfile.TemporaryDirectory() as workdir:
+        scanned, _ = script.export_disparities(os.path.join(workdir, 'avm_disparity.csv'))
+    return scanned
+
+
+def active_buyer_labels_case(env):
+    script = load_script('active_buyer_label_logic')
+    script.ENV = env
+    with tempfile.TemporaryDirectory() as workdir:
+        processed, _ = script.export_classified_shoppers(os.path.join(workdir, 'home_shoppers_classified.csv'))
+    return processed
+
+
+def write_address_sample(env, path, rows):
+    """A CSV in the bulk address lookup's input format, sampled from the benchmark properties."""
+    with connect_db(env) as conn:
+        with conn.cursor() as cur, open(path, 'w') as f:
+            cur.copy_expert(
+                f'''COPY (SELECT street_address AS "Address", city AS "City", state AS "State",
+                                 zip_code AS "Zip Code", clip
+                          FROM properties ORDER BY random() LIMIT {int(rows)})
+                    TO STDOUT WITH (FORMAT csv, HEADER)''',
+                f
+            )
+    conn.close()
+
+
+def address_lookup_case(rows=ADDRESS_SAMPLE_ROWS):
+    workdir = tempfile.mkdtemp(prefix='bench_addresses_')
+    samples = {}
+
+    def run(env):
+        # The sample is written on the first (warm-up) call only
+        from tool_for_comparing_csv_data.find_unmatched_transactions import find_unmatched
+        if env not in samples:
+            samples[env] = os.path.join(workdir, f'addresses_{env}.csv')
+            write_address_sample(env, samples[env], rows)
+        if find_unmatched(env, samples[env], output_dir=workdir) is None:
+            raise RuntimeError("Address sample could not be loaded")
+        return rows
+    return run
+
+
+def build_cases(engines):
+    """``{case_name: fn(env) -> items processed}`` for every suite, the zebra sweep and each script."""
+    suites = discover_suites()
+    suites['zebra_sweep'], _ = merge_suites(build_zebra_suites())
+    cases = {}
+    for suite_name, queries in suites.items():
+        for engine in engines:
+            name = f'suite:{suite_name}' if len(engines) == 1 else f'suite:{suite_name} [{engine}]'
+            cases[name] = suite_case(queries, engine)
+    cases['script:suspicious_realtor_classifier'] = suspicious_classifier_case
+    cases['script:avm_disparity'] = avm_disparity_case
+    cases['script:active_buyer_labels'] = active_buyer_labels_case
+    cases['script:find_unmatched_transactions'] = address_lookup_case()
+    return cases
+
+
+# === ⏱️ RUNNING ===
+def current_commit():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_ROOT,
+                                capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=REPO_ROOT,
+                               capture_output=True, text=True, check=True).stdout.strip()
+        return f'{commit}-dirty' if dirty else commit
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def table_sizes(env):
+    """Planner row estimates of the benchmark tables, recorded so runs at different scales aren't compared."""
+    with connect_db(env) as conn:
+        with conn.cursor() as cur:
+            cur.execute('SELECT relname, reltuples::bigint FROM pg_class WHERE relname = ANY(%s) ORDER BY relname;',
+                        (BENCH_TABLES,))
+            sizes = dict(cur.fetchall())
+    conn.close()
+    return sizes
+
+
+def time_case(fn, env, repeat, warmup):
+    runs = []
+    for i in range(warmup + repeat):
+        started = time.perf_counter()
+        # The scripts print their own reports; keep the benchmark output readable
+        with redirect_stdout(io.StringIO()):
+            items = fn(env)
+        elapsed = time.perf_counter() - started
+        if i >= warmup:
+            runs.append(elapsed)
+    median = statistics.median(runs)
+    return {
+        'runs_s': [round(run, 4) for run in runs],
+        'median_s': round(median, 4),
+        'min_s': round(min(runs), 4),
+        'items': items,
+        'throughput_per_s': round(items / median, 2) if median else None
+    }
+
+
+def run_benchmark(env=ENV, repeat=REPEAT, warmup=WARMUP, engines=('threads',), only=None):
+    cases = build_cases(list(engines))
+    if only:
+        cases = {name: fn for name, fn in cases.items() if any(pattern in name for pattern in only)}
+
+    results = {
+        'commit': current_commit(),
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'env': env,
+        'table_rows': table_sizes(env),
+        'repeat': repeat,
+        'cases': {}
+    }
+    for name, fn in cases.items():
+        try:
+            results['cases'][name] = time_case(fn, env, repeat, warmup)
+            case = results['cases'][name]
+            print(f"⏱️ {name}: median {case['median_s']:.3f}s, min {case['min_s']:.3f}s, "
+                  f"{case['throughput_per_s']} items/s")
+        except Exception as e:
+            results['cases'][name] = {'error': str(e)}
+            print(f"❌ {name} failed: {e}")
+    return results
+
+
+# === 📊 COMPARING ===
+def resolve_results_path(ref):
+    """Accept a results file path or a git ref whose results were saved in RESULTS_DIR."""
+    if os.path.exists(ref):
+        return ref
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', ref], cwd=REPO_ROOT,
+                                capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = ref
+    return os.path.join(RESULTS_DIR, f'{commit}.json')
+
+
+def compare_results(base, head, threshold=REGRESSION_THRESHOLD):
+    """``[(case, base_median, head_median, change, regressed), ...]`` for cases present in both runs."""
+    rows = []
+    for name, head_case in head['cases'].items():
+        base_case = base['cases'].get(name)
+        if not base_case or 'error' in base_case or 'error' in head_case:
+            continue
+        base_median, head_median = base_case['median_s'], head_case['median_s']
+        change = (head_median - base_median) / base_median if base_median else 0.0
+        slower = change > threshold and head_median - base_median >= MIN_REGRESSION_SECONDS
+        base_rate, head_rate = base_case.get('throughput_per_s'), head_case.get('throughput_per_s')
+        lower_throughput = bool(base_rate and head_rate is not None and head_rate < base_rate * (1 - threshold)
+                                and head_median - base_median >= MIN_REGRESSION_SECONDS)
+        rows.append((name, base_median, head_median, change, slower or lower_throughput))
+    return rows
+
+
+def print_comparison(base, head, rows):
+    print(f"📊 {base['commit']} → {head['commit']}")
+    if base.get('table_rows') != head.get('table_rows'):
+        print("⚠️ The two runs used different table sizes; timings are not directly comparable")
+    for name, base_median, head_median, change, regressed in rows:
+        flag = '🔴' if regressed else ('🟢' if change < 0 else '⚪')
+        print(f"   {flag} {name}: {base_median:.3f}s → {head_median:.3f}s ({change:+.1%})")
+    for name in head['cases'].keys() - base['cases'].keys():
+        print(f"   🆕 {name}: no baseline")
+
+
+# === 🚀 COMMAND LINE ===
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the completeness executors against the synthetic database.")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run = commands.add_parser('run', help="Time every suite and script")
+    run.add_argument('--env', default=ENV, help="Environment prefix of the benchmark database (default: %(default)s)")
+    run.add_argument('--repeat', type=int, default=REPEAT)
+    run.add_argument('--warmup', type=int, default=WARMUP)
+    run.add_argument('--engines', type=lambda value: [engine.strip() for engine in value.split(',')],
+                     default=['threads'], help="Comma-separated execution engines, e.g. threads,async")
+    run.add_argument('--cases', type=lambda value: [pattern.strip() for pattern in value.split(',')],
+                     help="Only run cases whose name contains one of these substrings")
+    run.add_argument('--output', help="Results file (default: results/<commit>.json)")
+
+    compare = commands.add_parser('compare', help="Flag regressions between two saved runs")
+    compare.add_argument('base', help="Results file or git ref")
+    compare.add_argument('head', help="Results file or git ref")
+    compare.add_argument('--threshold', type=float, default=REGRESSION_THRESHOLD)
+
+    args = parser.parse_args()
+    if args.command == 'run':
+        results = run_benchmark(args.env, args.repeat, args.warmup, args.engines, args.cases)
+        output = args.output or os.path.join(RESULTS_DIR, f"{results['commit']}.json")
+        os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+        with open(output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"✅ Benchmark results saved to '{output}'")
+        return
+
+    with open(resolve_results_path(args.base)) as f:
+        base = json.load(f)
+    with open(resolve_results_path(args.head)) as f:
+        head = json.load(f)
+    rows = compare_results(base, head, args.threshold)
+    print_comparison(base, head, rows)
+    regressions = [row for row in rows if row[4]]
+    if regressions:
+        print(f"🔴 {len(regressions)} case(s) regressed by more than {args.threshold:.0%}")
+        sys.exit(1)
+    print("✅ No regressions")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Start-up time guard for the CLI.
+
+Runs the paths that never touch a database (listing suites, printing SQL, importing
+the executor) in fresh interpreters with every AWS and database variable removed
+from the environment, and fails when:
+
+- one of them takes longer than ``STARTUP_BUDGET_MS`` (median of ``REPEAT`` runs), or
+- importing the executor pulls in a heavy module (pandas, boto3, psycopg2, ...).
+
+    python startup_time.py            # exits 1 on a regression
+"""
+import os
+import sys
+import time
+import argparse
+import statistics
+import subprocess
+
+# === 🔧 CONFIGURATION ===
+STARTUP_BUDGET_MS = 200
+REPEAT = 5
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CLI = os.path.join(PROJECT_DIR, 'dqm.py')
+HEAVY_MODULES = ['pandas', 'numpy', 'boto3', 'botocore', 'psycopg2', 'asyncpg', 'rapidfuzz', 'dotenv']
+CREDENTIAL_PREFIXES = ('AWS_', 'REGION')
+CREDENTIAL_MARKERS = ('_DB_', '_AWS_')
+
+IMPORT_EXECUTOR = 'import data_completeness_report.query_executor'
+CHECKS = {
+    'python (baseline)': [sys.executable, '-c', 'pass'],
+    'import query_executor': [sys.executable, '-c', IMPORT_EXECUTOR],
+    'dqm.py --help': [sys.executable, CLI, '--help'],
+    'dqm.py suites': [sys.executable, CLI, 'suites'],
+    'dqm.py sql --suites all': [sys.executable, CLI, 'sql', '--suites', 'all'],
+}
+
+
+def clean_environment():
+    """The current environment without credentials, so a path that needs them fails loudly."""
+    return {
+        key: value for key, value in os.environ.items()
+        if not key.startswith(CREDENTIAL_PREFIXES) and not any(marker in key for marker in CREDENTIAL_MARKERS)
+    }
+
+
+def time_command(command, repeat=REPEAT):
+    """Median wall time of ``command`` in milliseconds; raises if it fails."""
+    runs = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        subprocess.run(command, cwd=PROJECT_DIR, env=clean_environment(),
+                       stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, check=True)
+        runs.append((time.perf_counter() - started) * 1000)
+    return statistics.median(runs)
+
+
+def heavy_imports():
+    """Heavy modules that importing the executor loads."""
+    probe = f"{IMPORT_EXECUTOR}; import sys; print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    output = subprocess.run([sys.executable, '-c', probe], cwd=PROJECT_DIR, env=clean_environment(),
+                            capture_output=True, text=True, check=True).stdout.strip()
+    return [module for module in output.split(',') if module]
+
+
+def check_startup(budget_ms=STARTUP_BUDGET_MS, repeat=REPEAT):
+    """``(timings in ms, failures)`` for every start-up path."""
+    timings, failures = {}, []
+    for name, command in CHECKS.items():
+        try:
+            timings[name] = time_command(command, repeat)
+        except subprocess.CalledProcessError as e:
+            failures.append(f"{name} failed: {e.stderr.decode(errors='replace').strip().splitlines()[-1:]}")
+            continue
+        if timings[name] > budget_ms:
+            failures.append(f"{name} took {timings[name]:.0f} ms (budget {budget_ms} ms)")
+    leaked = heavy_imports()
+    if leaked:
+        failures.append(f"importing query_executor loads {', '.join(leaked)}")
+    return timings, failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fail when the CLI's database-free paths start too slowly.")
+    parser.add_argument('--budget-ms', type=float, default=STARTUP_BUDGET_MS)
+    parser.add_argument('--repeat', type=int, default=REPEAT)
+    args = parser.parse_args()
+
+    timings, failures = check_startup(args.budget_ms, args.repeat)
+    for name, elapsed in timings.items():
+        flag = '🔴' if elapsed > args.budget_ms else '🟢'
+        print(f"   {flag} {name}: {elapsed:.0f} ms")
+    if failures:
+        for failure in failures:
+            print(f"❌ {failure}")
+        sys.exit(1)
+    print(f"✅ Every start-up path is under {args.budget_ms:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,400 @@
+"""
+Synthetic schema and data generator for the benchmark database.
+
+Builds every table the completeness suites and scripts read (``loan_officers``,
+``realtors``, ``properties`` with ``home_shopper``/``avm_history`` JSONB, ``sales``,
+``loans`` and every table in ``zebra_tables``) in a local PostgreSQL, at a size set
+by ``--scale``. Rows are generated server-side with ``generate_series``, so scale 10
+loads in minutes, and ``setseed`` makes every load with the same scale identical.
+
+Null, empty-string and ``'null'`` rates, the 5-year date window, suspicious realtor
+names and the JSONB shapes follow what the queries in ``data_completeness_queries``
+look for, so every metric comes out non-trivial.
+
+Point an environment at the local database in ``.env`` (password auth, no IAM):
+
+    BENCH_DB_HOST=localhost
+    BENCH_DB_NAME=iqi_bench
+    BENCH_DB_USER=postgres
+    BENCH_DB_PASSWORD=postgres
+    BENCH_DB_SSLMODE=disable
+
+    python synthetic_data.py --scale 1
+"""
+import os
+import sys
+import time
+import argparse
+
+# Ensure module paths work when running as script
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sql_queries.data_completeness_queries import zebra_tables
+from db_connection.connection_pool import connect_db
+
+# === 🔧 CONFIGURATION ===
+ENV = 'bench' # 👈 Environment prefix of the local database in .env
+DEFAULT_SCALE = 1.0
+SEED = 0.42
+
+# Rows per table at scale 1 (every zebra table gets ZEBRA_ROWS)
+ROWS_AT_SCALE_1 = {
+    'loan_officers': 20_000,
+    'realtors': 50_000,
+    'properties': 200_000,
+    'sales': 300_000,
+    'loans': 200_000,
+}
+ZEBRA_ROWS = 20_000
+
+FIRST_NAMES = ['James', 'Mary', 'Robert', 'Patricia', 'John', 'Jennifer', 'Michael', 'Linda',
+               'David', 'Elizabeth', 'William', 'Barbara', 'Richard', 'Susan', 'Joseph', 'Jessica']
+LAST_NAMES = ['Smith', 'Johnson', 'Williams', 'Brown', 'Jones', 'Garcia', 'Miller', 'Davis',
+              'Rodriguez', 'Martinez', 'Hernandez', 'Lopez', 'Wilson', 'Anderson', 'Thomas', 'Moore']
+COMPANIES = ['Keller Williams', 'RE/MAX', 'Coldwell Banker', 'Century 21', 'Compass',
+             'eXp Realty', 'Redfin', 'Berkshire Hathaway', 'Sothebys', 'Howard Hanna']
+SUSPICIOUS_NAMES = ['Test Agent', 'Agent Test', 'Not A Member', 'Out Of State Agent', 'None Listed',
+                    'Listed None', 'Other Office', 'Nonmember Agent', 'Nonmls Agent', 'Outside Agent',
+                    'null Agent', 'Unidentified Agent', 'RMLS Default', 'Default Subscriber',
+                    'NON-MBR', 'Represented Buyer', 'Listing Participant']
+STREETS = ['Main', 'Oak', 'Pine', 'Maple', 'Cedar', 'Elm', 'Washington', 'Lake', 'Hill', 'Sunset',
+           'Park', 'River', 'Church', 'Highland', 'Mill', 'Spring']
+SUFFIXES = ['St', 'Street', 'Ave', 'Avenue', 'Rd', 'Dr', 'Ln', 'Ct', 'Blvd', 'Way']
+CITIES = ['Springfield', 'Franklin', 'Greenville', 'Bristol', 'Clinton', 'Fairview', 'Salem',
+          'Madison', 'Georgetown', 'Arlington', 'Ashland', 'Dover']
+STATES = ['IA', 'MD', 'UT', 'ID', 'DC', 'DE', 'PA', 'MO', 'CA', 'TX', 'FL', 'NY']
+
+
+# === 🧱 SQL HELPERS ===
+def pick(values):
+    """SQL expression choosing one of ``values`` at random."""
+    array = ', '.join(f"'{value}'" for value in values)
+    return f"(ARRAY[{array}])[1 + floor(random() * {len(values)})::int]"
+
+
+def nullable(expression, null_fraction):
+    return f"CASE WHEN random() < {null_fraction} THEN NULL ELSE {expression} END"
+
+
+def blankish(expression, null_fraction, empty_fraction, null_string_fraction=0.0):
+    """Text that is sometimes NULL, sometimes '' and sometimes the literal 'null', like the zebra scrapes."""
+    null_string = f"WHEN random() < {null_string_fraction} THEN 'null' " if null_string_fraction else ''
+    return (f"CASE WHEN random() < {null_fraction} THEN NULL "
+            f"WHEN random() < {empty_fraction} THEN '' "
+            f"{null_string}ELSE {expression} END")
+
+
+PERSON_NAME = f"{pick(FIRST_NAMES)} || ' ' || {pick(LAST_NAMES)}"
+STREET_ADDRESS = f"(100 + floor(random() * 9900))::int || ' ' || {pick(STREETS)} || ' ' || {pick(SUFFIXES)}"
+ZIP_CODE = "(10000 + floor(random() * 2000))::int::text"
+LICENSE = "'LIC' || (100000 + floor(random() * 900000))::int"
+PHONE = "'555-' || lpad(floor(random() * 10000)::int::text, 4, '0')"
+PAST_DATE = "CURRENT_DATE - floor(random() * 365 * 8)::int"  # 8 years, so the 5-year filters bite
+SOLD_DATE = f"to_char({PAST_DATE}, 'Mon DD, YYYY')"
+OBSERVED_AT = """to_char(now() - random() * INTERVAL '{days} days', 'YYYY-MM-DD"T"HH24:MI:SS')"""
+PROPERTY_HISTORY = """'[{"event": "Sold"}]'"""
+ENVIRONMENT_FACTORS = """'{"flood": "minimal"}'"""
+
+
+# === 🗂️ TABLES ===
+def loan_officers_sql(rows):
+    return f'''
+        DROP TABLE IF EXISTS loan_officers;
+        CREATE TABLE loan_officers (
+            id bigint PRIMARY KEY,
+            name text,
+            full_name text,
+            license_number text,
+            company_name text,
+            company_name_2 text,
+            verified_company_name text,
+            company_license_number text,
+            company_license_number_2 text,
+            verified_company_license_number text,
+            city text,
+            state text,
+            zip_code text,
+            external_id text
+        );
+        INSERT INTO loan_officers
+        SELECT i,
+               {nullable(PERSON_NAME, 0.05)},
+               {nullable(PERSON_NAME, 0.10)},
+               {nullable(LICENSE, 0.15)},
+               {nullable(pick(COMPANIES), 0.30)},
+               {nullable(pick(COMPANIES), 0.80)},
+               {nullable(pick(COMPANIES), 0.60)},
+               {nullable(LICENSE, 0.35)},
+               {nullable(LICENSE, 0.85)},
+               {nullable(LICENSE, 0.70)},
+               {nullable(pick(CITIES), 0.08)},
+               {nullable(pick(STATES), 0.04)},
+               {nullable(ZIP_CODE, 0.10)},
+               {nullable("'lo_' || i", 0.75)}
+        FROM generate_series(1, {rows}) AS i;
+    '''
+
+
+def realtors_sql(rows):
+    name = f"CASE WHEN random() < 0.03 THEN {pick(SUSPICIOUS_NAMES)} ELSE {PERSON_NAME} END"
+    return f'''
+        DROP TABLE IF EXISTS realtors;
+        CREATE TABLE realtors (
+            id bigint PRIMARY KEY,
+            name text,
+            full_name text,
+            company_name text,
+            company_license_number text,
+            city text,
+            state text,
+            zip_code text,
+            avatar_urls text[],
+            external_id text,
+            duplicate boolean NOT NULL,
+            hidden boolean NOT NULL
+        );
+        INSERT INTO realtors
+        SELECT i,
+               {nullable(name, 0.04)},
+               {nullable(name, 0.10)},
+               {nullable(pick(COMPANIES), 0.20)},
+               {nullable(LICENSE, 0.25)},
+               {nullable(pick(CITIES), 0.06)},
+               {nullable(pick(STATES), 0.03)},
+               {nullable(ZIP_CODE, 0.08)},
+               {nullable("ARRAY['https://img.example.com/avatars/' || i || '.jpg']", 0.40)},
+               {nullable("'usr_' || i", 0.85)},
+               random() < 0.05,
+               random() < 0.08
+        FROM generate_series(1, {rows}) AS i;
+    '''
+
+
+def properties_sql(rows):
+    # 1-3 hs_history entries; some lack last_observed so the recorded_date fallback is exercised
+    last_observed = nullable(OBSERVED_AT.format(days=120), 0.2)
+    hs_entry = f'''jsonb_strip_nulls(jsonb_build_object(
+                       'owner_occupied', random() < 0.6,
+                       'in_state_shopper', random() < 0.7,
+                       'out_of_state_shopper', random() < 0.3,
+                       'unique_obs_count', floor(random() * 12)::int,
+                       'first_observed', {OBSERVED_AT.format(days=180)},
+                       'last_observed', {last_observed},
+                       'recorded_date', to_char(CURRENT_DATE - floor(random() * 60)::int, 'YYYY-MM-DD')
+                   ))'''
+    avm_entry = '''jsonb_build_object(
+                       'month', to_char(date_trunc('month', CURRENT_DATE) - m * INTERVAL '1 month', 'YYYY-MM-DD'),
+                       'zillow', round(g.value * (0.7 + random() * 0.6)),
+                       'corelogic', round(g.value * (0.7 + random() * 0.6))
+                   )'''
+    return f'''
+        DROP TABLE IF EXISTS properties;
+        CREATE TABLE properties (
+            id bigint PRIMARY KEY,
+            clip text NOT NULL,
+            street_address text,
+            unit_number text,
+            city text,
+            state text,
+            zip_code text,
+            home_shopper_active boolean NOT NULL,
+            home_shopper jsonb,
+            avm_history jsonb
+        );
+        INSERT INTO properties
+        SELECT g.i,
+               lpad(g.i::text, 10, '0'),
+               {STREET_ADDRESS},
+               {nullable("'Unit ' || (1 + floor(random() * 40))::int", 0.85)},
+               {pick(CITIES)},
+               {pick(STATES)},
+               {ZIP_CODE},
+               g.active,
+               CASE WHEN g.active THEN jsonb_build_object('hs_history', (
+                   SELECT jsonb_agg({hs_entry})
+                   FROM generate_series(0, g.i % 3) AS h(n)
+               )) END,
+               CASE WHEN g.value IS NOT NULL THEN (
+                   SELECT jsonb_agg({avm_entry})
+                   FROM generate_series(0, g.i % 6) AS m
+               ) END
+        FROM (
+            SELECT i,
+                   random() < 0.15 AS active,
+                   {nullable("(100000 + random() * 900000)::int", 0.10)} AS value
+            FROM generate_series(1, {rows}) AS i
+        ) g;
+    '''
+
+
+def sales_sql(rows, properties, realtors, loans):
+    agent = f"(1 + floor(random() * {realtors}))::bigint"
+    return f'''
+        DROP TABLE IF EXISTS sales;
+        CREATE TABLE sales (
+            id bigint PRIMARY KEY,
+            property_id bigint,
+            clip text,
+            sale_date date,
+            sale_price numeric,
+            deleted boolean NOT NULL,
+            duplicate boolean NOT NULL,
+            listing_agent_id bigint,
+            listing_co_agent_id bigint,
+            buyer_agent_id bigint,
+            buyer_co_agent_id bigint,
+            loan_id bigint,
+            cash_buyer boolean
+        );
+        INSERT INTO sales
+        SELECT g.i,
+               g.property_id,
+               lpad(g.property_id::text, 10, '0'),
+               {nullable(PAST_DATE, 0.01)},
+               {nullable("round((80000 + random() * 1200000)::numeric, -2)", 0.07)},
+               random() < 0.04,
+               random() < 0.06,
+               {nullable(agent, 0.12)},
+               {nullable(agent, 0.75)},
+               {nullable(agent, 0.30)},
+               {nullable(agent, 0.85)},
+               CASE WHEN g.cash_buyer THEN NULL ELSE {nullable(f"(1 + floor(random() * {loans}))::bigint", 0.35)} END,
+               g.cash_buyer
+        FROM (
+            SELECT i,
+                   {nullable(f"(1 + floor(random() * {properties}))::bigint", 0.03)} AS property_id,
+                   random() < 0.25 AS cash_buyer
+            FROM generate_series(1, {rows}) AS i
+        ) g;
+    '''
+
+
+def loans_sql(rows, sales, loan_officers, properties):
+    return f'''
+        DROP TABLE IF EXISTS loans;
+        CREATE TABLE loans (
+            id bigint PRIMARY KEY,
+            loan_date date,
+            deleted boolean NOT NULL,
+            sale_id bigint,
+            loan_officer_id bigint,
+            property_id bigint,
+            loan_amount numeric,
+            mortgage_type smallint,
+            equity_loan boolean,
+            cash_buyer boolean,
+            owner_name text
+        );
+        INSERT INTO loans
+        SELECT i,
+               {nullable(PAST_DATE, 0.01)},
+               random() < 0.03,
+               {nullable(f"(1 + floor(random() * {sales}))::bigint", 0.40)},
+               {nullable(f"(1 + floor(random() * {loan_officers}))::bigint", 0.20)},
+               {nullable(f"(1 + floor(random() * {properties}))::bigint", 0.05)},
+               {nullable("round((50000 + random() * 900000)::numeric, -3)", 0.06)},
+               {nullable("floor(random() * 3)::smallint", 0.05)},
+               random() < 0.10,
+               random() < 0.02,
+               {nullable(PERSON_NAME, 0.12)}
+        FROM generate_series(1, {rows}) AS i;
+    '''
+
+
+def zebra_sql(table, rows):
+    agent = blankish(PERSON_NAME, 0.05, 0.15)
+    sold_date = f"CASE WHEN random() < 0.05 THEN 'NOT LISTED FOR SALE' ELSE {blankish(SOLD_DATE, 0.05, 0.10)} END"
+    return f'''
+        DROP TABLE IF EXISTS {table};
+        CREATE TABLE {table} (
+            id bigint PRIMARY KEY,
+            property_address text,
+            sold_date text,
+            sold_price text,
+            property_history text,
+            environment_factors text,
+            home_photo text,
+            main_agent text,
+            main_agent_company text,
+            main_agent_license text,
+            main_agent_photo text,
+            main_agent_phone text,
+            buyer_agent text,
+            buyer_agent_company text,
+            buyer_agent_license text,
+            buyer_agent_photo text,
+            buyer_agent_phone text,
+            co_agent text,
+            co_agent_company text
+        );
+        INSERT INTO {table}
+        SELECT i,
+               {blankish(STREET_ADDRESS + " || ', ' || " + pick(CITIES), 0.01, 0.01)},
+               {sold_date},
+               {blankish("'$' || (80000 + floor(random() * 1200000))::int", 0.05, 0.10)},
+               {blankish(PROPERTY_HISTORY, 0.05, 0.15)},
+               {blankish(ENVIRONMENT_FACTORS, 0.10, 0.20)},
+               {blankish("'https://img.example.com/homes/' || i || '.jpg'", 0.05, 0.05, 0.05)},
+               {agent},
+               {blankish(pick(COMPANIES), 0.05, 0.10, 0.05)},
+               {blankish(LICENSE, 0.05, 0.15, 0.05)},
+               {blankish("'https://img.example.com/agents/' || i || '.jpg'", 0.10, 0.10, 0.10)},
+               {blankish(PHONE, 0.10, 0.10)},
+               {agent},
+               {blankish(pick(COMPANIES), 0.05, 0.15)},
+               {blankish(LICENSE, 0.05, 0.20)},
+               {blankish("'https://img.example.com/agents/b' || i || '.jpg'", 0.15, 0.10, 0.10)},
+               {blankish(PHONE, 0.15, 0.10)},
+               {blankish(PERSON_NAME, 0.30, 0.40)},
+               {blankish(pick(COMPANIES), 0.30, 0.40)}
+        FROM generate_series(1, {rows}) AS i;
+    '''
+
+
+def build_generation_plan(scale=DEFAULT_SCALE):
+    """``[(table, rows, sql), ...]`` in load order for the given scale."""
+    rows = {table: max(1, int(count * scale)) for table, count in ROWS_AT_SCALE_1.items()}
+    zebra_rows = max(1, int(ZEBRA_ROWS * scale))
+    plan = [
+        ('loan_officers', rows['loan_officers'], loan_officers_sql(rows['loan_officers'])),
+        ('realtors', rows['realtors'], realtors_sql(rows['realtors'])),
+        ('properties', rows['properties'], properties_sql(rows['properties'])),
+        ('sales', rows['sales'], sales_sql(rows['sales'], rows['properties'], rows['realtors'], rows['loans'])),
+        ('loans', rows['loans'], loans_sql(rows['loans'], rows['sales'], rows['loan_officers'], rows['properties'])),
+    ]
+    plan.extend((table, zebra_rows, zebra_sql(table, zebra_rows)) for table in zebra_tables.values())
+    return plan
+
+
+def generate(env=ENV, scale=DEFAULT_SCALE, tables=None):
+    """Drop, recreate and fill the benchmark tables, then ANALYZE them."""
+    plan = [step for step in build_generation_plan(scale) if not tables or step[0] in tables]
+    with connect_db(env) as conn:
+        with conn.cursor() as cur:
+            cur.execute('SELECT setseed(%s);', (SEED,))
+            for table, rows, sql in plan:
+                started = time.monotonic()
+                cur.execute(sql)
+                cur.execute(f'ANALYZE {table};')
+                conn.commit()
+                print(f"🧱 {table}: {rows:,} rows in {time.monotonic() - started:.1f}s")
+    conn.close()
+
+
+# === 🚀 COMMAND LINE ===
+def main():
+    parser = argparse.ArgumentParser(description="Create and fill the synthetic benchmark tables in a local PostgreSQL.")
+    parser.add_argument('--env', default=ENV, help="Environment prefix of the benchmark database (default: %(default)s)")
+    parser.add_argument('--scale', type=float, default=DEFAULT_SCALE,
+                        help="Row-count multiplier; scale 1 is ~1M rows overall (default: %(default)s)")
+    parser.add_argument('--tables', type=lambda value: [table.strip() for table in value.split(',') if table.strip()],
+                        help="Only (re)build these tables")
+    args = parser.parse_args()
+
+    print(f"🏗️ Generating synthetic data at scale {args.scale} in '{args.env}'...")
+    generate(args.env, args.scale, args.tables)
+    print("✅ Benchmark database ready")
+
+
+if __name__ == "__main__":
+    main()
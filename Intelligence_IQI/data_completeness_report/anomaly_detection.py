@@ -0,0 +1,182 @@
+"""
+Drift and anomaly detection for completeness metrics.
+
+After every run each metric is compared against a rolling baseline of its own
+history (per suite and environment). The baseline is an exponentially weighted mean
+plus an exponentially weighted mean absolute deviation, kept in a
+``metric_baselines`` table in the metrics store. Each check reads and updates one
+row per metric, so the cost stays constant however long the history grows.
+
+A value is flagged when its robust z-score ``(value - mean) / (1.2533 * mad)``
+exceeds ``Z_THRESHOLD``. Flagged values are clipped before they update the
+baseline, so one bad ingestion doesn't drag the baseline along with it while a
+lasting level shift is still absorbed over a few runs.
+
+Existing history can be replayed into the baselines with
+``python anomaly_detection.py --rebuild``.
+"""
+import os
+import sys
+import sqlite3
+import argparse
+from datetime import datetime
+
+# Ensure module paths work when running as script
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data_completeness_report.metrics_store import STORE_PATH, ensure_schema, split_value
+
+# === 🔧 CONFIGURATION ===
+ALPHA = 0.1                # EWMA weight of the newest run (~ last 20 runs)
+Z_THRESHOLD = 4.0          # Robust z-score that counts as an anomaly
+MIN_OBSERVATIONS = 8       # Runs needed before a metric is checked at all
+MIN_RELATIVE_SCALE = 0.01  # Scale floor as a fraction of the mean, for near-constant metrics
+MAD_TO_SIGMA = 1.2533      # sqrt(pi / 2): mean absolute deviation -> standard deviation
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS metric_baselines (
+    suite TEXT NOT NULL,
+    env TEXT NOT NULL,
+    metric TEXT NOT NULL,
+    observations INTEGER NOT NULL,
+    mean REAL NOT NULL,
+    mad REAL NOT NULL,
+    last_value REAL,
+    updated_at TEXT NOT NULL,
+    PRIMARY KEY (suite, env, metric)
+) WITHOUT ROWID;
+'''
+
+
+def robust_scale(mean, mad):
+    return max(MAD_TO_SIGMA * mad, MIN_RELATIVE_SCALE * abs(mean), 1.0)
+
+
+def update_baseline(observations, mean, mad, value):
+    """Fold one value into ``(observations, mean, mad)``; returns the new triple."""
+    if observations == 0:
+        return 1, value, 0.0
+    if observations >= MIN_OBSERVATIONS:
+        # Clip outliers so a single bad run only nudges the baseline
+        limit = Z_THRESHOLD * robust_scale(mean, mad)
+        value = min(max(value, mean - limit), mean + limit)
+    deviation = abs(value - mean)
+    mean += ALPHA * (value - mean)
+    mad += ALPHA * (deviation - mad)
+    return observations + 1, mean, mad
+
+
+class DriftDetector:
+    def __init__(self, path=STORE_PATH, z_threshold=Z_THRESHOLD):
+        self.path = path
+        self.z_threshold = z_threshold
+        self._db = sqlite3.connect(path)
+        ensure_schema(self._db)
+        self._db.executescript(SCHEMA)
+
+    def check_run(self, suite, env, rows, started_at=None, update=True, frozen=()):
+        """
+        Score one suite run (``[{'Query Description', 'Count'}, ...]``) against the baselines.
+
+        Returns the anomalous rows with their baseline, z-score and direction. With
+        ``update=False`` (e.g. for approximate or unstored runs) the baselines are left
+        untouched; metrics named in ``frozen`` (e.g. counts reused from the result cache)
+        are scored without updating theirs.
+        """
+        started_at = (started_at or datetime.now()).isoformat(timespec='seconds')
+        anomalies = []
+        with self._db:
+            for row in rows:
+                metric = row['Query Description']
+                value, _ = split_value(row['Count'])
+                if value is None:
+                    continue
+
+                baseline = self._db.execute(
+                    'SELECT observations, mean, mad FROM metric_baselines WHERE suite = ? AND env = ? AND metric = ?',
+                    (suite, env, metric)
+                ).fetchone()
+                observations, mean, mad = baseline or (0, 0.0, 0.0)
+
+                if observations >= MIN_OBSERVATIONS:
+                    z_score = (value - mean) / robust_scale(mean, mad)
+                    if abs(z_score) >= self.z_threshold:
+                        anomalies.append({
+                            'Suite': suite,
+                            'Env': env,
+                            'Query Description': metric,
+                            'Count': row['Count'],
+                            'Baseline': round(mean, 1),
+                            'Z-Score': round(z_score, 1),
+                            'Direction': 'up' if z_score > 0 else 'down'
+                        })
+
+                if update and metric not in frozen:
+                    self._db.execute(
+                        '''INSERT OR REPLACE INTO metric_baselines
+                           (suite, env, metric, observations, mean, mad, last_value, updated_at)
+                           VALUES (?, ?, ?, ?, ?, ?, ?, ?)''',
+                        (suite, env, metric, *update_baseline(observations, mean, mad, value), value, started_at)
+                    )
+        return anomalies
+
+    def rebuild(self):
+        """
+        Replay every exact run in the metrics store into fresh baselines (oldest first).
+
+        Values reused from the result cache are skipped, as they are in live runs.
+        """
+        with self._db:
+            self._db.execute('DELETE FROM metric_baselines')
+            baselines = {}
+            history = self._db.execute(
+                '''SELECT r.suite, r.env, v.metric, v.value, r.started_at
+                   FROM runs r JOIN metric_values v ON v.run_id = r.run_id
+                   WHERE r.approximate = 0 AND v.cached = 0 AND v.value IS NOT NULL
+                   ORDER BY r.started_at, r.run_id'''
+            )
+            for suite, env, metric, value, started_at in history:
+                key = (suite, env, metric)
+                observations, mean, mad, _, _ = baselines.get(key, (0, 0.0, 0.0, None, None))
+                baselines[key] = (*update_baseline(observations, mean, mad, value), value, started_at)
+            self._db.executemany(
+                'INSERT INTO metric_baselines VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                [(*key, *state) for key, state in baselines.items()]
+            )
+        return len(baselines)
+
+    def close(self):
+        self._db.close()
+
+
+def print_anomaly_report(anomalies):
+    if not anomalies:
+        print("📉 No metric drifted outside its usual range")
+        return
+    print(f"🚨 {len(anomalies)} metric(s) drifted outside their usual range:")
+    for a in sorted(anomalies, key=lambda a: -abs(a['Z-Score'])):
+        arrow = '⬆️' if a['Direction'] == 'up' else '⬇️'
+        print(f"   {arrow} [{a['Env']}] {a['Suite']} / {a['Query Description']}: "
+              f"{a['Count']} vs usual {a['Baseline']:.0f} (z={a['Z-Score']})")
+
+
+# === 🚀 COMMAND LINE ===
+def main():
+    parser = argparse.ArgumentParser(description="Maintain drift baselines for the completeness metrics store.")
+    parser.add_argument('--store', default=STORE_PATH, help="Path to the SQLite store")
+    parser.add_argument('--rebuild', action='store_true',
+                        help="Recompute every baseline from the recorded run history")
+    args = parser.parse_args()
+    if not args.rebuild:
+        parser.print_help()
+        return
+
+    detector = DriftDetector(args.store)
+    try:
+        print(f"🔁 Rebuilt {detector.rebuild()} metric baselines from '{args.store}'")
+    finally:
+        detector.close()
+
+
+if __name__ == "__main__":
+    main()
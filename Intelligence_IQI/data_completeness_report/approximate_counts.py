@@ -0,0 +1,125 @@
+"""
+Fast-estimate mode for completeness counts on the largest tables.
+
+For every table in ``APPROXIMATE_TABLES`` the simple COUNT(*) queries of a suite
+are answered by one sampled statement:
+
+- unfiltered totals come from the planner's ``pg_class.reltuples`` estimate;
+- filtered counts are measured on a ``TABLESAMPLE SYSTEM`` sample and scaled up to
+  ``reltuples``, with a Wilson score confidence interval.
+
+The interval treats sampled rows as independent. SYSTEM sampling picks whole pages,
+so on tables where values cluster physically the real interval is somewhat wider.
+
+A table falls back to exact counting when its statistics are missing or the sample
+has fewer than ``MIN_SAMPLE_ROWS`` rows. Queries that aren't simple counts are always
+run exactly, as are counts over a CTE.
+"""
+import math
+
+from data_completeness_report.query_fusion import parse_count_query
+from sql_queries.data_completeness_queries import zebra_tables
+
+# === 🔧 CONFIGURATION ===
+APPROXIMATE_TABLES = {'properties', 'sales', *zebra_tables.values()}
+SAMPLE_PERCENT = 1.0
+SAMPLE_SEED = 42           # REPEATABLE seed, so reruns on unchanged data agree
+MIN_SAMPLE_ROWS = 1000
+CONFIDENCE_Z = 1.96        # 95% interval
+
+
+def wilson_interval(hits, n, z=CONFIDENCE_Z):
+    """Wilson score interval for a proportion; well-behaved for 0 or n hits."""
+    p = hits / n
+    denominator = 1 + z * z / n
+    centre = (p + z * z / (2 * n)) / denominator
+    margin = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / denominator
+    return max(0.0, centre - margin), min(1.0, centre + margin)
+
+
+def build_sampled_sql(table, alias, predicates):
+    columns = [
+        f"(SELECT reltuples::bigint FROM pg_class WHERE oid = '{table}'::regclass) AS reltuples",
+        'COUNT(*) AS sample_rows'
+    ]
+    for i, conjuncts in enumerate(predicates):
+        if conjuncts:
+            condition = ' AND '.join(f'({c})' for c in conjuncts)
+            columns.append(f'COUNT(*) FILTER (WHERE {condition}) AS q{i}')
+        else:
+            columns.append(f'COUNT(*) AS q{i}')
+
+    source = f'{table} {alias}' if alias else table
+    return (
+        'SELECT ' + ',\n       '.join(columns)
+        + f'\nFROM {source} TABLESAMPLE SYSTEM ({SAMPLE_PERCENT}) REPEATABLE ({SAMPLE_SEED});'
+    )
+
+
+def plan_approximate_queries(queries, tables=APPROXIMATE_TABLES):
+    """
+    Split a suite into sampled estimate units and queries that must run exactly.
+
+    Returns ``(estimate_units, exact_queries)``; each estimate unit is a dict with
+    ``table``, ``names``, ``totals`` (which names are unfiltered) and ``sql``.
+    """
+    groups = {}
+    exact_queries = {}
+
+    for name, sql in queries.items():
+        parsed = parse_count_query(sql)
+        if parsed is None or parsed['prefix'] or parsed['table'] not in tables:
+            exact_queries[name] = sql
+            continue
+        key = (parsed['table'], parsed['alias'])
+        groups.setdefault(key, []).append((name, parsed['conjuncts']))
+
+    estimate_units = []
+    for (table, alias), members in groups.items():
+        estimate_units.append({
+            'table': table,
+            'names': [name for name, _ in members],
+            'totals': [not conjuncts for _, conjuncts in members],
+            'sql': build_sampled_sql(table, alias, [conjuncts for _, conjuncts in members])
+        })
+    return estimate_units, exact_queries
+
+
+def estimate_results(unit, row):
+    """
+    Turn one sampled result row into CSV rows with confidence intervals.
+
+    Returns None when the table needs an exact fallback.
+    """
+    reltuples, sample_rows, *hits = row
+    if reltuples is None or reltuples < 0 or sample_rows < MIN_SAMPLE_ROWS:
+        return None
+
+    results = []
+    for name, is_total, hit_count in zip(unit['names'], unit['totals'], hits):
+        if is_total:
+            results.append({
+                'Query Description': name, 'Count': int(reltuples),
+                'CI Low': None, 'CI High': None, 'Method': 'reltuples'
+            })
+            continue
+        low, high = wilson_interval(hit_count, sample_rows)
+        results.append({
+            'Query Description': name,
+            'Count': round(hit_count / sample_rows * reltuples),
+            'CI Low': math.floor(low * reltuples),
+            'CI High': math.ceil(high * reltuples),
+            'Method': f'sample {SAMPLE_PERCENT}%'
+        })
+    return results
+
+
+def exact_result(row):
+    """Give an exactly counted row the same columns as an estimated one."""
+    exact = isinstance(row['Count'], int)
+    return {
+        **row,
+        'CI Low': row['Count'] if exact else None,
+        'CI High': row['Count'] if exact else None,
+        'Method': 'exact'
+    }
@@ -0,0 +1,118 @@
+"""
+Asyncio execution engine for the completeness report.
+
+Runs query units from a single event loop over an asyncpg pool instead of one OS
+thread and one blocking socket per query. Concurrency is capped by a semaphore per
+database host, every query has its own timeout (asyncpg cancels it server-side when
+it fires), and interrupting the run cancels all in-flight queries.
+
+Produces the same ``{'Query Description', 'Count'}`` rows as the threaded engine.
+"""
+import time
+import asyncio
+import weakref
+
+import asyncpg
+
+from data_completeness_report.query_fusion import split_fused_result
+from data_completeness_report.query_timing import (
+    new_record, mark_failed, explain_sql, attach_explain, statement_timeout_ms
+)
+from db_connection.connection_pool import load_db_config, get_db_password
+
+# === 🔧 CONFIGURATION ===
+DEFAULT_CONCURRENCY = 20
+DEFAULT_QUERY_TIMEOUT_SECONDS = 600
+
+_host_semaphores = weakref.WeakKeyDictionary()
+
+
+def get_host_semaphore(host, concurrency):
+    """One semaphore per database host and event loop, shared by every pool that targets it."""
+    semaphores = _host_semaphores.setdefault(asyncio.get_running_loop(), {})
+    if host not in semaphores:
+        semaphores[host] = asyncio.Semaphore(concurrency)
+    return semaphores[host]
+
+
+def error_rows(names, message):
+    return [{'Query Description': name, 'Count': f"Error: {message}"} for name in names]
+
+
+async def run_unit(env, pool, semaphore, unit, timeout, explain, timings, submitted):
+    names, query = unit
+    record = new_record(env, names, query)
+    executed = None
+    try:
+        async with semaphore:
+            started = time.monotonic()
+            record['queue_wait_s'] = started - submitted
+            async with pool.acquire() as conn:
+                record['connect_s'] = time.monotonic() - started
+                executed = time.monotonic()
+                row = await conn.fetchrow(query, timeout=timeout)
+                record['execution_s'] = time.monotonic() - executed
+                if explain:
+                    try:
+                        attach_explain(record, await conn.fetchval(explain_sql(query), timeout=timeout))
+                    except Exception as e:
+                        record['error'] = f"EXPLAIN failed: {e}"
+        return split_fused_result(names, tuple(row))
+    except asyncio.CancelledError:
+        record['status'] = 'cancelled'
+        raise
+    except asyncio.TimeoutError:
+        record['status'] = 'timeout'
+        record['error'] = f"query timed out after {timeout}s"
+        return error_rows(names, record['error'])
+    except Exception as e:
+        mark_failed(record, e)
+        return error_rows(names, str(e))
+    finally:
+        if record['execution_s'] is None and executed is not None:
+            record['execution_s'] = time.monotonic() - executed
+        timings.append(record)
+
+
+async def run_units_async(env, units, concurrency=DEFAULT_CONCURRENCY, timeout=DEFAULT_QUERY_TIMEOUT_SECONDS,
+                          explain=False, timings=None):
+    """
+    Run ``(descriptions, sql)`` units against ``env`` and return the flattened CSV rows.
+
+    A timing record per statement is appended to ``timings`` when given.
+    """
+    timings = [] if timings is None else timings
+    config = load_db_config(env)
+    semaphore = get_host_semaphore(config['host'], concurrency)
+
+    async with asyncpg.create_pool(
+        host=config['host'],
+        port=config['port'],
+        database=config['dbname'],
+        user=config['user'],
+        password=lambda: get_db_password(config),
+        ssl=config['sslmode'],
+        min_size=0,
+        max_size=concurrency,
+        server_settings={'statement_timeout': str(statement_timeout_ms(timeout))}
+    ) as pool:
+        submitted = time.monotonic()
+        tasks = [
+            asyncio.create_task(run_unit(env, pool, semaphore, unit, timeout, explain, timings, submitted))
+            for unit in units
+        ]
+        try:
+            unit_results = await asyncio.gather(*tasks)
+        except BaseException:
+            # Cancel whatever is still running so no query outlives the run
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+
+    return [row for rows in unit_results for row in rows]
+
+
+def run_units(env, units, concurrency=DEFAULT_CONCURRENCY, timeout=DEFAULT_QUERY_TIMEOUT_SECONDS,
+              explain=False, timings=None):
+    return asyncio.run(run_units_async(env, units, concurrency, timeout, explain, timings))
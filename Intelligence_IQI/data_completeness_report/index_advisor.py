@@ -0,0 +1,406 @@
+"""
+Index advisor derived from the query catalog.
+
+Parses every query of every suite, mines the filters they share and proposes
+indexes:
+
+- a partial index per table whose predicate is the set of immutable conjuncts most of
+  its queries repeat (``deleted = FALSE AND duplicate = FALSE``). ``= FALSE`` and
+  ``IS FALSE`` count as the same filter while mining. Repeated range filters that can't
+  go into an index predicate (``sale_date >= CURRENT_DATE - ...``) become its key.
+  Without one, the column the remaining filters test most often is the key (``name``
+  for the realtors counts); a table whose queries share nothing else (``properties``:
+  only ``home_shopper_active = TRUE``) is reported with its mined predicate and no
+  index, since an arbitrary key wouldn't help its counts;
+- an expression index for every window ``PARTITION BY`` (e.g.
+  ``TRIM(LOWER(property_address)), sold_date, sold_price``), restricted to the rows the
+  window query reads.
+
+Each suggestion is then checked against the statements the executor really sends for
+the queries it targets: the fused statements of ``plan_fused_queries`` (when
+``FUSE_QUERIES`` is on) and, with ``--partitions``, the key-range statements. A fused
+statement can lose the shared filter (the sales Deleted and Duplicate counts leave it
+without a WHERE clause), so a partial index may not serve it at all. Checks run:
+
+- with ``hypopg`` installed, as a hypothetical index: planner cost before and after;
+- otherwise, with ``--create-indexes`` on a local database (e.g. the synthetic
+  benchmark database), by timing the queries before and after really building it.
+
+Run ``python index_advisor.py --help``; suggestions are saved to a CSV.
+"""
+import os
+import re
+import sys
+import time
+import json
+import argparse
+import statistics
+from collections import Counter
+from datetime import datetime
+
+# Ensure module paths work when running as script
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data_completeness_report.suite_registry import discover_suites, merge_suites
+from data_completeness_report.query_fusion import (
+    normalize_sql, parse_count_query, split_top_level_and, plan_fused_queries
+)
+from data_completeness_report.range_partitioning import (
+    PARTITION_KEY, plan_range_partitions, key_ranges, build_partition_tasks
+)
+from data_completeness_report.query_executor import FUSE_QUERIES
+
+# === 🔧 CONFIGURATION ===
+ENV = 'bench' # 👈 Database to evaluate suggestions against
+MIN_SHARED_FRACTION = 0.5   # A conjunct must appear in at least this share of a table's queries
+MIN_TABLE_QUERIES = 2       # Tables queried fewer times than this get no shared-predicate index
+BENCHMARK_REPEAT = 3
+MAX_INDEX_NAME_LENGTH = 63
+
+VOLATILE_PATTERN = re.compile(r'\b(CURRENT_DATE|CURRENT_TIMESTAMP|NOW\(\)|LOCALTIMESTAMP|RANDOM\(\))', re.IGNORECASE)
+BOOLEAN_COMPARISON_PATTERN = re.compile(r'\b(\w+)\s*(?:=|\bIS\b)\s*(TRUE|FALSE)\b', re.IGNORECASE)
+RANGE_CONJUNCT_PATTERN = re.compile(r'^\(?\s*(?P<column>\w+)\s*(>=|>|<=|<)', re.IGNORECASE)
+FILTER_COLUMN_PATTERN = re.compile(
+    r'^\(*\s*(?!NOT\b)(?P<column>\w+)\s*(?:[=<>!~]|\bI?LIKE\b|\bIS\b|\bIN\b|\bBETWEEN\b)', re.IGNORECASE
+)
+FILTERED_SCAN_PATTERN = re.compile(
+    r'\bFROM\s+(?P<table>\w+)(?:\s+(?!WHERE\b)(?P<alias>\w+))?\s+WHERE\s+(?P<where>.*?)'
+    r'(?=\)\s*(?:,|SELECT\b|$)|\bUNION\b|\bGROUP\s+BY\b|\bORDER\s+BY\b|;|$)',
+    re.IGNORECASE | re.DOTALL
+)
+CTE_NAME_PATTERN = re.compile(r'(?:\bWITH|,)\s*(\w+)\s+AS\s*\(', re.IGNORECASE)
+WINDOW_PATTERN = re.compile(
+    r'PARTITION\s+BY\s+(?P<keys>.*?)\s+ORDER\s+BY.*?\bFROM\s+(?P<table>\w+)\s+WHERE\s+(?P<where>.*?)\s*\)',
+    re.IGNORECASE | re.DOTALL
+)
+
+
+# === ⛏️ MINING ===
+def strip_alias(conjunct, alias):
+    return re.sub(rf'\b{re.escape(alias)}\.', '', conjunct) if alias else conjunct
+
+
+def extract_filters(sql):
+    """``[(table, conjuncts), ...]`` for every filtered table scan in a query, including inside CTEs."""
+    parsed = parse_count_query(sql)
+    if parsed is not None and not parsed['prefix']:
+        conjuncts = [strip_alias(c, parsed['alias']) for c in parsed['conjuncts']]
+        return [(parsed['table'], conjuncts)] if conjuncts else []
+
+    # Scans of a CTE read rows that are already materialized; only base tables can be indexed
+    ctes = {name.lower() for name in CTE_NAME_PATTERN.findall(sql)}
+    filters = []
+    for match in FILTERED_SCAN_PATTERN.finditer(sql):
+        if match.group('table').lower() in ctes:
+            continue
+        conjuncts = [strip_alias(c, match.group('alias')) for c in split_top_level_and(match.group('where'))]
+        filters.append((match.group('table'), conjuncts))
+    return filters
+
+
+def canonical_conjunct(conjunct):
+    """One spelling for boolean tests, so ``x = FALSE`` and ``x IS FALSE`` group together."""
+    return BOOLEAN_COMPARISON_PATTERN.sub(lambda m: f'{m.group(1)} IS {m.group(2).upper()}', conjunct)
+
+
+def is_immutable(conjunct):
+    return not VOLATILE_PATTERN.search(conjunct)
+
+
+def index_name(table, columns, suffix):
+    ending = f'_{suffix}_idx'
+    return f"{table}_{'_'.join(columns)}"[:MAX_INDEX_NAME_LENGTH - len(ending)] + ending
+
+
+def mine_catalog(suites=None):
+    """``{table: [(query name, sql, conjuncts), ...]}`` over every suite."""
+    suites = suites or discover_suites()
+    by_table = {}
+    for suite_name, suite in suites.items():
+        for description, sql in suite.items():
+            seen = set()
+            for table, conjuncts in extract_filters(sql):
+                # A query that scans the same table twice (UNION branches) counts once per distinct filter
+                key = (table, tuple(conjuncts))
+                if key in seen:
+                    continue
+                seen.add(key)
+                by_table.setdefault(table, []).append((f'{suite_name} / {description}', sql, conjuncts))
+    return by_table
+
+
+def shared_predicate_suggestion(table, uses):
+    """Partial index over the immutable conjuncts repeated by most of a table's queries."""
+    if len(uses) < MIN_TABLE_QUERIES:
+        return None
+    canonical = [{canonical_conjunct(c): c for c in conjuncts} for _, _, conjuncts in uses]
+    frequency = Counter(c for spellings in canonical for c in spellings)
+    shared = [c for c, n in frequency.most_common() if n / len(uses) >= MIN_SHARED_FRACTION]
+    shared_predicate = [c for c in shared if is_immutable(c)]
+    keys = [m.group('column') for c in shared if not is_immutable(c) for m in [RANGE_CONJUNCT_PATTERN.match(c)] if m]
+    if not shared_predicate:
+        return None
+
+    matching = [(use, spellings) for use, spellings in zip(uses, canonical) if set(shared_predicate) <= set(spellings)]
+    key_reason = ''
+    if not keys:
+        # No shared range filter: key on the column the other filters test most often
+        residual = Counter(
+            m.group('column') for _, spellings in matching for c in spellings
+            if c not in shared_predicate for m in [FILTER_COLUMN_PATTERN.match(c)] if m
+        )
+        if residual:
+            column, count = residual.most_common(1)[0]
+            keys = [column]
+            key_reason = f"; keyed on {column}, filtered by {count} of them"
+    targets = [(name, sql) for (name, sql, _), _ in matching]
+    # The planner only proves the index predicate from the same spelling, so use the
+    # most common one and point out queries that spell it differently
+    predicate = [Counter(spellings[c] for _, spellings in matching).most_common(1)[0][0] for c in shared_predicate]
+    respell = sum(1 for (_, _, conjuncts), _ in matching if not set(predicate) <= set(conjuncts))
+    reason = f"{len(targets)} of {len(uses)} queries filter on {' AND '.join(predicate)}"
+    if respell:
+        reason += f" ({respell} spell it differently and must match it to use the index)"
+    if not keys:
+        reason += "; no index proposed: they share no other column to key it on"
+    return {
+        'table': table,
+        'name': index_name(table, keys, 'partial') if keys else None,
+        'keys': keys,
+        'predicate': predicate,
+        'kind': 'partial',
+        'reason': reason + key_reason,
+        'targets': targets,
+    }
+
+
+def window_suggestions(suites=None):
+    """Expression index per distinct window ``PARTITION BY`` found in the catalog."""
+    suites = suites or discover_suites()
+    found = {}
+    for suite_name, suite in suites.items():
+        for description, sql in suite.items():
+            for match in WINDOW_PATTERN.finditer(sql):
+                keys = [normalize_sql(k) for k in split_partition_keys(match.group('keys'))]
+                predicate = [c for c in split_top_level_and(match.group('where')) if is_immutable(c)]
+                key = (match.group('table'), tuple(keys), tuple(predicate))
+                found.setdefault(key, []).append((f'{suite_name} / {description}', sql))
+
+    suggestions = []
+    for (table, keys, predicate), targets in found.items():
+        columns = [re.sub(r'\W+', '_', k).strip('_').lower() for k in keys]
+        suggestions.append({
+            'table': table,
+            'name': index_name(table, ['window'] + columns[:2], 'expr'),
+            'keys': list(keys),
+            'predicate': list(predicate),
+            'kind': 'expression',
+            'reason': f"window PARTITION BY {', '.join(keys)} in {len(targets)} queries",
+            'targets': targets,
+        })
+    return suggestions
+
+
+def split_partition_keys(keys):
+    """Split a PARTITION BY list on top-level commas."""
+    parts, depth, start = [], 0, 0
+    for i, char in enumerate(keys):
+        if char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+        elif char == ',' and depth == 0:
+            parts.append(keys[start:i])
+            start = i + 1
+    parts.append(keys[start:])
+    return [part.strip() for part in parts if part.strip()]
+
+
+def suggest_indexes(suites=None):
+    by_table = mine_catalog(suites)
+    suggestions = [s for table, uses in by_table.items() for s in [shared_predicate_suggestion(table, uses)] if s]
+    return suggestions + window_suggestions(suites)
+
+
+def index_ddl(suggestion, concurrently=True):
+    keys = ', '.join(k if re.fullmatch(r'\w+', k) else f'({k})' for k in suggestion['keys'])
+    sql = (f"CREATE INDEX {'CONCURRENTLY ' if concurrently else ''}IF NOT EXISTS {suggestion['name']} "
+           f"ON {suggestion['table']} ({keys})")
+    if suggestion['predicate']:
+        sql += ' WHERE ' + ' AND '.join(f'({c})' for c in suggestion['predicate'])
+    return sql + ';'
+
+
+# === 📏 EVALUATION ===
+def executed_workload(suites=None, partitions=1):
+    """
+    The statements one run of ``suites`` sends, as the executor plans them.
+
+    Returns ``(units, plan, members)``: ``units`` is ``[(names, sql), ...]`` after
+    de-duplication and fusion, ``plan`` the key-range plan (empty unless
+    ``partitions`` > 1; its statements need the table's key bounds, see
+    ``partition_statements``) and ``members`` maps each name to the
+    ``(suite, description)`` pairs it answers.
+    """
+    queries, members = merge_suites(suites or discover_suites())
+    plan = {}
+    if partitions > 1:
+        plan, queries = plan_range_partitions(queries)
+    units = plan_fused_queries(queries) if FUSE_QUERIES else [([name], sql) for name, sql in queries.items()]
+    return units, plan, members
+
+
+def partition_statements(cur, plan, partitions):
+    """``[(names, sql), ...]`` for every key range of every planned table."""
+    statements = []
+    for table, table_plan in plan.items():
+        cur.execute(f'SELECT MIN({PARTITION_KEY}), MAX({PARTITION_KEY}) FROM {table};')
+        ranges = key_ranges(*cur.fetchone(), partitions)
+        statements.extend((names, sql) for _, names, sql in build_partition_tasks(table, table_plan, ranges))
+    return statements
+
+
+def target_statements(suggestion, statements, members):
+    """The ``(label, sql)`` statements that answer at least one of the suggestion's target queries."""
+    targets = {name for name, _ in suggestion['targets']}
+    return [
+        (', '.join(names), sql) for names, sql in statements
+        if any(f'{suite} / {description}' in targets for name in names for suite, description in members[name])
+    ]
+
+
+def plan_cost(cur, sql):
+    cur.execute('EXPLAIN (FORMAT JSON) ' + sql.strip().rstrip(';'))
+    plan = cur.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]['Plan']['Total Cost']
+
+
+def has_hypopg(cur):
+    cur.execute("SELECT 1 FROM pg_extension WHERE extname = 'hypopg';")
+    return cur.fetchone() is not None
+
+
+def evaluate_with_hypopg(cur, suggestion):
+    """Planner cost of each target statement without and with the index as a hypothetical one."""
+    before = {name: plan_cost(cur, sql) for name, sql in suggestion['statements']}
+    cur.execute('SELECT * FROM hypopg_create_index(%s);', (index_ddl(suggestion, concurrently=False),))
+    try:
+        after = {name: plan_cost(cur, sql) for name, sql in suggestion['statements']}
+    finally:
+        cur.execute('SELECT hypopg_reset();')
+    return before, after
+
+
+def time_query(cur, sql, repeat=BENCHMARK_REPEAT):
+    runs = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        cur.execute(sql)
+        cur.fetchall()
+        runs.append(time.perf_counter() - started)
+    return statistics.median(runs)
+
+
+def evaluate_with_benchmark(conn, suggestion):
+    """Median wall time of each target statement before and after building the index for real."""
+    with conn.cursor() as cur:
+        before = {name: time_query(cur, sql) for name, sql in suggestion['statements']}
+        cur.execute(index_ddl(suggestion, concurrently=False))
+        cur.execute(f"ANALYZE {suggestion['table']};")
+        try:
+            after = {name: time_query(cur, sql) for name, sql in suggestion['statements']}
+        finally:
+            cur.execute(f"DROP INDEX IF EXISTS {suggestion['name']};")
+    return before, after
+
+
+def evaluate(env, suggestions, create_indexes=False, suites=None, partitions=1):
+    """Attach before/after measurements of the executed statements and the speedup to every suggestion."""
+    from db_connection.connection_pool import connect_db
+
+    conn = connect_db(env)
+    conn.autocommit = True
+    try:
+        with conn.cursor() as cur:
+            hypopg = has_hypopg(cur)
+        if not hypopg and not create_indexes:
+            print("⚠️ hypopg is not installed; pass --create-indexes to measure on a local database instead")
+            return suggestions
+
+        units, plan, members = executed_workload(suites, partitions)
+        if plan:
+            with conn.cursor() as cur:
+                units = units + partition_statements(cur, plan, partitions)
+        for suggestion in suggestions:
+            if suggestion['name'] is None:
+                continue
+            suggestion['statements'] = target_statements(suggestion, units, members)
+            try:
+                if hypopg:
+                    with conn.cursor() as cur:
+                        before, after = evaluate_with_hypopg(cur, suggestion)
+                    suggestion['method'] = 'hypopg (planner cost)'
+                else:
+                    before, after = evaluate_with_benchmark(conn, suggestion)
+                    suggestion['method'] = f'benchmark (median of {BENCHMARK_REPEAT}, seconds)'
+            except Exception as e:
+                suggestion['method'] = f'failed: {e}'
+                continue
+            suggestion['before'] = sum(before.values())
+            suggestion['after'] = sum(after.values())
+            suggestion['speedup'] = suggestion['before'] / suggestion['after'] if suggestion['after'] else None
+    finally:
+        conn.close()
+    return suggestions
+
+
+# === 🚀 COMMAND LINE ===
+def main():
+    parser = argparse.ArgumentParser(description="Propose partial and expression indexes for the completeness queries.")
+    parser.add_argument('--env', default=ENV, help="Database to evaluate against (default: %(default)s)")
+    parser.add_argument('--no-evaluate', dest='evaluate', action='store_false',
+                        help="Only print the suggestions, don't connect to a database")
+    parser.add_argument('--create-indexes', action='store_true',
+                        help="Without hypopg, build each index for real, time the queries and drop it again "
+                             "(local databases only)")
+    parser.add_argument('--partitions', type=int, default=1,
+                        help="Evaluate against the key-range statements query_executor.py sends with the same "
+                             "--partitions (default: %(default)s, i.e. off)")
+    args = parser.parse_args()
+
+    suggestions = suggest_indexes()
+    if args.evaluate:
+        evaluate(args.env, suggestions, args.create_indexes, partitions=args.partitions)
+
+    rows = []
+    for s in suggestions:
+        speedup = s.get('speedup')
+        if s['name'] is None:
+            print(f"ℹ️ {s['table']}: {s['reason']}")
+        else:
+            print(f"💡 {index_ddl(s)}")
+            print(f"   {s['reason']}" + (f"; estimated speedup {speedup:.1f}x over "
+                                         f"{len(s['statements'])} executed statements ({s['method']})"
+                                         if speedup else ''))
+        rows.append({
+            'Table': s['table'],
+            'Index': index_ddl(s) if s['name'] else None,
+            'Reason': s['reason'],
+            'Queries': '; '.join(name for name, _ in s['targets']),
+            'Statements': len(s['statements']) if 'statements' in s else None,
+            'Method': s.get('method'),
+            'Before': s.get('before'),
+            'After': s.get('after'),
+            'Speedup': round(speedup, 2) if speedup else None,
+        })
+
+    import pandas as pd
+    filename = f"index_suggestions_{args.env}_{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}.csv"
+    pd.DataFrame(rows).to_csv(filename, index=False)
+    print(f"✅ {sum(1 for s in suggestions if s['name'])} index suggestions saved to '{filename}'")
+
+
+if __name__ == "__main__":
+    main()
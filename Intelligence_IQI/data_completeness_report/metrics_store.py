@@ -0,0 +1,219 @@
+"""
+Local time-series store for completeness metrics.
+
+Every ``query_executor.py`` run is appended to one SQLite file instead of only a
+loose timestamped CSV. Runs are indexed by suite, environment and date, and a
+``latest_values`` table (exact runs only, newest ``started_at`` wins) is kept up to
+date on every append, so the common lookups stay in the millisecond range even
+after a year of hourly runs:
+
+    store = MetricsStore()
+    store.metric_history('sales_query', 'prod', 'Sales Missed Buyer Agent')
+    store.diff_runs(run_a, run_b)
+    store.latest_values('sales_query', 'prod')
+
+Run ``python metrics_store.py --help`` for the same lookups from the shell.
+"""
+import os
+import sqlite3
+import argparse
+from datetime import datetime
+
+# === 🔧 CONFIGURATION ===
+STORE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'completeness_metrics.sqlite3')
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS runs (
+    run_id INTEGER PRIMARY KEY,
+    suite TEXT NOT NULL,
+    env TEXT NOT NULL,
+    run_date TEXT NOT NULL,
+    started_at TEXT NOT NULL,
+    approximate INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS runs_suite_env_started ON runs (suite, env, started_at);
+CREATE INDEX IF NOT EXISTS runs_date ON runs (run_date);
+
+CREATE TABLE IF NOT EXISTS metric_values (
+    run_id INTEGER NOT NULL REFERENCES runs (run_id),
+    metric TEXT NOT NULL,
+    value REAL,
+    error TEXT,
+    cached INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (run_id, metric)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS metric_values_metric ON metric_values (metric, run_id);
+
+CREATE TABLE IF NOT EXISTS latest_values (
+    suite TEXT NOT NULL,
+    env TEXT NOT NULL,
+    metric TEXT NOT NULL,
+    run_id INTEGER NOT NULL,
+    started_at TEXT NOT NULL,
+    value REAL,
+    error TEXT,
+    PRIMARY KEY (suite, env, metric)
+) WITHOUT ROWID;
+'''
+
+
+def ensure_schema(db):
+    """Create the tables, and add columns that stores written by older versions lack."""
+    db.executescript(SCHEMA)
+    columns = {name for _, name, *_ in db.execute('PRAGMA table_info(metric_values)')}
+    if 'cached' not in columns:
+        with db:
+            db.execute('ALTER TABLE metric_values ADD COLUMN cached INTEGER NOT NULL DEFAULT 0')
+
+
+def split_value(count):
+    """Store numeric counts as values and anything else (e.g. 'Error: ...') as an error."""
+    if isinstance(count, (int, float)) and not isinstance(count, bool):
+        return float(count), None
+    return None, None if count is None else str(count)
+
+
+class MetricsStore:
+    def __init__(self, path=STORE_PATH):
+        self.path = path
+        self._db = sqlite3.connect(path)
+        ensure_schema(self._db)
+
+    def append_run(self, suite, env, rows, started_at=None, approximate=False, cached=()):
+        """
+        Append one suite run (``[{'Query Description', 'Count'}, ...]``) and return its run_id.
+
+        Metrics named in ``cached`` were reused from the result cache and are flagged as such.
+        """
+        started_at = started_at or datetime.now()
+        with self._db:
+            run_id = self._db.execute(
+                'INSERT INTO runs (suite, env, run_date, started_at, approximate) VALUES (?, ?, ?, ?, ?)',
+                (suite, env, started_at.date().isoformat(), started_at.isoformat(timespec='seconds'), int(approximate))
+            ).lastrowid
+            values = [(row['Query Description'], *split_value(row['Count'])) for row in rows]
+            self._db.executemany(
+                'INSERT OR REPLACE INTO metric_values (run_id, metric, value, error, cached) VALUES (?, ?, ?, ?, ?)',
+                [(run_id, metric, value, error, int(metric in cached)) for metric, value, error in values]
+            )
+            if approximate:
+                # Estimates never replace an exact latest value
+                return run_id
+            # Backfills older than the stored value leave it in place
+            self._db.executemany(
+                '''INSERT INTO latest_values (suite, env, metric, run_id, started_at, value, error)
+                   VALUES (?, ?, ?, ?, ?, ?, ?)
+                   ON CONFLICT (suite, env, metric) DO UPDATE SET
+                       run_id = excluded.run_id, started_at = excluded.started_at,
+                       value = excluded.value, error = excluded.error
+                   WHERE excluded.started_at >= latest_values.started_at''',
+                [(suite, env, metric, run_id, started_at.isoformat(timespec='seconds'), value, error)
+                 for metric, value, error in values]
+            )
+        return run_id
+
+    def metric_history(self, suite, env, metric, since=None, include_approximate=False):
+        """``[(started_at, value), ...]`` for one metric, oldest first."""
+        sql = '''SELECT r.started_at, v.value
+                 FROM runs r JOIN metric_values v ON v.run_id = r.run_id AND v.metric = ?
+                 WHERE r.suite = ? AND r.env = ?'''
+        params = [metric, suite, env]
+        if since:
+            sql += ' AND r.started_at >= ?'
+            params.append(since)
+        if not include_approximate:
+            sql += ' AND r.approximate = 0'
+        return self._db.execute(sql + ' ORDER BY r.started_at', params).fetchall()
+
+    def list_runs(self, suite=None, env=None, limit=20):
+        """Most recent runs first: ``[(run_id, suite, env, started_at, approximate), ...]``."""
+        sql = 'SELECT run_id, suite, env, started_at, approximate FROM runs WHERE 1 = 1'
+        params = []
+        if suite:
+            sql += ' AND suite = ?'
+            params.append(suite)
+        if env:
+            sql += ' AND env = ?'
+            params.append(env)
+        return self._db.execute(sql + ' ORDER BY started_at DESC, run_id DESC LIMIT ?', params + [limit]).fetchall()
+
+    def diff_runs(self, run_a, run_b):
+        """``[(metric, value_a, value_b, delta), ...]`` for every metric present in either run."""
+        rows = self._db.execute(
+            '''SELECT metric,
+                      MAX(CASE WHEN run_id = ? THEN value END),
+                      MAX(CASE WHEN run_id = ? THEN value END)
+               FROM metric_values
+               WHERE run_id IN (?, ?)
+               GROUP BY metric
+               ORDER BY metric''',
+            (run_a, run_b, run_a, run_b)
+        ).fetchall()
+        return [
+            (metric, a, b, b - a if a is not None and b is not None else None)
+            for metric, a, b in rows
+        ]
+
+    def latest_values(self, suite=None, env=None):
+        """Latest value of every metric: ``[(suite, env, metric, started_at, value, error), ...]``."""
+        sql = 'SELECT suite, env, metric, started_at, value, error FROM latest_values WHERE 1 = 1'
+        params = []
+        if suite:
+            sql += ' AND suite = ?'
+            params.append(suite)
+        if env:
+            sql += ' AND env = ?'
+            params.append(env)
+        return self._db.execute(sql + ' ORDER BY suite, env, metric', params).fetchall()
+
+    def close(self):
+        self._db.close()
+
+
+# === 🚀 COMMAND LINE ===
+def main():
+    parser = argparse.ArgumentParser(description="Query the local completeness metrics store.")
+    parser.add_argument('--store', default=STORE_PATH, help="Path to the SQLite store")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    history = commands.add_parser('history', help="One metric over time")
+    history.add_argument('suite')
+    history.add_argument('env')
+    history.add_argument('metric')
+    history.add_argument('--since', help="ISO date or timestamp")
+
+    runs = commands.add_parser('runs', help="List recent runs")
+    runs.add_argument('--suite')
+    runs.add_argument('--env')
+    runs.add_argument('--limit', type=int, default=20)
+
+    diff = commands.add_parser('diff', help="Compare two runs")
+    diff.add_argument('run_a', type=int)
+    diff.add_argument('run_b', type=int)
+
+    latest = commands.add_parser('latest', help="Latest value of every metric")
+    latest.add_argument('--suite')
+    latest.add_argument('--env')
+
+    args = parser.parse_args()
+    store = MetricsStore(args.store)
+    try:
+        if args.command == 'history':
+            for started_at, value in store.metric_history(args.suite, args.env, args.metric, args.since):
+                print(f"{started_at}\t{value}")
+        elif args.command == 'runs':
+            for run_id, suite, env, started_at, approximate in store.list_runs(args.suite, args.env, args.limit):
+                suffix = '\t(approximate)' if approximate else ''
+                print(f"{run_id}\t{started_at}\t{suite}\t{env}{suffix}")
+        elif args.command == 'diff':
+            for metric, a, b, delta in store.diff_runs(args.run_a, args.run_b):
+                print(f"{metric}\t{a}\t{b}\t{delta}")
+        elif args.command == 'latest':
+            for suite, env, metric, started_at, value, error in store.latest_values(args.suite, args.env):
+                print(f"{suite}\t{env}\t{metric}\t{started_at}\t{value if error is None else error}")
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
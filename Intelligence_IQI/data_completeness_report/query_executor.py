@@ -1,95 +1,451 @@
 import os
 import sys
-import boto3
-import psycopg2
-import pandas as pd
-from dotenv import load_dotenv
+import time
+import argparse
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 
 # Ensure module paths work when running as script
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from sql_queries.data_completeness_queries import (
-    loan_officers_query, sales_query, realtors_query, loans_query, zebra_query, 
-    suspicious_realtor_patterns, active_buyer_completeness_report
+from data_completeness_report.suite_registry import (
+    discover_suites, select_suites, merge_suites, split_suite_results, suite_label
 )
+from data_completeness_report.metrics_store import MetricsStore
+from data_completeness_report.anomaly_detection import DriftDetector, print_anomaly_report
+from data_completeness_report.query_scheduler import (
+    DurationHistory, AdaptiveLimiter, order_longest_first, expected_makespan, MAX_CONCURRENCY
+)
+from data_completeness_report.zebra_sweep import build_zebra_suites, build_state_matrix
+from data_completeness_report.query_fusion import plan_fused_queries, split_fused_result
+from data_completeness_report.range_partitioning import (
+    plan_range_partitions, build_range_tasks, run_partition_task, combine_partition_results
+)
+from data_completeness_report.approximate_counts import (
+    plan_approximate_queries, estimate_results, exact_result
+)
+from data_completeness_report.result_cache import (
+    ResultCache, referenced_tables, probe_table_signatures, unit_signature
+)
+from data_completeness_report.query_timing import (
+    new_record, mark_failed, explain_sql, attach_explain, statement_timeout_ms,
+    write_timings, print_slow_query_report
+)
+from db_connection.connection_pool import get_pool, close_pools
 
-# Load environment variables
-load_dotenv()
+# Database credentials are read from .env on first connect, so --list-suites and --print-sql never need them
 ENV = 'dev' # 👈 Change to prod, dev, or stage as needed
 
-REGION = os.getenv('REGION')
-DB_HOST = os.getenv(f'{ENV.upper()}_DB_HOST')
-DB_NAME = os.getenv(f'{ENV.upper()}_DB_NAME')
-DB_USER = os.getenv(f'{ENV.upper()}_DB_USER')
-
-os.environ['AWS_ACCESS_KEY_ID'] = os.getenv(f'{ENV.upper()}_AWS_ACCESS_KEY_ID')
-os.environ['AWS_SECRET_ACCESS_KEY'] = os.getenv(f'{ENV.upper()}_AWS_SECRET_ACCESS_KEY')
-os.environ['AWS_SESSION_TOKEN'] = os.getenv(f'{ENV.upper()}_AWS_SESSION_TOKEN')
-
-# Choose which query set to use
-QUERIES = zebra_query # 👈 Change to loans_query, etc. as needed
-
-# Infer query type for filename
-query_type = (
-    'realtor' if QUERIES == realtors_query else 
-    'loan_officer' if QUERIES == loan_officers_query else
-    'loan' if QUERIES == loans_query else
-    'zebra' if QUERIES == zebra_query else
-    'suspicious_realtor_patterns' if QUERIES == suspicious_realtor_patterns else
-    'active_buyer_completeness_report' if QUERIES == active_buyer_completeness_report else
-    'sale'
-)
+# Choose which query sets to run (any names from data_completeness_queries.__all__, or ['all'])
+SUITES = ['zebra_query'] # 👈 Or pass --suites loans_query,sales_query / --suites all
+
+# Fuse COUNT(*) queries over the same table into one FILTER-aggregate scan
+FUSE_QUERIES = True # 👈 Set to False to send every query as its own statement
+
+# Execution engine: 'threads' (ThreadPoolExecutor + pooled psycopg2) or 'async' (asyncio + asyncpg)
+ENGINE = 'threads' # 👈 Or pass --engine async
+ASYNC_CONCURRENCY = 20 # Max in-flight queries per database host in async mode
+QUERY_TIMEOUT_SECONDS = 600 # Per-query statement_timeout
+
+# Threaded engine: statements in flight follow server load from pg_stat_activity, up to MAX_THREADS
+MAX_THREADS = MAX_CONCURRENCY
+ADAPTIVE_CONCURRENCY = True # 👈 Or pass --fixed-concurrency
+
+# Split eligible counts on the largest tables into N primary-key ranges run in parallel (1 = off)
+RANGE_PARTITIONS = 1 # 👈 Or pass --partitions 8
+
+# Reuse cached counts for queries whose tables haven't changed since the last run
+USE_RESULT_CACHE = True # 👈 Or pass --no-cache
+
+# Append every run to the local metrics store (see metrics_store.py)
+RECORD_METRICS = True # 👈 Or pass --no-store
+
+# Flag metrics that drift away from their rolling baseline (see anomaly_detection.py)
+DETECT_ANOMALIES = True # 👈 Or pass --no-anomaly-check
 
 # 🕒 Add timestamp to CSV filename
 timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-output_filename = f"{query_type}_counts_{ENV}_{timestamp}.csv"
-
-def get_iam_token():
-    client = boto3.client('rds', region_name=REGION)
-    return client.generate_db_auth_token(
-        DBHostname=DB_HOST,
-        Port=5432,
-        DBUsername=DB_USER
-    )
-
-def connect_db():
-    return psycopg2.connect(
-        host=DB_HOST,
-        dbname=DB_NAME,
-        user=DB_USER,
-        password=get_iam_token(),
-        port=5432,
-        sslmode='require'
-    )
-
-def run_query(name_query_tuple):
-    name, query = name_query_tuple
+
+def build_output_filename(suite_name, envs, approximate=False):
+    filename = f"{suite_label(suite_name)}_counts_{'-'.join(envs)}_{timestamp}.csv"
+    return filename.replace('.csv', '_approx.csv') if approximate else filename
+
+def run_query(env, names_query_tuple, args, timings, submitted, limiter):
+    names, query = names_query_tuple
+    record = new_record(env, names, query)
+    executed = None
     try:
-        with connect_db() as conn:
-            with conn.cursor() as cur:
-                cur.execute(query)
-                result = cur.fetchone()[0]
-        return {'Query Description': name, 'Count': result}
+        with limiter.slot():
+            started = time.monotonic()
+            record['queue_wait_s'] = started - submitted
+            with get_pool(env).connection() as conn:
+                record['connect_s'] = time.monotonic() - started
+                with conn.cursor() as cur:
+                    cur.execute("SET LOCAL statement_timeout = %s;", (statement_timeout_ms(args.query_timeout),))
+                    executed = time.monotonic()
+                    cur.execute(query)
+                    row = cur.fetchone()
+                    record['execution_s'] = time.monotonic() - executed
+                    if args.explain:
+                        try:
+                            cur.execute(explain_sql(query))
+                            attach_explain(record, cur.fetchone()[0])
+                        except Exception as e:
+                            # Keep the count; the plan is a nice-to-have
+                            record['error'] = f"EXPLAIN failed: {e}"
+        return split_fused_result(names, row)
     except Exception as e:
-        return {'Query Description': name, 'Count': f"Error: {str(e)}"}
+        if record['execution_s'] is None and executed is not None:
+            record['execution_s'] = time.monotonic() - executed
+        mark_failed(record, e)
+        return [{'Query Description': name, 'Count': f"Error: {str(e)}"} for name in names]
+    finally:
+        timings.append(record)
 
-def main():
-    max_threads = min(60, len(QUERIES))
+def fetch_first_row(env, query):
+    with get_pool(env).connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(query)
+            return cur.fetchone()
+
+def run_units_threaded(env, units, args, timings, partition_tasks=()):
+    """Run fused units and key-range tasks under one limiter; returns ``(rows, partition outcomes)``."""
+    max_threads = min(args.max_threads, len(units) + len(partition_tasks))
+    results, outcomes = [], []
+    if not max_threads:
+        return results, outcomes
+
+    # One pooled connection per worker thread, reused across queries; the limiter
+    # decides how many of them run a statement at any moment
+    get_pool(env, max_size=max_threads)
+    with AdaptiveLimiter(env, max_threads, args.adaptive_concurrency) as limiter, \
+            ThreadPoolExecutor(max_workers=max_threads) as executor:
+        submitted = time.monotonic()
+        futures = {executor.submit(run_partition_task, env, task, args, timings, submitted, limiter): task
+                   for task in partition_tasks}
+        futures.update({executor.submit(run_query, env, unit, args, timings, submitted, limiter): None
+                        for unit in units})
+        for future in as_completed(futures):
+            task = futures[future]
+            if task is None:
+                results.extend(future.result())
+            else:
+                error = future.exception()
+                outcomes.append((task, None if error else future.result(), error))
+    return results, outcomes
+
+def lookup_cached_units(env, units, cache):
+    """Split units into cache misses and cached rows, probing table change signals once."""
+    tables = {table for _, query in units for table in referenced_tables(query)}
+    try:
+        with get_pool(env).connection() as conn:
+            table_signatures = probe_table_signatures(conn, tables)
+    except Exception as e:
+        print(f"⚠️ [{env}] Could not read table change signals, skipping cache: {e}")
+        return units, [], {}
+
+    signatures = {query: unit_signature(query, table_signatures) for _, query in units}
+    misses, cached_rows = [], []
+    for names, query in units:
+        row = cache.get(env, query, signatures[query])
+        if row is None:
+            misses.append((names, query))
+        else:
+            cached_rows.extend(split_fused_result(names, row))
+    return misses, cached_rows, signatures
+
+def store_fresh_results(env, units, results, signatures, cache):
+    counts = {row['Query Description']: row['Count'] for row in results}
+    for names, query in units:
+        row = [counts.get(name) for name in names]
+        if any(value is None or (isinstance(value, str) and value.startswith('Error')) for value in row):
+            continue
+        cache.put(env, query, signatures.get(query), row)
+    cache.evict()
+
+def schedule_longest_first(env, units, concurrency):
+    """Order units by their past durations, longest first, so the slowest statement never starts last."""
+    history = DurationHistory()
+    try:
+        estimates = history.estimates(env, units)
+    finally:
+        history.close()
+    if estimates:
+        print(f"📐 [{env}] Longest-first order from {len(estimates)} known durations: longest "
+              f"{max(estimates.values()):.1f}s, expected makespan ≥ {expected_makespan(units, estimates, concurrency):.1f}s")
+    return order_longest_first(units, estimates)
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Run data completeness queries and save counts to CSV.")
+    parser.add_argument('--suites', type=lambda value: [name.strip() for name in value.split(',') if name.strip()],
+                        default=SUITES,
+                        help="Comma-separated suites to run in one process, or 'all' (default: %(default)s)")
+    parser.add_argument('--list-suites', action='store_true',
+                        help="Print the available suites and exit")
+    parser.add_argument('--print-sql', action='store_true',
+                        help="Print the statements the selected suites would send (after fusion) and exit "
+                             "without connecting")
+    parser.add_argument('--zebra-sweep', nargs='?', const='all', default=None, metavar='STATES',
+                        help="Run the zebra suite over every table in zebra_tables (or a comma-separated "
+                             "list of state keys) and save one state-by-metric matrix")
+    parser.add_argument('--engine', choices=['threads', 'async'], default=ENGINE,
+                        help="Execution engine (default: %(default)s)")
+    parser.add_argument('--concurrency', type=int, default=ASYNC_CONCURRENCY,
+                        help="Max in-flight queries per database host in async mode (default: %(default)s)")
+    parser.add_argument('--max-threads', type=int, default=MAX_THREADS,
+                        help="Max statements in flight per environment in threads mode (default: %(default)s)")
+    parser.add_argument('--fixed-concurrency', dest='adaptive_concurrency', action='store_false',
+                        default=ADAPTIVE_CONCURRENCY,
+                        help="Always run --max-threads statements at once instead of following server load")
+    parser.add_argument('--partitions', type=int, default=RANGE_PARTITIONS,
+                        help="Split eligible counts on the largest tables into this many primary-key ranges "
+                             "run on separate connections (default: %(default)s, i.e. off)")
+    parser.add_argument('--query-timeout', type=float, default=QUERY_TIMEOUT_SECONDS,
+                        help="Per-query statement_timeout in seconds (default: %(default)s)")
+    parser.add_argument('--no-cache', dest='use_cache', action='store_false', default=USE_RESULT_CACHE,
+                        help="Always query the database instead of reusing cached counts")
+    parser.add_argument('--no-store', dest='record_metrics', action='store_false', default=RECORD_METRICS,
+                        help="Don't append this run to the local metrics store")
+    parser.add_argument('--no-anomaly-check', dest='detect_anomalies', action='store_false', default=DETECT_ANOMALIES,
+                        help="Don't compare this run's metrics against their rolling baselines")
+    parser.add_argument('--envs', type=lambda value: [env.strip() for env in value.split(',') if env.strip()],
+                        default=[ENV],
+                        help="Comma-separated environments to run concurrently, e.g. dev,stage,prod "
+                             "(default: %(default)s)")
+    parser.add_argument('--approximate', action='store_true',
+                        help="Estimate counts on the largest tables from reltuples and TABLESAMPLE, "
+                             "with confidence intervals")
+    parser.add_argument('--explain', action='store_true',
+                        help="Also capture EXPLAIN (ANALYZE, BUFFERS) for every statement (runs each one twice)")
+    return parser.parse_args()
+
+def plan_partitions(env, queries, args):
+    """``(plan, tasks, remaining queries)``; tables whose key ranges can't be read go back to ``remaining``."""
+    plan, remaining = plan_range_partitions(queries)
+    tasks, failed = build_range_tasks(env, plan, args.partitions, args.query_timeout) if plan else ([], [])
+    for table in failed:
+        for name in [*plan[table]['counts'], *plan[table]['distinct']]:
+            remaining[name] = queries[name]
+        del plan[table]
+    if plan:
+        split = sum(len(p['counts']) + len(p['distinct']) for p in plan.values())
+        print(f"🔪 [{env}] Splitting {split} queries on {len(plan)} tables into {args.partitions} key ranges each")
+    return plan, tasks, remaining
+
+def run_exact(env, queries, args, timings, cached=None):
+    plan, partition_tasks = {}, []
+    if args.partitions > 1:
+        plan, partition_tasks, queries = plan_partitions(env, queries, args)
+
+    if FUSE_QUERIES:
+        units = plan_fused_queries(queries)
+        print(f"🧩 [{env}] Fused {len(queries)} queries into {len(units)} statements")
+    else:
+        units = [([name], query) for name, query in queries.items()]
+
+    cache = ResultCache() if args.use_cache else None
+    try:
+        results, signatures, pending = [], {}, units
+        if cache:
+            pending, results, signatures = lookup_cached_units(env, units, cache)
+            if cached is not None:
+                cached.update(row['Query Description'] for row in results)
+            print(f"💾 [{env}] {len(units) - len(pending)} of {len(units)} statements answered from cache")
+
+        outcomes = []
+        if pending or partition_tasks:
+            concurrency = args.concurrency if args.engine == 'async' else args.max_threads
+            pending = schedule_longest_first(env, pending, concurrency)
+            if args.engine == 'async':
+                # asyncpg is only needed for this mode; key ranges stay on the threaded limiter
+                # and run alongside it
+                from data_completeness_report.async_executor import run_units
+                with ThreadPoolExecutor(max_workers=1) as background:
+                    partitioned = background.submit(run_units_threaded, env, [], args, timings, partition_tasks)
+                    fresh = run_units(env, pending, args.concurrency, args.query_timeout, args.explain, timings) \
+                        if pending else []
+                    _, outcomes = partitioned.result()
+            else:
+                fresh, outcomes = run_units_threaded(env, pending, args, timings, partition_tasks)
+            results.extend(fresh)
+            if cache:
+                store_fresh_results(env, pending, fresh, signatures, cache)
+    finally:
+        if cache:
+            cache.close()
+    return results + combine_partition_results(plan, outcomes)
+
+def run_approximate(env, queries, args, timings, cached=None):
+    estimate_units, exact_queries = plan_approximate_queries(queries)
+    print(f"🎲 [{env}] Estimating {len(queries) - len(exact_queries)} queries from {len(estimate_units)} sampled statements")
     results = []
 
-    with ThreadPoolExecutor(max_workers=max_threads) as executor:
-        futures = [executor.submit(run_query, item) for item in QUERIES.items()]
+    if estimate_units:
+        get_pool(env, max_size=len(estimate_units))
+        with ThreadPoolExecutor(max_workers=len(estimate_units)) as executor:
+            futures = {executor.submit(fetch_first_row, env, unit['sql']): unit for unit in estimate_units}
+            for future in as_completed(futures):
+                unit = futures[future]
+                try:
+                    estimated = estimate_results(unit, future.result())
+                    if estimated is None:
+                        print(f"↩️ [{env}] Sample of '{unit['table']}' too small, counting exactly")
+                except Exception as e:
+                    print(f"⚠️ [{env}] Sampling '{unit['table']}' failed, counting exactly: {e}")
+                    estimated = None
+                if estimated is None:
+                    exact_queries.update({name: queries[name] for name in unit['names']})
+                else:
+                    results.extend(estimated)
+
+    if exact_queries:
+        results.extend(exact_result(row) for row in run_exact(env, exact_queries, args, timings, cached))
+    return results
+
+def run_environment(env, queries, args, timings, cached=None):
+    """Run one environment; names of queries answered from the result cache are added to ``cached``."""
+    try:
+        if args.approximate:
+            return run_approximate(env, queries, args, timings, cached)
+        return run_exact(env, queries, args, timings, cached)
+    finally:
+        close_pools(env)
+
+def print_planned_sql(queries, args):
+    """Dry run: the statements one environment would be sent, with the queries each one answers."""
+    if args.partitions > 1:
+        plan, queries = plan_range_partitions(queries)
+        for table, table_plan in plan.items():
+            names = [*table_plan['counts'], *table_plan['distinct']]
+            print(f"-- {table}: {len(names)} queries split into {args.partitions} key ranges: {', '.join(names)}")
+    units = plan_fused_queries(queries) if FUSE_QUERIES else [([name], query) for name, query in queries.items()]
+    for names, query in units:
+        print(f"-- {', '.join(names)}")
+        print(query.strip())
+        print()
+
+def build_wide_table(results_by_env, envs, queries):
+    """One row per query, one count column per environment, plus deltas against the first environment."""
+    import pandas as pd
+
+    base_env = envs[0]
+    counts = {env: {row['Query Description']: row['Count'] for row in results_by_env[env]} for env in envs}
+    rows = []
+    for name in queries:
+        row = {'Query Description': name}
+        for env in envs:
+            row[env] = counts[env].get(name)
+        for env in envs[1:]:
+            base, other = row[base_env], row[env]
+            numeric = isinstance(base, (int, float)) and isinstance(other, (int, float))
+            row[f'{env} - {base_env}'] = other - base if numeric else None
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+def main():
+    args = parse_args()
+    if args.list_suites:
+        for name, suite in discover_suites().items():
+            print(f"{name} ({len(suite)} queries)")
+        return
+
+    envs = args.envs
+    try:
+        if args.zebra_sweep:
+            states = None if args.zebra_sweep == 'all' else [state.strip() for state in args.zebra_sweep.split(',')]
+            suites = build_zebra_suites(states)
+        else:
+            suites = select_suites(args.suites)
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(2)
+    queries, members = merge_suites(suites)
+    total = sum(len(suite) for suite in suites.values())
+    if args.print_sql:
+        print_planned_sql(queries, args)
+        return
+    print(f"📚 Running {len(suites)} suite(s): {total} queries, {len(queries)} after de-duplication")
+
+    # pandas is only needed once there are results to write
+    import pandas as pd
+
+    # Each environment gets its own thread, connection pool and credentials
+    started_at = datetime.now()
+    results_by_env = {}
+    timings = []
+    cached_by_env = {env: set() for env in envs}
+    with ThreadPoolExecutor(max_workers=len(envs)) as executor:
+        futures = {executor.submit(run_environment, env, queries, args, timings, cached_by_env[env]): env
+                   for env in envs}
         for future in as_completed(futures):
-            results.append(future.result())
+            results_by_env[futures[future]] = split_suite_results(future.result(), suites, members)
+
+    if args.zebra_sweep:
+        filename = build_output_filename('zebra_sweep', envs, args.approximate)
+        build_state_matrix(results_by_env, suites, envs).to_csv(filename, index=False)
+        print(f"✅ Zebra state-by-metric matrix saved to '{filename}'")
+    else:
+        for suite_name, suite in suites.items():
+            filename = build_output_filename(suite_name, envs, args.approximate)
+            if len(envs) == 1:
+                df = pd.DataFrame(results_by_env[envs[0]][suite_name])
+            else:
+                df = build_wide_table({env: results_by_env[env][suite_name] for env in envs}, envs, suite)
+
+            # Save DataFrame to CSV
+            df.to_csv(filename, index=False)
+            print(f"✅ {suite_name} counts saved to '{filename}'")
+
+    # (suite, description) pairs each environment answered from the result cache
+    cached_members = {env: {member for key in cached_by_env[env] for member in members[key]} for env in envs}
+    if args.record_metrics:
+        store = MetricsStore()
+        try:
+            for env in envs:
+                for suite_name in suites:
+                    store.append_run(suite_name, env, results_by_env[env][suite_name], started_at, args.approximate,
+                                     cached={description for name, description in cached_members[env]
+                                             if name == suite_name})
+        finally:
+            store.close()
+        print(f"🗄️ Run recorded in metrics store '{store.path}'")
+
+    if args.zebra_sweep:
+        run_name = 'zebra_sweep'
+    else:
+        run_name = '-'.join(suite_label(name) for name in suites) if len(suites) <= 3 else 'all_suites'
 
-    # Convert results to a DataFrame
-    df = pd.DataFrame(results)
+    if args.detect_anomalies:
+        detector = DriftDetector()
+        anomalies = []
+        try:
+            for env in envs:
+                for suite_name in suites:
+                    # Estimates, unstored runs and cached counts (a repeat of an earlier value) are
+                    # scored but never folded into the baselines
+                    anomalies.extend(detector.check_run(
+                        suite_name, env, results_by_env[env][suite_name], started_at,
+                        update=args.record_metrics and not args.approximate,
+                        frozen={description for name, description in cached_members[env] if name == suite_name}
+                    ))
+        finally:
+            detector.close()
+        print_anomaly_report(anomalies)
+        if anomalies:
+            anomalies_filename = f"{run_name}_anomalies_{'-'.join(envs)}_{timestamp}.csv"
+            pd.DataFrame(anomalies).to_csv(anomalies_filename, index=False)
+            print(f"🚨 Anomaly report saved to '{anomalies_filename}'")
 
-    # Save DataFrame to CSV
-    df.to_csv(output_filename, index=False)
-    print(f"✅ All counts saved to '{output_filename}'")
+    if timings:
+        history = DurationHistory()
+        try:
+            history.record(timings)
+        finally:
+            history.close()
+        timings_filename = f"{run_name}_timings_{'-'.join(envs)}_{timestamp}.jsonl"
+        write_timings(timings_filename, timings)
+        print(f"⏱️ Per-query timings saved to '{timings_filename}'")
+        print_slow_query_report(timings)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,187 @@
+"""
+Query fusion planner for the completeness suites.
+
+Most suite entries are plain ``SELECT COUNT(*) FROM <table> WHERE ...`` statements
+that differ only in their trailing predicates. Sending each one separately scans the
+same table once per metric. The planner groups every such query over the same table
+into a single ``SELECT COUNT(*) FILTER (WHERE ...)`` statement, hoists the predicates
+shared by the whole group into the WHERE clause, and maps the result columns back to
+the original query descriptions.
+
+A query may also start with a ``WITH ...`` prefix whose final statement is a simple
+count over one of its CTEs. Queries with the same prefix are fused over that CTE, so
+a shared (e.g. MATERIALIZED) CTE is computed once for the whole group.
+
+Queries of any other shape (window functions, LATERAL joins, ...) are passed through
+untouched.
+"""
+import re
+
+# === 🧩 PARSING ===
+COUNT_QUERY_PATTERN = re.compile(
+    r'^\s*SELECT\s+COUNT\(\*\)\s+FROM\s+(?P<table>\w+)'
+    r'(?:\s+(?!WHERE\b)(?P<alias>\w+))?'
+    r'(?:\s+WHERE\s+(?P<where>.*?))?'
+    r'\s*;?\s*$',
+    re.IGNORECASE | re.DOTALL
+)
+
+
+def normalize_sql(sql):
+    """Collapse whitespace and drop the trailing semicolon so equal SQL compares equal."""
+    return ' '.join(sql.split()).rstrip(';').rstrip()
+
+
+def split_top_level_and(predicate):
+    """
+    Split a predicate on AND operators that are not nested in parentheses or quotes.
+
+    Predicates using BETWEEN are kept whole, since their AND is not a conjunction, and
+    so are predicates with a top-level OR: AND binds tighter, so ``a OR b AND c`` is not
+    the conjunction of its AND-separated parts.
+    """
+    if re.search(r'\bBETWEEN\b', predicate, re.IGNORECASE):
+        return [normalize_sql(predicate)]
+
+    def is_keyword(i, keyword):
+        end = i + len(keyword)
+        return predicate[i:end].upper() == keyword \
+            and (i == 0 or not (predicate[i - 1].isalnum() or predicate[i - 1] == '_')) \
+            and (end == len(predicate) or not (predicate[end].isalnum() or predicate[end] == '_'))
+
+    conjuncts = []
+    depth = 0
+    in_quote = False
+    start = 0
+    i = 0
+    while i < len(predicate):
+        char = predicate[i]
+        if char == "'":
+            in_quote = not in_quote
+        elif not in_quote:
+            if char == '(':
+                depth += 1
+            elif char == ')':
+                depth -= 1
+            elif depth == 0 and is_keyword(i, 'OR'):
+                return [normalize_sql(predicate)]
+            elif depth == 0 and is_keyword(i, 'AND'):
+                conjuncts.append(predicate[start:i])
+                start = i + 3
+                i += 3
+                continue
+        i += 1
+    conjuncts.append(predicate[start:])
+    return [normalize_sql(c) for c in conjuncts if c.strip()]
+
+
+def split_cte_prefix(sql):
+    """
+    Split ``WITH ... <final statement>`` into the CTE prefix and the final statement.
+
+    Returns ``('', sql)`` for statements without a WITH clause.
+    """
+    if not re.match(r'\s*WITH\b', sql, re.IGNORECASE):
+        return '', sql
+
+    depth = 0
+    in_quote = False
+    last_select = None
+    for i, char in enumerate(sql):
+        if char == "'":
+            in_quote = not in_quote
+        elif not in_quote:
+            if char == '(':
+                depth += 1
+            elif char == ')':
+                depth -= 1
+            elif depth == 0 and re.match(r'SELECT\b', sql[i:i + 7], re.IGNORECASE) \
+                    and (i == 0 or not (sql[i - 1].isalnum() or sql[i - 1] == '_')):
+                last_select = i
+    if last_select is None:
+        return '', sql
+    return sql[:last_select].strip(), sql[last_select:]
+
+
+def parse_count_query(sql):
+    """
+    Parse a simple ``[WITH ...] SELECT COUNT(*) FROM <table> [alias] [WHERE ...]`` statement.
+
+    Returns a dict with ``prefix`` (the normalized WITH clause, or ''), ``table``,
+    ``alias`` and ``conjuncts``, or None when the statement has any other shape.
+    """
+    prefix, statement = split_cte_prefix(sql)
+    match = COUNT_QUERY_PATTERN.match(statement)
+    if not match:
+        return None
+    where = match.group('where')
+    return {
+        'prefix': normalize_sql(prefix),
+        'table': match.group('table'),
+        'alias': match.group('alias'),
+        'conjuncts': split_top_level_and(where) if where else []
+    }
+
+
+# === 🧠 PLANNING ===
+def build_fused_sql(table, alias, base_conjuncts, residuals, prefix=''):
+    """Build one FILTER-aggregate statement; ``residuals`` holds each query's leftover conjuncts."""
+    columns = []
+    for i, conjuncts in enumerate(residuals):
+        if conjuncts:
+            condition = ' AND '.join(f'({c})' for c in conjuncts)
+            columns.append(f'COUNT(*) FILTER (WHERE {condition}) AS q{i}')
+        else:
+            columns.append(f'COUNT(*) AS q{i}')
+
+    source = f'{table} {alias}' if alias else table
+    sql = 'SELECT ' + ',\n       '.join(columns) + f'\nFROM {source}'
+    if prefix:
+        sql = prefix + '\n' + sql
+    if base_conjuncts:
+        sql += '\nWHERE ' + '\n  AND '.join(f'({c})' for c in base_conjuncts)
+    return sql + ';'
+
+
+def plan_fused_queries(queries):
+    """
+    Turn a ``{description: sql}`` suite into a list of ``(descriptions, sql)`` units.
+
+    Each unit is executed as one statement returning one row; column ``i`` of that row
+    is the count for ``descriptions[i]``. Unparseable queries and tables with a single
+    query become one-description units with their original SQL.
+    """
+    groups = {}
+    units = []
+
+    for name, sql in queries.items():
+        parsed = parse_count_query(sql)
+        if parsed is None:
+            units.append(([name], sql))
+            continue
+        key = (parsed['prefix'], parsed['table'], parsed['alias'])
+        groups.setdefault(key, []).append((name, sql, parsed['conjuncts']))
+
+    for (prefix, table, alias), members in groups.items():
+        if len(members) == 1:
+            name, sql, _ = members[0]
+            units.append(([name], sql))
+            continue
+
+        # Conjuncts present in every member go into the shared WHERE clause, in the
+        # order they appear in the first query.
+        shared = set(members[0][2])
+        for _, _, conjuncts in members[1:]:
+            shared &= set(conjuncts)
+        base = [c for c in members[0][2] if c in shared]
+
+        residuals = [[c for c in conjuncts if c not in shared] for _, _, conjuncts in members]
+        names = [name for name, _, _ in members]
+        units.append((names, build_fused_sql(table, alias, base, residuals, prefix)))
+
+    return units
+
+
+def split_fused_result(names, row):
+    """Map one result row of a fused unit back to per-description CSV rows."""
+    return [{'Query Description': name, 'Count': value} for name, value in zip(names, row)]
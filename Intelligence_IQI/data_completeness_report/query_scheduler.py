@@ -0,0 +1,203 @@
+"""
+History-aware scheduling for the threaded engine.
+
+- ``DurationHistory`` remembers how long every statement took (an EWMA per
+  environment and SQL hash, in the metrics store), fed from the run's timing records.
+- ``order_longest_first`` sorts units by that history, longest first (LPT), so a heavy
+  window query starts at the beginning of the run instead of stretching its end.
+  Statements with no history yet go first, since they could be the long ones.
+- ``AdaptiveLimiter`` caps how many statements run at once. The cap starts from the
+  server's load and is re-read from ``pg_stat_activity`` every few seconds while the
+  run is in flight: it backs off when other sessions keep the server busy and grows
+  again when they finish.
+"""
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+from data_completeness_report.metrics_store import STORE_PATH
+from data_completeness_report.query_timing import sql_hash
+from db_connection.connection_pool import connect_db, get_pool
+
+# === 🔧 CONFIGURATION ===
+DURATION_ALPHA = 0.3            # EWMA weight of the newest duration
+MAX_CONCURRENCY = 60            # Hard cap on statements in flight per environment
+MIN_CONCURRENCY = 2             # Never back off below this
+TARGET_ACTIVE_BACKENDS = 32     # Server-wide active statements we are happy to run at (~ instance vCPUs)
+RESERVED_CONNECTIONS = 10       # Connection slots always left free for other clients
+LOAD_POLL_SECONDS = 5
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS statement_durations (
+    env TEXT NOT NULL,
+    sql_hash TEXT NOT NULL,
+    duration_s REAL NOT NULL,
+    runs INTEGER NOT NULL,
+    updated_at TEXT NOT NULL,
+    PRIMARY KEY (env, sql_hash)
+) WITHOUT ROWID;
+'''
+
+SERVER_LOAD_SQL = '''
+    SELECT COUNT(*) FILTER (WHERE state = 'active' AND pid <> pg_backend_pid()),
+           COUNT(*),
+           current_setting('max_connections')::int
+    FROM pg_stat_activity
+    WHERE backend_type = 'client backend';
+'''
+
+
+# === 📚 DURATION HISTORY ===
+class DurationHistory:
+    def __init__(self, path=STORE_PATH):
+        self._db = sqlite3.connect(path)
+        self._db.executescript(SCHEMA)
+
+    def estimates(self, env, units):
+        """``{sql: expected seconds}`` for the units that have run before."""
+        hashes = {sql_hash(query): query for _, query in units}
+        rows = self._db.execute(
+            f'''SELECT sql_hash, duration_s FROM statement_durations
+                WHERE env = ? AND sql_hash IN ({', '.join('?' * len(hashes))})''',
+            [env, *hashes]
+        ).fetchall()
+        return {hashes[digest]: duration for digest, duration in rows}
+
+    def record(self, timings):
+        """Fold the successful statements of a run's timing records into the history."""
+        updated_at = datetime.now().isoformat(timespec='seconds')
+        with self._db:
+            for record in timings:
+                if record['status'] != 'ok' or record['execution_s'] is None:
+                    continue
+                key = (record['env'], record['sql_hash'])
+                row = self._db.execute(
+                    'SELECT duration_s, runs FROM statement_durations WHERE env = ? AND sql_hash = ?', key
+                ).fetchone()
+                if row is None:
+                    duration, runs = record['execution_s'], 1
+                else:
+                    duration = row[0] + DURATION_ALPHA * (record['execution_s'] - row[0])
+                    runs = row[1] + 1
+                self._db.execute(
+                    'INSERT OR REPLACE INTO statement_durations VALUES (?, ?, ?, ?, ?)',
+                    (*key, duration, runs, updated_at)
+                )
+
+    def close(self):
+        self._db.close()
+
+
+def order_longest_first(units, estimates):
+    """Unknown durations first, then longest expected duration first."""
+    return sorted(units, key=lambda unit: -estimates.get(unit[1], float('inf')))
+
+
+def expected_makespan(units, estimates, concurrency):
+    """Greedy LPT makespan for the units with known durations; a rough lower bound for the run."""
+    finish = [0.0] * max(1, concurrency)
+    for _, query in units:
+        if query in estimates:
+            i = finish.index(min(finish))
+            finish[i] += estimates[query]
+    return max(finish)
+
+
+# === 🚦 ADAPTIVE CONCURRENCY ===
+def concurrency_for_load(others_active, others_connections, max_connections, requested):
+    """How many statements we can run without saturating the server or its connection slots."""
+    cpu_room = TARGET_ACTIVE_BACKENDS - others_active
+    slot_room = max_connections - RESERVED_CONNECTIONS - others_connections
+    return max(MIN_CONCURRENCY, min(requested, cpu_room, slot_room))
+
+
+class AdaptiveLimiter:
+    """
+    Counting limiter whose limit follows server load.
+
+    ``slot()`` blocks while ``limit`` statements are running. Used as a context
+    manager, the limiter polls ``pg_stat_activity`` on its own connection in a
+    background thread until the run ends.
+    """
+
+    def __init__(self, env, max_concurrency=MAX_CONCURRENCY, adaptive=True):
+        self.env = env
+        self.max_concurrency = max(1, max_concurrency)
+        self.limit = self.max_concurrency
+        self.adaptive = adaptive
+        self._running = 0
+        self._cond = threading.Condition()
+        self._stop = threading.Event()
+        self._monitor = None
+        self._conn = None
+
+    def __enter__(self):
+        if self.adaptive:
+            try:
+                self._conn = connect_db(self.env)
+                self._conn.autocommit = True
+                self._poll()
+            except Exception as e:
+                print(f"⚠️ [{self.env}] Could not read server load, using a fixed concurrency of "
+                      f"{self.max_concurrency}: {e}")
+                self._close_conn()
+                return self
+            print(f"🚦 [{self.env}] Starting with {self.limit} concurrent statements")
+            self._monitor = threading.Thread(target=self._watch, daemon=True)
+            self._monitor.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        if self._monitor:
+            self._monitor.join()
+        self._close_conn()
+
+    @contextmanager
+    def slot(self):
+        """Hold one of the ``limit`` statement slots."""
+        with self._cond:
+            while self._running >= self.limit:
+                self._cond.wait()
+            self._running += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._running -= 1
+                self._cond.notify()
+
+    def _poll(self):
+        with self._conn.cursor() as cur:
+            cur.execute(SERVER_LOAD_SQL)
+            active, connections, max_connections = cur.fetchone()
+        # Our pooled connections (idle ones included) and this monitor show up in pg_stat_activity too
+        own_connections = get_pool(self.env).open_connections + 1
+        with self._cond:
+            others_active = max(0, active - self._running)
+            others_connections = max(0, connections - own_connections)
+            limit = concurrency_for_load(others_active, others_connections, max_connections, self.max_concurrency)
+            if limit != self.limit:
+                self.limit = limit
+                self._cond.notify_all()
+        return limit
+
+    def _watch(self):
+        while not self._stop.wait(LOAD_POLL_SECONDS):
+            previous = self.limit
+            try:
+                limit = self._poll()
+            except Exception:
+                # Keep the last limit; the run itself reports real failures
+                continue
+            if limit < previous:
+                print(f"🐢 [{self.env}] Server busy, backing off to {limit} concurrent statements")
+            elif limit > previous:
+                print(f"🐇 [{self.env}] Server load dropped, raising to {limit} concurrent statements")
+
+    def _close_conn(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
@@ -0,0 +1,117 @@
+"""
+Per-query instrumentation for the completeness report.
+
+Every executed statement gets a timing record:
+
+- ``queue_wait_s``  time between submission and a worker picking the statement up
+- ``connect_s``     time to check out a connection (pool wait + handshake if a new one was opened)
+- ``execution_s``   time from sending the statement to receiving its row
+- ``rows_scanned``  rows read by scan nodes, only known when EXPLAIN capture is on
+
+Records are written as JSON lines to a sidecar file next to the CSV, and the slowest
+statements are printed as a ranked summary.
+"""
+import json
+import hashlib
+from datetime import datetime
+
+from data_completeness_report.query_fusion import normalize_sql
+
+# === 🔧 CONFIGURATION ===
+SLOW_QUERY_REPORT_SIZE = 10
+
+# Scan nodes whose rows count as "scanned"; Bitmap Index Scan is left out because
+# its rows are re-read (and counted) by the Bitmap Heap Scan above it.
+SCAN_NODE_TYPES = {
+    'Seq Scan', 'Index Scan', 'Index Only Scan', 'Bitmap Heap Scan', 'Sample Scan', 'Tid Scan'
+}
+
+
+def sql_hash(query):
+    return hashlib.sha256(normalize_sql(query).encode('utf-8')).hexdigest()[:16]
+
+
+def new_record(env, names, query):
+    return {
+        'env': env,
+        'descriptions': list(names),
+        'sql_hash': sql_hash(query),
+        'started_at': datetime.now().isoformat(timespec='milliseconds'),
+        'queue_wait_s': None,
+        'connect_s': None,
+        'execution_s': None,
+        'rows_scanned': None,
+        'status': 'ok',
+        'error': None,
+        'explain': None,
+    }
+
+
+def explain_sql(query):
+    return 'EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) ' + query.strip().rstrip(';')
+
+
+def statement_timeout_ms(timeout_seconds):
+    return int(timeout_seconds * 1000) if timeout_seconds else 0
+
+
+def rows_scanned_from_plan(plan):
+    """Sum rows read by scan nodes (returned + filtered out) across all loops of an EXPLAIN JSON plan."""
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    if isinstance(plan, list):
+        plan = plan[0]
+
+    total = 0
+    stack = [plan['Plan']]
+    while stack:
+        node = stack.pop()
+        if node.get('Node Type') in SCAN_NODE_TYPES:
+            per_loop = (
+                node.get('Actual Rows', 0)
+                + node.get('Rows Removed by Filter', 0)
+                + node.get('Rows Removed by Index Recheck', 0)
+            )
+            total += per_loop * max(node.get('Actual Loops', 1), 1)
+        stack.extend(node.get('Plans', []))
+    return int(total)
+
+
+def attach_explain(record, plan):
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    record['explain'] = plan
+    record['rows_scanned'] = rows_scanned_from_plan(plan)
+
+
+def write_timings(path, records):
+    with open(path, 'w') as f:
+        for record in records:
+            f.write(json.dumps(record, default=str) + '\n')
+
+
+def print_slow_query_report(records, top_n=SLOW_QUERY_REPORT_SIZE):
+    timed = [r for r in records if r['execution_s'] is not None]
+    if not timed:
+        return
+    timed.sort(key=lambda r: r['execution_s'], reverse=True)
+
+    print(f"\n🐢 Slowest {min(top_n, len(timed))} of {len(timed)} statements:")
+    for rank, record in enumerate(timed[:top_n], start=1):
+        label = record['descriptions'][0]
+        if len(record['descriptions']) > 1:
+            label += f" (+{len(record['descriptions']) - 1} fused)"
+        scanned = f", {record['rows_scanned']:,} rows scanned" if record['rows_scanned'] is not None else ''
+        print(
+            f"{rank:>3}. [{record['env']}] {record['execution_s']:8.2f}s exec, "
+            f"{record['queue_wait_s'] or 0:.2f}s queued, {record['connect_s'] or 0:.2f}s connect{scanned} — {label}"
+        )
+        if record['status'] != 'ok':
+            print(f"      ❌ {record['status']}: {record['error']}")
+
+
+def mark_failed(record, error):
+    """Record an error; SQLSTATE 57014 (query_canceled) is what statement_timeout raises."""
+    code = getattr(error, 'pgcode', None) or getattr(error, 'sqlstate', None)
+    record['status'] = 'timeout' if code == '57014' else 'error'
+    record['error'] = str(error)
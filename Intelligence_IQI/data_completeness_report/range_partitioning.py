@@ -0,0 +1,199 @@
+"""
+Client-driven range-partitioned counts.
+
+A long count runs as one statement on one backend core, however many cores the
+server has spare. With ``--partitions N`` the eligible queries on the tables in
+``RANGE_PARTITION_TABLES`` are split into N primary-key ranges that run as separate
+statements on separate pooled connections, and the client combines the partial
+results:
+
+- simple counts (fused per range, like the normal plan) are summed;
+- distinct counts listed in ``DISTINCT_KEY_BRANCHES`` return each range's distinct
+  keys (as md5 of the key row) and the client unions the sets. A key seen in two
+  ranges is counted once.
+
+Every other query keeps running as a single statement, and so do the queries of a
+table whose key bounds can't be read. Range statements are submitted together with
+the fused statements and share their ``AdaptiveLimiter`` slots.
+"""
+import time
+
+from data_completeness_report.query_fusion import normalize_sql, parse_count_query, plan_fused_queries
+from data_completeness_report.query_timing import new_record, mark_failed, statement_timeout_ms
+from db_connection.connection_pool import get_pool
+from sql_queries.data_completeness_queries import zebra_tables, build_zebra_query
+
+# === 🔧 CONFIGURATION ===
+RANGE_PARTITION_TABLES = {'sales', 'properties', 'loans', *zebra_tables.values()}
+PARTITION_KEY = 'id'
+
+SOLD_DATE_PATTERN = r"sold_date ~ '^[A-Za-z]{3} \d{1,2}, \d{4}$'"
+
+# Zebra distinct counts as (key expression, row filter) branches over the table; the
+# metric is the number of distinct keys across all branches. 'Unique Photos' depends
+# on which row wins each dedup group, so it can't be split by key range.
+DISTINCT_KEY_BRANCHES = {
+    'Unique Records (deduplicated)': [
+        ('TRIM(LOWER(property_address)), sold_date, sold_price', SOLD_DATE_PATTERN),
+    ],
+    'Unique Agents': [
+        ('main_agent, main_agent_company', 'main_agent IS NOT NULL'),
+        ('buyer_agent, buyer_agent_company', 'buyer_agent IS NOT NULL'),
+    ],
+    'Unique License Numbers': [
+        ('main_agent_license', "main_agent <> '' AND main_agent_license <> 'null'"),
+        ('buyer_agent_license', "buyer_agent <> '' AND buyer_agent_license <> 'null'"),
+    ],
+    'Unique Phone Numbers': [
+        ('main_agent_phone', 'main_agent IS NOT NULL AND main_agent_phone IS NOT NULL'),
+        ('buyer_agent_phone', 'buyer_agent IS NOT NULL AND buyer_agent_phone IS NOT NULL'),
+    ],
+}
+
+
+def build_distinct_lookup():
+    """``{normalized sql: (table, branches)}`` for every zebra distinct count we know how to split."""
+    lookup = {}
+    for table in zebra_tables.values():
+        suite = build_zebra_query(table)
+        for description, branches in DISTINCT_KEY_BRANCHES.items():
+            lookup[normalize_sql(suite[description])] = (table, branches)
+    return lookup
+
+
+# === 🧠 PLANNING ===
+def plan_range_partitions(queries, tables=RANGE_PARTITION_TABLES):
+    """
+    Pick the queries that can be answered from key ranges.
+
+    Returns ``(plan, remaining)``: ``plan`` maps each table to its ``counts``
+    (``{name: (alias, conjuncts)}``) and ``distinct`` (``{name: branches}``) queries;
+    ``remaining`` holds every other query, to run as usual.
+    """
+    distinct_lookup = build_distinct_lookup()
+    plan = {}
+    remaining = {}
+
+    for name, sql in queries.items():
+        parsed = parse_count_query(sql)
+        if parsed is not None and not parsed['prefix'] and parsed['table'] in tables:
+            table_plan = plan.setdefault(parsed['table'], {'counts': {}, 'distinct': {}})
+            table_plan['counts'][name] = (parsed['alias'], parsed['conjuncts'])
+        elif normalize_sql(sql) in distinct_lookup:
+            table, branches = distinct_lookup[normalize_sql(sql)]
+            table_plan = plan.setdefault(table, {'counts': {}, 'distinct': {}})
+            table_plan['distinct'][name] = branches
+        else:
+            remaining[name] = sql
+    return plan, remaining
+
+
+def key_ranges(low, high, partitions):
+    """Split ``[low, high]`` into up to ``partitions`` half-open ``(start, end)`` ranges."""
+    if low is None:
+        return []
+    width = max(1, -(-(high - low + 1) // partitions))
+    return [(start, min(start + width, high + 1)) for start in range(low, high + 1, width)]
+
+
+def range_predicate(start, end):
+    return f'{PARTITION_KEY} >= {start} AND {PARTITION_KEY} < {end}'
+
+
+def build_distinct_sql(table, branches, start, end):
+    """Distinct key hashes of one key range; UNION already de-duplicates within the range."""
+    return '\nUNION\n'.join(
+        f'SELECT md5(ROW({key})::text) FROM {table} WHERE ({condition}) AND {range_predicate(start, end)}'
+        for key, condition in branches
+    ) + ';'
+
+
+def build_partition_tasks(table, table_plan, ranges):
+    """``[(kind, names, sql), ...]`` for every range of one table."""
+    tasks = []
+    for start, end in ranges:
+        if table_plan['counts']:
+            queries = {
+                name: f"SELECT COUNT(*) FROM {table}{' ' + alias if alias else ''} WHERE "
+                      + ' AND '.join([f'({c})' for c in conjuncts] + [f'({range_predicate(start, end)})'])
+                      + ';'
+                for name, (alias, conjuncts) in table_plan['counts'].items()
+            }
+            tasks.extend(('counts', names, sql) for names, sql in plan_fused_queries(queries))
+        for name, branches in table_plan['distinct'].items():
+            tasks.append(('distinct', [name], build_distinct_sql(table, branches, start, end)))
+    return tasks
+
+
+# === 🚀 EXECUTION ===
+def fetch_key_bounds(env, table, timeout):
+    """``(min key, max key)`` of one table; both are None when it is empty."""
+    with get_pool(env).connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("SET LOCAL statement_timeout = %s;", (statement_timeout_ms(timeout),))
+            cur.execute(f'SELECT MIN({PARTITION_KEY}), MAX({PARTITION_KEY}) FROM {table};')
+            return cur.fetchone()
+
+
+def build_range_tasks(env, plan, partitions, timeout):
+    """
+    Key-range tasks for every planned table.
+
+    Returns ``(tasks, failed)``. A table whose key bounds can't be read or split (no
+    integer ``PARTITION_KEY``, a timeout, ...) is listed in ``failed`` instead, so its
+    queries can run unsplit.
+    """
+    tasks, failed = [], []
+    for table, table_plan in plan.items():
+        try:
+            ranges = key_ranges(*fetch_key_bounds(env, table, timeout), partitions)
+        except Exception as e:
+            print(f"⚠️ [{env}] Could not split '{table}' into {PARTITION_KEY} ranges, counting it unsplit: {e}")
+            failed.append(table)
+            continue
+        tasks.extend(build_partition_tasks(table, table_plan, ranges))
+    return tasks, failed
+
+
+def run_partition_task(env, task, args, timings, submitted, limiter):
+    """Run one range statement in a limiter slot; returns its row (counts) or key set (distinct)."""
+    kind, names, sql = task
+    record = new_record(env, names, sql)
+    try:
+        with limiter.slot():
+            started = time.monotonic()
+            record['queue_wait_s'] = started - submitted
+            with get_pool(env).connection() as conn:
+                record['connect_s'] = time.monotonic() - started
+                with conn.cursor() as cur:
+                    cur.execute("SET LOCAL statement_timeout = %s;", (statement_timeout_ms(args.query_timeout),))
+                    executed = time.monotonic()
+                    cur.execute(sql)
+                    result = cur.fetchone() if kind == 'counts' else {key for key, in cur}
+                    record['execution_s'] = time.monotonic() - executed
+        return result
+    except Exception as e:
+        mark_failed(record, e)
+        raise
+    finally:
+        timings.append(record)
+
+
+def combine_partition_results(plan, outcomes):
+    """Sum and union ``[(task, result, error), ...]`` into one CSV row per planned query."""
+    totals = {name: 0 for table_plan in plan.values() for name in table_plan['counts']}
+    keys = {name: set() for table_plan in plan.values() for name in table_plan['distinct']}
+    errors = {}
+
+    for (kind, names, _), result, error in outcomes:
+        if error is not None:
+            for name in names:
+                errors.setdefault(name, f"Error: {error}")
+        elif kind == 'counts':
+            for name, value in zip(names, result):
+                totals[name] += value
+        else:
+            keys[names[0]] |= result
+
+    counts = {**totals, **{name: len(found) for name, found in keys.items()}}
+    return [{'Query Description': name, 'Count': errors.get(name, count)} for name, count in counts.items()]
@@ -0,0 +1,147 @@
+"""
+Change-aware local cache for completeness query results.
+
+Results are stored in SQLite, keyed by environment and the hash of the (normalized)
+SQL. Each entry also stores a signature of the tables the query reads:
+
+- the cumulative insert/update/delete counters from ``pg_stat_user_tables``, or
+- ``max(<column>)`` for tables listed in ``CHANGE_PROBE_COLUMNS``,
+- plus today's date for queries that depend on ``CURRENT_DATE`` / ``now()``.
+
+Any change in the signature is a miss. Entries also expire by age, and the cache
+keeps at most ``max_entries`` rows, evicting the oldest first.
+"""
+import os
+import re
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from datetime import date
+
+from data_completeness_report.query_fusion import normalize_sql
+
+# === 🔧 CONFIGURATION ===
+CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'completeness_cache.sqlite3')
+MAX_AGE_SECONDS = 24 * 60 * 60
+MAX_ENTRIES = 5000
+
+# Tables whose change signal is a max(<column>) probe instead of pg_stat counters
+CHANGE_PROBE_COLUMNS = {
+    # 'sales': 'updated_at',
+}
+
+TABLE_PATTERN = re.compile(r'\b(?:FROM|JOIN)\s+(\w+)\b(?!\s*\()', re.IGNORECASE)
+CTE_NAME_PATTERN = re.compile(r'(?:\bWITH|,)\s*(\w+)\s+AS\s*(?:MATERIALIZED\s*)?\(', re.IGNORECASE)
+DATE_DEPENDENT_PATTERN = re.compile(r'\b(?:CURRENT_DATE|CURRENT_TIMESTAMP|NOW\s*\()', re.IGNORECASE)
+
+
+# === 🔍 TABLE CHANGE SIGNALS ===
+def referenced_tables(sql):
+    """Base tables read by ``sql`` (CTE names and set-returning functions are skipped)."""
+    cte_names = {name.lower() for name in CTE_NAME_PATTERN.findall(sql)}
+    return sorted({t for t in TABLE_PATTERN.findall(sql) if t.lower() not in cte_names and t.upper() != 'LATERAL'})
+
+
+def probe_table_signatures(conn, tables):
+    """Fetch one change signature per table in a single round trip (plus one per probe column)."""
+    signatures = {}
+    tables = list(tables)
+    with conn.cursor() as cur:
+        counter_tables = [t for t in tables if t not in CHANGE_PROBE_COLUMNS]
+        if counter_tables:
+            cur.execute(
+                '''SELECT relname, n_tup_ins, n_tup_upd, n_tup_del
+                   FROM pg_stat_user_tables
+                   WHERE relname = ANY(%s);''',
+                (counter_tables,)
+            )
+            for relname, ins, upd, dele in cur.fetchall():
+                signatures[relname] = [ins, upd, dele]
+
+        for table in tables:
+            if table in CHANGE_PROBE_COLUMNS:
+                cur.execute(f'SELECT max({CHANGE_PROBE_COLUMNS[table]})::text FROM {table};')
+                signatures[table] = cur.fetchone()[0]
+    return signatures
+
+
+def unit_signature(sql, table_signatures):
+    """Signature for one statement, or None if any of its tables has no change signal."""
+    tables = referenced_tables(sql)
+    if not tables or any(t not in table_signatures for t in tables):
+        return None
+    signature = {t: table_signatures[t] for t in tables}
+    if DATE_DEPENDENT_PATTERN.search(sql):
+        signature['__date'] = date.today().isoformat()
+    return json.dumps(signature, sort_keys=True, default=str)
+
+
+# === 💾 CACHE STORE ===
+class ResultCache:
+    """SQLite-backed result cache; safe to share between threads."""
+
+    def __init__(self, path=CACHE_PATH, max_age_seconds=MAX_AGE_SECONDS, max_entries=MAX_ENTRIES):
+        self.path = path
+        self.max_age_seconds = max_age_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute('''
+            CREATE TABLE IF NOT EXISTS results (
+                env TEXT NOT NULL,
+                sql_hash TEXT NOT NULL,
+                signature TEXT NOT NULL,
+                result TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                PRIMARY KEY (env, sql_hash)
+            )''')
+        self._db.execute('CREATE INDEX IF NOT EXISTS results_created_at ON results (created_at)')
+        self._db.commit()
+
+    @staticmethod
+    def sql_hash(sql):
+        return hashlib.sha256(normalize_sql(sql).encode('utf-8')).hexdigest()
+
+    def get(self, env, sql, signature):
+        """Return the cached result row for ``sql`` if its tables are unchanged, else None."""
+        if signature is None:
+            return None
+        with self._lock:
+            found = self._db.execute(
+                'SELECT signature, result, created_at FROM results WHERE env = ? AND sql_hash = ?',
+                (env, self.sql_hash(sql))
+            ).fetchone()
+        if not found:
+            return None
+        cached_signature, result, created_at = found
+        if cached_signature != signature or time.time() - created_at > self.max_age_seconds:
+            return None
+        return json.loads(result)
+
+    def put(self, env, sql, signature, row):
+        if signature is None:
+            return
+        with self._lock:
+            self._db.execute(
+                'INSERT OR REPLACE INTO results (env, sql_hash, signature, result, created_at) VALUES (?, ?, ?, ?, ?)',
+                (env, self.sql_hash(sql), signature, json.dumps(list(row), default=str), time.time())
+            )
+            self._db.commit()
+
+    def evict(self):
+        """Drop expired entries, then the oldest ones beyond ``max_entries``."""
+        with self._lock:
+            self._db.execute('DELETE FROM results WHERE created_at < ?', (time.time() - self.max_age_seconds,))
+            self._db.execute(
+                '''DELETE FROM results WHERE rowid NOT IN (
+                       SELECT rowid FROM results ORDER BY created_at DESC LIMIT ?
+                   )''',
+                (self.max_entries,)
+            )
+            self._db.commit()
+
+    def close(self):
+        with self._lock:
+            self._db.close()
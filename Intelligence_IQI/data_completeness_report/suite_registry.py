@@ -0,0 +1,91 @@
+"""
+Registry of the completeness suites.
+
+Every dict exported in ``data_completeness_queries.__all__`` is a suite. Several
+suites can be merged into one run: equivalent counts are executed once and their
+result is fanned back out to every suite that asked for it. Simple counts are
+equivalent when they share the table, alias, CTE prefix and set of conjuncts (in
+any order); anything else must match after whitespace normalization.
+"""
+from sql_queries import data_completeness_queries
+from data_completeness_report.query_fusion import normalize_sql, parse_count_query
+
+# Short names used in output filenames (kept from the original single-suite reports)
+SUITE_LABELS = {
+    'loan_officers_query': 'loan_officer',
+    'sales_query': 'sale',
+    'realtors_query': 'realtor',
+    'loans_query': 'loan',
+    'zebra_query': 'zebra',
+}
+
+
+def discover_suites():
+    """Return ``{suite_name: {description: sql}}`` for every dict in the module's ``__all__``."""
+    suites = {}
+    for name in data_completeness_queries.__all__:
+        value = getattr(data_completeness_queries, name)
+        if isinstance(value, dict):
+            suites[name] = value
+    return suites
+
+
+def suite_label(suite_name):
+    return SUITE_LABELS.get(suite_name, suite_name)
+
+
+def select_suites(names):
+    """Resolve suite names (or ``['all']``) to ``{suite_name: queries}``, in the order given."""
+    available = discover_suites()
+    if names == ['all']:
+        return available
+
+    unknown = [name for name in names if name not in available]
+    if unknown:
+        raise ValueError(f"Unknown suite(s): {', '.join(unknown)}. Available: {', '.join(available)}")
+    return {name: available[name] for name in names}
+
+
+def query_identity(sql):
+    """Key under which equivalent queries compare equal."""
+    parsed = parse_count_query(sql)
+    if parsed is None:
+        return normalize_sql(sql)
+    return parsed['prefix'], parsed['table'], parsed['alias'], frozenset(parsed['conjuncts'])
+
+
+def merge_suites(suites):
+    """
+    Merge suites into one ``{key: sql}`` dict with duplicate queries removed.
+
+    Returns ``(queries, members)`` where ``members[key]`` lists every
+    ``(suite_name, description)`` answered by that query.
+    """
+    queries = {}
+    members = {}
+    key_by_identity = {}
+
+    for suite_name, suite in suites.items():
+        for description, sql in suite.items():
+            identity = query_identity(sql)
+            key = key_by_identity.get(identity)
+            if key is None:
+                key = f"{suite_name} / {description}"
+                key_by_identity[identity] = key
+                queries[key] = sql
+                members[key] = []
+            members[key].append((suite_name, description))
+    return queries, members
+
+
+def split_suite_results(results, suites, members):
+    """Fan merged result rows back out to ``{suite_name: [rows in suite order]}``."""
+    by_member = {}
+    for row in results:
+        for suite_name, description in members[row['Query Description']]:
+            by_member[(suite_name, description)] = {**row, 'Query Description': description}
+
+    return {
+        suite_name: [by_member[(suite_name, description)] for description in suite if (suite_name, description) in by_member]
+        for suite_name, suite in suites.items()
+    }
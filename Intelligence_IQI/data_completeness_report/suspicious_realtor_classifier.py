@@ -0,0 +1,94 @@
+"""
+Single-pass suspicious-name classifier for realtors.
+
+The ``suspicious_realtor_patterns`` suite runs one ``ILIKE '%...%'`` scan of
+``realtors`` per pattern. This script evaluates every pattern from
+``SUSPICIOUS_REALTOR_NAME_PATTERNS`` in one statement: each visible, non-duplicate
+realtor gets a boolean flag array, and only realtors matching at least one pattern
+are streamed back through a server-side cursor.
+
+Outputs:
+- a counts CSV in the same format as the suite (one row per pattern)
+- a flagged-realtors CSV with every matching realtor ID and the patterns it hit
+"""
+import os
+import sys
+import pandas as pd
+from datetime import datetime
+
+# Ensure module paths work when running as script
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sql_queries.data_completeness_queries import SUSPICIOUS_REALTOR_NAME_PATTERNS, VISIBLE_REALTORS_FILTER
+from db_connection.connection_pool import connect_db
+
+# === 🔧 CONFIGURATION ===
+ENV = 'dev' # 👈 Change to prod, dev, or stage as needed
+FETCH_SIZE = 10000 # Rows per round trip from the server-side cursor
+
+
+def build_classifier_query(patterns):
+    """Return ``(sql, params)`` flagging every pattern for each realtor in one scan."""
+    flags = ',\n                         '.join(
+        '(r.name ILIKE %s OR r.full_name ILIKE %s)' for _ in patterns
+    )
+    sql = f'''
+        SELECT id, flags FROM (
+            SELECT r.id,
+                   ARRAY[{flags}] AS flags
+            FROM realtors r
+            WHERE {VISIBLE_REALTORS_FILTER}
+        ) classified
+        WHERE TRUE = ANY(flags);
+    '''
+    params = [value for pattern in patterns for value in (pattern, pattern)]
+    return sql, params
+
+
+def classify_realtors(conn, patterns=SUSPICIOUS_REALTOR_NAME_PATTERNS):
+    """
+    Stream flagged realtors and tally matches per pattern.
+
+    Returns ``(counts, flagged)``: ``counts`` maps each description to its count,
+    ``flagged`` is a list of ``(realtor_id, [descriptions])``.
+    """
+    descriptions = list(patterns)
+    sql, params = build_classifier_query(list(patterns.values()))
+    counts = dict.fromkeys(descriptions, 0)
+    flagged = []
+
+    with conn.cursor(name='suspicious_realtor_classifier') as cur:
+        cur.itersize = FETCH_SIZE
+        cur.execute(sql, params)
+        for realtor_id, flags in cur:
+            # NULL names give NULL flags, which the per-pattern queries don't count either
+            matched = [description for description, flag in zip(descriptions, flags) if flag is True]
+            for description in matched:
+                counts[description] += 1
+            flagged.append((realtor_id, matched))
+    return counts, flagged
+
+
+def main():
+    print("🔎 Classifying realtor names in one pass...")
+    with connect_db(ENV) as conn:
+        counts, flagged = classify_realtors(conn)
+
+    timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+    counts_file = f"suspicious_realtor_patterns_counts_{ENV}_{timestamp}.csv"
+    flagged_file = f"suspicious_realtors_flagged_{ENV}_{timestamp}.csv"
+
+    pd.DataFrame(
+        [{'Query Description': description, 'Count': count} for description, count in counts.items()]
+    ).to_csv(counts_file, index=False)
+    pd.DataFrame(
+        [{'realtor_id': realtor_id, 'matched_patterns': '; '.join(matched)} for realtor_id, matched in flagged],
+        columns=['realtor_id', 'matched_patterns']
+    ).to_csv(flagged_file, index=False)
+
+    print(f"✅ Pattern counts saved to '{counts_file}'")
+    print(f"🚩 {len(flagged)} flagged realtors saved to '{flagged_file}'")
+
+
+if __name__ == "__main__":
+    main()
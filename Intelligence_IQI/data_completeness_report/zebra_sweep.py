@@ -0,0 +1,38 @@
+"""
+Cross-table zebra sweep.
+
+Expands the zebra suite over every table in ``zebra_tables`` so all states run in
+one invocation. Each state becomes its own suite; the fusion planner then builds one
+FILTER-aggregate statement per table, and the tables run in parallel on the shared
+pool. Results are pivoted into a single state-by-metric matrix.
+"""
+from sql_queries.data_completeness_queries import zebra_tables, build_zebra_query
+
+SWEEP_SUITE_PREFIX = 'zebra_'
+
+
+def build_zebra_suites(states=None):
+    """Return ``{'zebra_<state>': suite}`` for the given states (default: every table)."""
+    states = states or list(zebra_tables)
+    unknown = [state for state in states if state not in zebra_tables]
+    if unknown:
+        raise ValueError(f"Unknown zebra state(s): {', '.join(unknown)}. Available: {', '.join(zebra_tables)}")
+    return {f'{SWEEP_SUITE_PREFIX}{state}': build_zebra_query(zebra_tables[state]) for state in states}
+
+
+def build_state_matrix(results_by_env, suites, envs):
+    """One row per state (and environment), one column per zebra metric."""
+    import pandas as pd
+
+    rows = []
+    for suite_name, suite in suites.items():
+        state = suite_name[len(SWEEP_SUITE_PREFIX):]
+        for env in envs:
+            row = {'State': state, 'Table': zebra_tables[state]}
+            if len(envs) > 1:
+                row['Env'] = env
+            counts = {r['Query Description']: r['Count'] for r in results_by_env[env][suite_name]}
+            for metric in suite:
+                row[metric] = counts.get(metric)
+            rows.append(row)
+    return pd.DataFrame(rows)
@@ -0,0 +1,248 @@
+"""
+Shared RDS connection layer for every executor.
+
+- IAM auth tokens are signed once per host/user and reused until shortly before
+  their 15-minute expiry.
+- ``ConnectionPool`` keeps a bounded, thread-safe set of open connections per
+  environment, so a run pays for one TLS handshake per worker instead of one per query.
+- Idle connections are health-checked before they are handed out again.
+- An environment with ``{ENV}_DB_PASSWORD`` set (e.g. the local benchmark database)
+  uses password auth instead of IAM.
+- boto3, psycopg2 and ``.env`` are only loaded when the first connection is opened, so
+  importing this module (and everything built on it) needs neither AWS variables nor
+  the drivers' import time.
+"""
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# === 🔧 CONFIGURATION ===
+DB_PORT = 5432
+DB_SSLMODE = 'require'
+TOKEN_TTL_SECONDS = 15 * 60
+TOKEN_REFRESH_MARGIN_SECONDS = 60      # Re-sign a minute before the token expires
+DEFAULT_POOL_SIZE = 10
+HEALTH_CHECK_IDLE_SECONDS = 30         # Ping connections that sat idle longer than this
+
+
+# === 🔐 ENV CONFIGURATION ===
+def load_db_config(env):
+    """
+    Read host, database, user and AWS credentials for ``env`` (e.g. 'dev', 'PROD_HIQ').
+
+    ``{ENV}_DB_PASSWORD``, ``{ENV}_DB_PORT`` and ``{ENV}_DB_SSLMODE`` are optional and
+    only needed for databases outside RDS.
+    """
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    prefix = env.upper()
+    return {
+        'env': env,
+        'region': os.getenv('REGION'),
+        'host': os.getenv(f'{prefix}_DB_HOST'),
+        'dbname': os.getenv(f'{prefix}_DB_NAME'),
+        'user': os.getenv(f'{prefix}_DB_USER'),
+        'password': os.getenv(f'{prefix}_DB_PASSWORD'),
+        'port': int(os.getenv(f'{prefix}_DB_PORT', DB_PORT)),
+        'sslmode': os.getenv(f'{prefix}_DB_SSLMODE', DB_SSLMODE),
+        'aws_access_key_id': os.getenv(f'{prefix}_AWS_ACCESS_KEY_ID'),
+        'aws_secret_access_key': os.getenv(f'{prefix}_AWS_SECRET_ACCESS_KEY'),
+        'aws_session_token': os.getenv(f'{prefix}_AWS_SESSION_TOKEN'),
+    }
+
+
+# === 🎟️ IAM TOKEN CACHE ===
+_token_cache = {}
+_token_lock = threading.Lock()
+
+
+def get_iam_token(config):
+    """Return a cached IAM auth token for the config's host and user, signing a new one when due."""
+    key = (config['host'], config['user'])
+    with _token_lock:
+        cached = _token_cache.get(key)
+        if cached and time.monotonic() - cached[1] < TOKEN_TTL_SECONDS - TOKEN_REFRESH_MARGIN_SECONDS:
+            return cached[0]
+
+        import boto3
+
+        session = boto3.Session(
+            aws_access_key_id=config['aws_access_key_id'],
+            aws_secret_access_key=config['aws_secret_access_key'],
+            aws_session_token=config['aws_session_token'],
+            region_name=config['region']
+        )
+        token = session.client('rds').generate_db_auth_token(
+            DBHostname=config['host'],
+            Port=config['port'],
+            DBUsername=config['user']
+        )
+        _token_cache[key] = (token, time.monotonic())
+        return token
+
+
+def get_db_password(config):
+    """Static password when the environment has one, otherwise an IAM auth token."""
+    return config['password'] or get_iam_token(config)
+
+
+def open_connection(config):
+    import psycopg2
+
+    return psycopg2.connect(
+        host=config['host'],
+        dbname=config['dbname'],
+        user=config['user'],
+        password=get_db_password(config),
+        port=config['port'],
+        sslmode=config['sslmode']
+    )
+
+
+def connect_db(env):
+    """Open a single unpooled connection, for scripts that only need one."""
+    return open_connection(load_db_config(env))
+
+
+# === 🏊 CONNECTION POOL ===
+class ConnectionPool:
+    """Bounded, thread-safe pool of psycopg2 connections for one environment."""
+
+    def __init__(self, env, max_size=DEFAULT_POOL_SIZE):
+        self.env = env
+        self.config = load_db_config(env)
+        self.max_size = max_size
+        self._idle = []
+        self._size = 0
+        self._closed = False
+        self._cond = threading.Condition()
+
+    def acquire(self, timeout=None):
+        """Check out a healthy connection, blocking while all ``max_size`` are in use."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._cond:
+                while not self._idle and self._size >= self.max_size and not self._closed:
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        raise TimeoutError(f"No connection available in '{self.env}' pool after {timeout}s")
+                    self._cond.wait(remaining)
+                if self._closed:
+                    raise RuntimeError(f"Connection pool '{self.env}' is closed")
+                if self._idle:
+                    conn, last_used = self._idle.pop()
+                else:
+                    self._size += 1
+                    conn, last_used = None, None
+
+            if conn is None:
+                try:
+                    return open_connection(self.config)
+                except Exception:
+                    self._forget()
+                    raise
+
+            if self._is_healthy(conn, last_used):
+                return conn
+            self._discard(conn)
+
+    def release(self, conn):
+        """Return a connection to the pool; broken or mid-transaction connections are dropped."""
+        from psycopg2 import extensions
+
+        if conn.closed or conn.get_transaction_status() != extensions.TRANSACTION_STATUS_IDLE:
+            self._discard(conn)
+            return
+        with self._cond:
+            if self._closed:
+                conn.close()
+                self._size -= 1
+                return
+            self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    @property
+    def open_connections(self):
+        """Connections this pool holds open, idle or checked out."""
+        with self._cond:
+            return self._size
+
+    @contextmanager
+    def connection(self, timeout=None):
+        """Borrow a connection for one transaction: committed on success, rolled back on error."""
+        conn = self.acquire(timeout)
+        try:
+            with conn:
+                yield conn
+        finally:
+            self.release(conn)
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._size -= len(idle)
+            self._cond.notify_all()
+        for conn, _ in idle:
+            conn.close()
+
+    def _is_healthy(self, conn, last_used):
+        import psycopg2
+
+        if conn.closed:
+            return False
+        if time.monotonic() - last_used < HEALTH_CHECK_IDLE_SECONDS:
+            return True
+        try:
+            with conn.cursor() as cur:
+                cur.execute('SELECT 1;')
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def _discard(self, conn):
+        import psycopg2
+
+        try:
+            conn.close()
+        except psycopg2.Error:
+            pass
+        self._forget()
+
+    def _forget(self):
+        with self._cond:
+            self._size -= 1
+            self._cond.notify()
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(env, max_size=None):
+    """Return the shared pool for ``env``, creating it with ``max_size`` connections on first use."""
+    with _pools_lock:
+        pool = _pools.get(env)
+        if pool is None:
+            pool = ConnectionPool(env, max_size or DEFAULT_POOL_SIZE)
+            _pools[env] = pool
+        elif max_size and max_size > pool.max_size:
+            with pool._cond:
+                pool.max_size = max_size
+                pool._cond.notify_all()
+        return pool
+
+
+def close_pools(env=None):
+    """Close the pool for ``env``, or every pool when no environment is given."""
+    with _pools_lock:
+        if env is None:
+            pools = list(_pools.values())
+            _pools.clear()
+        else:
+            pools = [_pools.pop(env)] if env in _pools else []
+    for pool in pools:
+        pool.close()
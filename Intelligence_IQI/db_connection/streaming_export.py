@@ -0,0 +1,79 @@
+"""
+Streaming reads and exports, so peak memory stays flat however large the table is.
+
+- ``stream_query`` runs a query on a named (server-side) cursor and yields
+  DataFrames of ``itersize`` rows; only one chunk is in memory at a time.
+- ``ChunkWriter`` appends those chunks to a CSV or Parquet file (by extension) as
+  they arrive.
+- ``copy_to_file`` streams a query's result straight to CSV with
+  ``COPY ... TO STDOUT``, for exports that need no processing in Python.
+
+pandas and pyarrow are imported on first use.
+"""
+import itertools
+
+# === 🔧 CONFIGURATION ===
+ITERSIZE = 20000    # Rows per round trip (and per DataFrame chunk)
+
+_cursor_ids = itertools.count()
+
+
+def stream_query(conn, sql, params=None, itersize=ITERSIZE):
+    """Yield the result of ``sql`` as DataFrames of up to ``itersize`` rows."""
+    import pandas as pd
+
+    with conn.cursor(name=f'stream_{next(_cursor_ids)}') as cur:
+        cur.itersize = itersize
+        cur.execute(sql, params)
+        while True:
+            rows = cur.fetchmany(itersize)
+            if not rows:
+                break
+            yield pd.DataFrame(rows, columns=[column[0] for column in cur.description])
+
+
+def copy_to_file(conn, sql, path, params=None):
+    """Write the result of ``sql`` (with header) to a CSV file without holding it in memory."""
+    with conn.cursor() as cur:
+        query = cur.mogrify(sql, params).decode() if params else sql
+        with open(path, 'w', newline='') as f:
+            cur.copy_expert(f"COPY ({query.strip().rstrip(';')}) TO STDOUT WITH (FORMAT csv, HEADER)", f)
+
+
+class ChunkWriter:
+    """Append DataFrame chunks to ``path``: Parquet for ``.parquet``, CSV otherwise."""
+
+    def __init__(self, path):
+        self.path = path
+        self.rows = 0
+        self._parquet = path.endswith('.parquet')
+        self._writer = None
+        self._started = False
+
+    def write(self, chunk):
+        if chunk.empty:
+            return
+        if self._parquet:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            table = pa.Table.from_pandas(chunk, preserve_index=False,
+                                         schema=self._writer.schema if self._writer else None)
+            if self._writer is None:
+                self._writer = pq.ParquetWriter(self.path, table.schema)
+            self._writer.write_table(table)
+        else:
+            chunk.to_csv(self.path, mode='a' if self._started else 'w', header=not self._started, index=False)
+        self._started = True
+        self.rows += len(chunk)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
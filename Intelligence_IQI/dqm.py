@@ -0,0 +1,85 @@
+"""
+Single command-line entry point for the data quality tools.
+
+    python dqm.py suites                       # list the query suites
+    python dqm.py sql --suites sales_query     # print the statements a run would send
+    python dqm.py run --suites all --envs dev,prod
+    python dqm.py metrics history sales_query prod "Sales Missed Buyer Agent"
+    python dqm.py unmatched --csv customer.csv --snapshot
+
+Only the module behind the chosen command is imported, and each module defers
+pandas, boto3, psycopg2 and credential loading until it actually needs them, so
+listing suites or printing SQL starts in well under 200 ms (guarded by
+``benchmark/startup_time.py``). Everything after the command name is passed to the
+module's own ``main()``; ``python dqm.py <command> --help`` shows its options. The
+HIQ scripts live outside this package (in a folder that isn't a valid module name)
+and are loaded from their file.
+"""
+import os
+import sys
+import importlib
+import importlib.util
+
+# Ensure module paths work when running as script
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+HIQ_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'soalabs | HIQ', 'avm_query_executor')
+
+# command: (module or script path, extra arguments, help)
+COMMANDS = {
+    'run': ('data_completeness_report.query_executor', [], "Run completeness suites and save counts to CSV"),
+    'suites': ('data_completeness_report.query_executor', ['--list-suites'], "List the available suites"),
+    'sql': ('data_completeness_report.query_executor', ['--print-sql'],
+            "Print the statements a run would send, without connecting"),
+    'metrics': ('data_completeness_report.metrics_store', [], "Query the local metrics store"),
+    'anomalies': ('data_completeness_report.anomaly_detection', [], "Rebuild the drift baselines"),
+    'realtors': ('data_completeness_report.suspicious_realtor_classifier', [], "Classify suspicious realtors"),
+    'indexes': ('data_completeness_report.index_advisor', [], "Suggest indexes for the query catalog"),
+    'benchmark': ('benchmark.run_benchmark', [], "Benchmark the executors against the synthetic database"),
+    'synthetic-data': ('benchmark.synthetic_data', [], "Build the synthetic benchmark database"),
+    'startup-time': ('benchmark.startup_time', [], "Check CLI start-up time against its budget"),
+    'match-check': ('benchmark.match_equivalence', [], "Check the CSV matcher against the original loop"),
+    'unmatched': ('tool_for_comparing_csv_data.find_unmatched_transactions', [],
+                  "Match a CSV of addresses to properties and their sales"),
+    'snapshot': ('tool_for_comparing_csv_data.property_snapshot', [], "Refresh or query the local property snapshot"),
+    'compare-csv': ('tool_for_comparing_csv_data.tool_for_comparing_csv_data', [],
+                    "Fuzzy-match the sales of two CSV files"),
+    'avm-disparity': (os.path.join(HIQ_DIR, 'avm_query_executor.py'), [], "Flag Zillow/CoreLogic AVM disparities"),
+    'active-buyers': (os.path.join(HIQ_DIR, 'active_buyer_label_logic.py'), [], "Label active home shoppers"),
+}
+
+
+def load_module(name):
+    """Import a module by dotted name, or a script by its ``.py`` path."""
+    if not name.endswith('.py'):
+        return importlib.import_module(name)
+    spec = importlib.util.spec_from_file_location(os.path.splitext(os.path.basename(name))[0], name)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def print_usage():
+    print("usage: dqm.py <command> [options]\n\ncommands:")
+    for name, (_, _, help_text) in COMMANDS.items():
+        print(f"  {name:<16}{help_text}")
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv or argv[0] in ('-h', '--help'):
+        print_usage()
+        return
+    if argv[0] not in COMMANDS:
+        print(f"❌ Unknown command '{argv[0]}'\n")
+        print_usage()
+        sys.exit(2)
+
+    module_name, extra, _ = COMMANDS[argv[0]]
+    module = load_module(module_name)
+    sys.argv = [f'dqm.py {argv[0]}', *extra, *argv[1:]]
+    module.main()
+
+
+if __name__ == "__main__":
+    main()
@@ -8,7 +8,7 @@ zebra_tables = {
     'utV2': 'zebra_ut_v2',
     'utV2full': 'zebra_ut_v2_full',
     'id': 'zebra_id_v2',
-    'dc': 'zebra_dс_v2',
+    'dc': 'zebra_dc_v2',
     'de': 'zebra_de_v2',
     'pa': 'zebra_pa_v2',
     'mo': 'zebra_mo_v2',
@@ -119,57 +119,52 @@ sales_query = {
     'Duplicate Sales Count': '''SELECT COUNT(*) FROM sales WHERE duplicate = TRUE;'''
 }
 
+# Visible, non-duplicate realtors. Every realtor suite uses this exact text, so merged
+# runs fuse their queries into one scan of realtors.
+VISIBLE_REALTORS_FILTER = 'duplicate IS FALSE AND hidden IS FALSE'
+
 realtors_query = {
     # Total Counts
-    'Realtors Count': '''SELECT COUNT(*) FROM realtors 
-        WHERE duplicate IS FALSE 
-        AND hidden IS FALSE;''',
+    'Realtors Count': f'''SELECT COUNT(*) FROM realtors 
+        WHERE {VISIBLE_REALTORS_FILTER};''',
     
     # Data Completeness
-    'Realtors Missing Name and Full Name': '''SELECT COUNT(*) FROM realtors 
-        WHERE duplicate IS FALSE 
-        AND hidden IS FALSE 
+    'Realtors Missing Name and Full Name': f'''SELECT COUNT(*) FROM realtors 
+        WHERE {VISIBLE_REALTORS_FILTER} 
         AND name IS NULL 
         AND full_name IS NULL;''',
     
-    'Realtors Missing Company Name': '''SELECT COUNT(*) FROM realtors 
-        WHERE duplicate IS FALSE 
-        AND hidden IS FALSE 
+    'Realtors Missing Company Name': f'''SELECT COUNT(*) FROM realtors 
+        WHERE {VISIBLE_REALTORS_FILTER} 
         AND (name IS NOT NULL OR full_name IS NOT NULL) 
         AND company_name IS NULL;''',
     
-    'Realtors Missing Company License': '''SELECT COUNT(*) FROM realtors 
-        WHERE duplicate IS FALSE 
-        AND hidden IS FALSE 
+    'Realtors Missing Company License': f'''SELECT COUNT(*) FROM realtors 
+        WHERE {VISIBLE_REALTORS_FILTER} 
         AND (name IS NOT NULL OR full_name IS NOT NULL) 
         AND company_license_number IS NULL;''',
     
     # Location Data
-    'Realtors Missing City': '''SELECT COUNT(*) FROM realtors 
-        WHERE duplicate IS FALSE 
-        AND hidden IS FALSE 
+    'Realtors Missing City': f'''SELECT COUNT(*) FROM realtors 
+        WHERE {VISIBLE_REALTORS_FILTER} 
         AND city IS NULL;''',
     
-    'Realtors Missing State': '''SELECT COUNT(*) FROM realtors 
-        WHERE duplicate IS FALSE 
-        AND hidden IS FALSE 
+    'Realtors Missing State': f'''SELECT COUNT(*) FROM realtors 
+        WHERE {VISIBLE_REALTORS_FILTER} 
         AND state IS NULL;''',
     
-    'Realtors Missing Zip': '''SELECT COUNT(*) FROM realtors 
-        WHERE duplicate IS FALSE 
-        AND hidden IS FALSE 
+    'Realtors Missing Zip': f'''SELECT COUNT(*) FROM realtors 
+        WHERE {VISIBLE_REALTORS_FILTER} 
         AND zip_code IS NULL;''',
     
     # Media Data
-    'Realtors Missing Avatar URLs': '''SELECT COUNT(*) FROM realtors 
-        WHERE duplicate IS FALSE 
-        AND hidden IS FALSE 
+    'Realtors Missing Avatar URLs': f'''SELECT COUNT(*) FROM realtors 
+        WHERE {VISIBLE_REALTORS_FILTER} 
         AND avatar_urls IS NULL;''',
     
     # External Data
-    'Realtors Connected Users': '''SELECT COUNT(*) FROM realtors 
-        WHERE duplicate IS FALSE 
-        AND hidden IS FALSE 
+    'Realtors Connected Users': f'''SELECT COUNT(*) FROM realtors 
+        WHERE {VISIBLE_REALTORS_FILTER} 
         AND external_id IS NOT NULL;''',
     
     'Realtors Hidden Users': '''SELECT COUNT(*) FROM realtors WHERE hidden IS TRUE;'''
@@ -251,400 +246,278 @@ loans_query = {
         AND owner_name IS NULL;'''
 }
 
-zebra_query = {
-    # Total Records
-    'Total Records': f'''SELECT COUNT(*) FROM {ZEBRA_TABLE};''',
-    
-    # Agent Data Completeness
-    'Missing Listing Agent Data': f'''SELECT COUNT(*) FROM {ZEBRA_TABLE} 
-        WHERE (main_agent IS NULL OR main_agent = '' OR main_agent = 'null') 
-        AND (main_agent_company IS NULL OR main_agent_company = '' OR main_agent_company = 'null') 
-        AND (main_agent_license IS NULL OR main_agent_license = '' OR main_agent_license = 'null');''',
-    
-    'Missing Buyer Agent Data': f'''SELECT COUNT(*) FROM {ZEBRA_TABLE} 
-        WHERE (buyer_agent IS NULL OR buyer_agent = '') 
-        AND (buyer_agent_company IS NULL OR buyer_agent_company = '') 
-        AND (buyer_agent_license IS NULL OR buyer_agent_license = '');''',
-    
-    'Main Agent Company Missing': f'''SELECT COUNT(*) FROM {ZEBRA_TABLE} 
-        WHERE main_agent <> '' 
-        AND main_agent_company = '';''',
-    
-    'Buyer Agent Company Missing': f'''SELECT COUNT(*) FROM {ZEBRA_TABLE} 
-        WHERE buyer_agent <> '' 
-        AND buyer_agent_company = '';''',
-    
-    'Co-Agent Company Missing': f'''SELECT COUNT(*) FROM {ZEBRA_TABLE} 
-        WHERE co_agent <> '' 
-        AND co_agent_company = '';''',
-    
-    # Photo Completeness
-    'Missing Main Agent Photo': f'''SELECT COUNT(*) FROM {ZEBRA_TABLE} 
-        WHERE (main_agent <> '' OR main_agent IS NOT NULL) 
-        AND (main_agent_photo = 'null' OR main_agent_photo = '' OR main_agent_photo IS NULL);''',
-    
-    'Missing Buyer Agent Photo': f'''SELECT COUNT(*) FROM {ZEBRA_TABLE} 
-        WHERE (buyer_agent <> '' OR buyer_agent IS NOT NULL) 
-        AND (buyer_agent_photo = 'null' OR buyer_agent_photo = '' OR buyer_agent_photo IS NULL);''',
-    
-    'Missing Home Photo': f'''SELECT COUNT(*) FROM {ZEBRA_TABLE} 
-        WHERE home_photo = '' OR home_photo = 'null';''',
-    
-    # Property Data Completeness
-    'Missing Sale Date': f'''SELECT COUNT(*) FROM {ZEBRA_TABLE} 
-        WHERE (sold_date IS NULL OR sold_date = '') 
-        AND (property_history = '' OR property_history IS NULL);''',
-    
-    'Missing Sold Price': f'''SELECT COUNT(*) FROM {ZEBRA_TABLE} 
-        WHERE (sold_price IS NULL OR sold_price = '') 
-        AND (property_history = '' OR property_history IS NULL);''',
-    
-    'Missing Property History': f'''SELECT COUNT(*) FROM {ZEBRA_TABLE} 
-        WHERE property_history = '' OR property_history IS NULL;''',
-    
-    'Missing Environment Factors': f'''SELECT COUNT(*) FROM {ZEBRA_TABLE} 
-        WHERE environment_factors = '' OR environment_factors IS NULL;''',
-    
-    'Sold Date "Not Listed for Sale"': f'''SELECT COUNT(*) FROM {ZEBRA_TABLE} 
-        WHERE sold_date ILIKE '%NOT LISTED FOR SALE%' 
-        AND property_history = '';''',
-    
-    # Data Quality Metrics
-    'Complete Records in Valuable Fields': f'''SELECT COUNT(*) FROM {ZEBRA_TABLE} 
-        WHERE (buyer_agent IS NOT NULL AND buyer_agent <> '') 
-        AND (buyer_agent_license IS NOT NULL AND buyer_agent_license <> '') 
-        AND (main_agent_license IS NOT NULL AND buyer_agent <> '') 
-        AND (main_agent IS NOT NULL AND main_agent <> '') 
-        AND (sold_price IS NOT NULL AND sold_price <> '') 
-        AND (sold_date IS NOT NULL AND sold_date <> '') 
-        AND (property_address IS NOT NULL AND property_address <> '');''',
-    
-    # Unique Records Analysis
-    'Unique Records (deduplicated)': f'''WITH DeduplicatedRecords AS (
-            SELECT property_address, sold_date, sold_price,
-                   ROW_NUMBER() OVER (
-                       PARTITION BY TRIM(LOWER(property_address)), sold_date, sold_price
-                       ORDER BY 
-                           CASE
-                               WHEN sold_date ~ '^[A-Za-z]{{3}} \\d{{1,2}}, \\d{{4}}$'
-                               THEN TO_DATE(sold_date, 'Mon DD, YYYY')
-                               ELSE NULL
-                           END DESC
-                   ) AS row_num
-            FROM {ZEBRA_TABLE}
-            WHERE sold_date ~ '^[A-Za-z]{{3}} \\d{{1,2}}, \\d{{4}}$'
-        )
-        SELECT COUNT(*) FROM DeduplicatedRecords WHERE row_num = 1;''',
-    
-    'Unique Agents': f'''WITH agent_data AS (
-            SELECT main_agent AS agent_name, main_agent_company AS company
-            FROM {ZEBRA_TABLE}
-            WHERE main_agent IS NOT NULL
-            UNION
-            SELECT buyer_agent, buyer_agent_company
-            FROM {ZEBRA_TABLE}
-            WHERE buyer_agent IS NOT NULL
-        )
-        SELECT COUNT(DISTINCT ROW(agent_name, company)) AS unique_agents_total 
-        FROM agent_data;''',
-    
-    'Unique License Numbers': f'''WITH agent_data AS (
-            SELECT main_agent AS agent_name, main_agent_company AS company, main_agent_license AS license
-            FROM {ZEBRA_TABLE}
-            WHERE main_agent <> ''
-            UNION
-            SELECT buyer_agent, buyer_agent_company, buyer_agent_license
-            FROM {ZEBRA_TABLE}
-            WHERE buyer_agent <> ''
-        )
-        SELECT COUNT(DISTINCT license) FILTER (WHERE license <> 'null') AS unique_licenses_total
-        FROM agent_data;''',
-    
-    'Unique Phone Numbers': f'''WITH agent_data AS (
-            SELECT main_agent AS agent_name, main_agent_company AS company, main_agent_phone AS phone
-            FROM {ZEBRA_TABLE}
-            WHERE main_agent IS NOT NULL
-            UNION
-            SELECT buyer_agent, buyer_agent_company, buyer_agent_phone
-            FROM {ZEBRA_TABLE}
-            WHERE buyer_agent IS NOT NULL
-        )
-        SELECT COUNT(DISTINCT phone) FILTER (WHERE phone IS NOT NULL) AS unique_phone_total
-        FROM agent_data;''',
+def build_zebra_query(table):
+    """Build the zebra completeness suite for one state table from ``zebra_tables``."""
+    return {
+        # Total Records
+        'Total Records': f'''SELECT COUNT(*) FROM {table};''',
+    
+        # Agent Data Completeness
+        'Missing Listing Agent Data': f'''SELECT COUNT(*) FROM {table} 
+            WHERE (main_agent IS NULL OR main_agent = '' OR main_agent = 'null') 
+            AND (main_agent_company IS NULL OR main_agent_company = '' OR main_agent_company = 'null') 
+            AND (main_agent_license IS NULL OR main_agent_license = '' OR main_agent_license = 'null');''',
+    
+        'Missing Buyer Agent Data': f'''SELECT COUNT(*) FROM {table} 
+            WHERE (buyer_agent IS NULL OR buyer_agent = '') 
+            AND (buyer_agent_company IS NULL OR buyer_agent_company = '') 
+            AND (buyer_agent_license IS NULL OR buyer_agent_license = '');''',
+    
+        'Main Agent Company Missing': f'''SELECT COUNT(*) FROM {table} 
+            WHERE main_agent <> '' 
+            AND main_agent_company = '';''',
+    
+        'Buyer Agent Company Missing': f'''SELECT COUNT(*) FROM {table} 
+            WHERE buyer_agent <> '' 
+            AND buyer_agent_company = '';''',
+    
+        'Co-Agent Company Missing': f'''SELECT COUNT(*) FROM {table} 
+            WHERE co_agent <> '' 
+            AND co_agent_company = '';''',
+    
+        # Photo Completeness
+        'Missing Main Agent Photo': f'''SELECT COUNT(*) FROM {table} 
+            WHERE (main_agent <> '' OR main_agent IS NOT NULL) 
+            AND (main_agent_photo = 'null' OR main_agent_photo = '' OR main_agent_photo IS NULL);''',
+    
+        'Missing Buyer Agent Photo': f'''SELECT COUNT(*) FROM {table} 
+            WHERE (buyer_agent <> '' OR buyer_agent IS NOT NULL) 
+            AND (buyer_agent_photo = 'null' OR buyer_agent_photo = '' OR buyer_agent_photo IS NULL);''',
+    
+        'Missing Home Photo': f'''SELECT COUNT(*) FROM {table} 
+            WHERE home_photo = '' OR home_photo = 'null';''',
+    
+        # Property Data Completeness
+        'Missing Sale Date': f'''SELECT COUNT(*) FROM {table} 
+            WHERE (sold_date IS NULL OR sold_date = '') 
+            AND (property_history = '' OR property_history IS NULL);''',
+    
+        'Missing Sold Price': f'''SELECT COUNT(*) FROM {table} 
+            WHERE (sold_price IS NULL OR sold_price = '') 
+            AND (property_history = '' OR property_history IS NULL);''',
+    
+        'Missing Property History': f'''SELECT COUNT(*) FROM {table} 
+            WHERE property_history = '' OR property_history IS NULL;''',
+    
+        'Missing Environment Factors': f'''SELECT COUNT(*) FROM {table} 
+            WHERE environment_factors = '' OR environment_factors IS NULL;''',
+    
+        'Sold Date "Not Listed for Sale"': f'''SELECT COUNT(*) FROM {table} 
+            WHERE sold_date ILIKE '%NOT LISTED FOR SALE%' 
+            AND property_history = '';''',
+    
+        # Data Quality Metrics
+        'Complete Records in Valuable Fields': f'''SELECT COUNT(*) FROM {table} 
+            WHERE (buyer_agent IS NOT NULL AND buyer_agent <> '') 
+            AND (buyer_agent_license IS NOT NULL AND buyer_agent_license <> '') 
+            AND (main_agent_license IS NOT NULL AND buyer_agent <> '') 
+            AND (main_agent IS NOT NULL AND main_agent <> '') 
+            AND (sold_price IS NOT NULL AND sold_price <> '') 
+            AND (sold_date IS NOT NULL AND sold_date <> '') 
+            AND (property_address IS NOT NULL AND property_address <> '');''',
+    
+        # Unique Records Analysis
+        'Unique Records (deduplicated)': f'''WITH DeduplicatedRecords AS (
+                SELECT property_address, sold_date, sold_price,
+                       ROW_NUMBER() OVER (
+                           PARTITION BY TRIM(LOWER(property_address)), sold_date, sold_price
+                           ORDER BY 
+                               CASE
+                                   WHEN sold_date ~ '^[A-Za-z]{{3}} \\d{{1,2}}, \\d{{4}}$'
+                                   THEN TO_DATE(sold_date, 'Mon DD, YYYY')
+                                   ELSE NULL
+                               END DESC
+                       ) AS row_num
+                FROM {table}
+                WHERE sold_date ~ '^[A-Za-z]{{3}} \\d{{1,2}}, \\d{{4}}$'
+            )
+            SELECT COUNT(*) FROM DeduplicatedRecords WHERE row_num = 1;''',
+    
+        'Unique Agents': f'''WITH agent_data AS (
+                SELECT main_agent AS agent_name, main_agent_company AS company
+                FROM {table}
+                WHERE main_agent IS NOT NULL
+                UNION
+                SELECT buyer_agent, buyer_agent_company
+                FROM {table}
+                WHERE buyer_agent IS NOT NULL
+            )
+            SELECT COUNT(DISTINCT ROW(agent_name, company)) AS unique_agents_total 
+            FROM agent_data;''',
+    
+        'Unique License Numbers': f'''WITH agent_data AS (
+                SELECT main_agent AS agent_name, main_agent_company AS company, main_agent_license AS license
+                FROM {table}
+                WHERE main_agent <> ''
+                UNION
+                SELECT buyer_agent, buyer_agent_company, buyer_agent_license
+                FROM {table}
+                WHERE buyer_agent <> ''
+            )
+            SELECT COUNT(DISTINCT license) FILTER (WHERE license <> 'null') AS unique_licenses_total
+            FROM agent_data;''',
+    
+        'Unique Phone Numbers': f'''WITH agent_data AS (
+                SELECT main_agent AS agent_name, main_agent_company AS company, main_agent_phone AS phone
+                FROM {table}
+                WHERE main_agent IS NOT NULL
+                UNION
+                SELECT buyer_agent, buyer_agent_company, buyer_agent_phone
+                FROM {table}
+                WHERE buyer_agent IS NOT NULL
+            )
+            SELECT COUNT(DISTINCT phone) FILTER (WHERE phone IS NOT NULL) AS unique_phone_total
+            FROM agent_data;''',
         
-    'Unique Photos': f'''WITH DeduplicatedRecords AS (
-            SELECT *,
-                   ROW_NUMBER() OVER (
-                       PARTITION BY TRIM(LOWER(property_address)), sold_date, sold_price
-                       ORDER BY
-                           CASE
-                               WHEN sold_date ~ '^[A-Za-z]{{3}} \\d{{1,2}}, \\d{{4}}$'
-                               THEN TO_DATE(sold_date, 'Mon DD, YYYY')
-                               ELSE NULL
-                           END DESC
-                   ) AS row_num
-            FROM {ZEBRA_TABLE}
-            WHERE sold_date ~ '^[A-Za-z]{{3}} \\d{{1,2}}, \\d{{4}}$'
-        ),
-        AgentPhotos AS (
-            SELECT TRIM(main_agent) AS agent_name
-            FROM DeduplicatedRecords
-            WHERE row_num = 1
-              AND main_agent IS NOT NULL
-              AND main_agent_photo IS NOT NULL
+        'Unique Photos': f'''WITH DeduplicatedRecords AS (
+                SELECT *,
+                       ROW_NUMBER() OVER (
+                           PARTITION BY TRIM(LOWER(property_address)), sold_date, sold_price
+                           ORDER BY
+                               CASE
+                                   WHEN sold_date ~ '^[A-Za-z]{{3}} \\d{{1,2}}, \\d{{4}}$'
+                                   THEN TO_DATE(sold_date, 'Mon DD, YYYY')
+                                   ELSE NULL
+                               END DESC
+                       ) AS row_num
+                FROM {table}
+                WHERE sold_date ~ '^[A-Za-z]{{3}} \\d{{1,2}}, \\d{{4}}$'
+            ),
+            AgentPhotos AS (
+                SELECT TRIM(main_agent) AS agent_name
+                FROM DeduplicatedRecords
+                WHERE row_num = 1
+                  AND main_agent IS NOT NULL
+                  AND main_agent_photo IS NOT NULL
 
-            UNION
+                UNION
 
-            SELECT TRIM(buyer_agent) AS agent_name
-            FROM DeduplicatedRecords
-            WHERE row_num = 1
-              AND buyer_agent IS NOT NULL
-              AND buyer_agent_photo IS NOT NULL
-        )
-        SELECT COUNT(DISTINCT agent_name) AS unique_agents_with_photos FROM AgentPhotos;'''
-}
+                SELECT TRIM(buyer_agent) AS agent_name
+                FROM DeduplicatedRecords
+                WHERE row_num = 1
+                  AND buyer_agent IS NOT NULL
+                  AND buyer_agent_photo IS NOT NULL
+            )
+            SELECT COUNT(DISTINCT agent_name) AS unique_agents_with_photos FROM AgentPhotos;'''
+    }
 
-suspicious_realtor_patterns = {
+zebra_query = build_zebra_query(ZEBRA_TABLE)
+
+# ILIKE patterns tested against both name and full_name of visible, non-duplicate realtors
+SUSPICIOUS_REALTOR_NAME_PATTERNS = {
     # Test Patterns
-    'Realtors Name Starts With "test"': '''SELECT COUNT(*) FROM realtors r 
-        WHERE r.duplicate = FALSE 
-        AND r.hidden = FALSE 
-        AND (r.name ILIKE 'test%' OR r.full_name ILIKE 'test%');''',
-    
-    'Realtors Name Ends With "test"': '''SELECT COUNT(*) FROM realtors r 
-        WHERE r.duplicate = FALSE 
-        AND r.hidden = FALSE 
-        AND (r.name ILIKE '%test' OR r.full_name ILIKE '%test');''',
-    
+    'Realtors Name Starts With "test"': 'test%',
+    'Realtors Name Ends With "test"': '%test',
+
     # Member Status Patterns
-    'Realtors Name Contains "not a member"': '''SELECT COUNT(*) FROM realtors r 
-        WHERE r.duplicate = FALSE 
-        AND r.hidden = FALSE 
-        AND (r.name ILIKE '%not a member%' OR r.full_name ILIKE '%not a member%');''',
-    
-    'Realtors Name Contains "out of state"': '''SELECT COUNT(*) FROM realtors r 
-        WHERE r.duplicate = FALSE 
-        AND r.hidden = FALSE 
-        AND (r.name ILIKE '%out of state%' OR r.full_name ILIKE '%out of state%');''',
-    
+    'Realtors Name Contains "not a member"': '%not a member%',
+    'Realtors Name Contains "out of state"': '%out of state%',
+
     # None/Non Patterns
-    'Realtors Name Starts With "none"': '''SELECT COUNT(*) FROM realtors r 
-        WHERE r.duplicate = FALSE 
-        AND r.hidden = FALSE 
-        AND (r.name ILIKE 'none %' OR r.full_name ILIKE 'none %');''',
-    
-    'Realtors Name Ends With "none"': '''SELECT COUNT(*) FROM realtors r 
-        WHERE r.duplicate = FALSE 
-        AND r.hidden = FALSE 
-        AND (r.name ILIKE '% none' OR r.full_name ILIKE '% none');''',
-    
-    'Realtors Name Ends With "non"': '''SELECT COUNT(*) FROM realtors r 
-        WHERE r.duplicate = FALSE 
-        AND r.hidden = FALSE 
-        AND (r.name ILIKE '% non' OR r.full_name ILIKE '% non');''',
-    
-    'Realtors Name Starts With "non"': '''SELECT COUNT(*) FROM realtors r 
-        WHERE r.duplicate = FALSE 
-        AND r.hidden = FALSE 
-        AND (r.name ILIKE 'non %' OR r.full_name ILIKE 'non %');''',
-    
-    'Realtors Name Contains "nonmember"': '''SELECT COUNT(*) FROM realtors r 
-        WHERE r.duplicate = FALSE 
-        AND r.hidden = FALSE 
-        AND (r.name ILIKE '%nonmember%' OR r.full_name ILIKE '%nonmember%');''',
-    
+    'Realtors Name Starts With "none"': 'none %',
+    'Realtors Name Ends With "none"': '% none',
+    'Realtors Name Ends With "non"': '% non',
+    'Realtors Name Starts With "non"': 'non %',
+    'Realtors Name Contains "nonmember"': '%nonmember%',
+
     # Other Patterns
-    'Realtors Name Starts With "other"': '''SELECT COUNT(*) FROM realtors r 
-        WHERE r.duplicate = FALSE 
-        AND r.hidden = FALSE 
-        AND (r.name ILIKE 'other %' OR r.full_name ILIKE 'other %');''',
-    
-    'Realtors Name Contains "Member"': '''SELECT COUNT(*) FROM realtors r 
-        WHERE r.duplicate = FALSE 
-        AND r.hidden = FALSE 
-        AND (r.name ILIKE '%Member%' OR r.full_name ILIKE '%Member%');''',
-    
-    'Realtors Name Contains "Nonmls"': '''SELECT COUNT(*) FROM realtors r 
-        WHERE r.duplicate = FALSE 
-        AND r.hidden = FALSE 
-        AND (r.name ILIKE '%Nonmls%' OR r.full_name ILIKE '%Nonmls%');''',
-    
-    'Realtors Name Contains "Outside"': '''SELECT COUNT(*) FROM realtors r 
-        WHERE r.duplicate = FALSE 
-        AND r.hidden = FALSE 
-        AND (r.name ILIKE '%Outside%' OR r.full_name ILIKE '%Outside%');''',
-    
+    'Realtors Name Starts With "other"': 'other %',
+    'Realtors Name Contains "Member"': '%Member%',
+    'Realtors Name Contains "Nonmls"': '%Nonmls%',
+    'Realtors Name Contains "Outside"': '%Outside%',
+
     # System Patterns
-    'Realtors Name Contains "null"': '''SELECT COUNT(*) FROM realtors r 
-        WHERE r.duplicate = FALSE 
-        AND r.hidden = FALSE 
-        AND (r.name ILIKE '%null %' OR r.full_name ILIKE '%null %');''',
-    
-    'Realtors Name Contains "AGENT"': '''SELECT COUNT(*) FROM realtors r 
-        WHERE r.duplicate = FALSE 
-        AND r.hidden = FALSE 
-        AND (r.name ILIKE '%AGENT%' OR r.full_name ILIKE '%AGENT%');''',
-    
-    'Realtors Name Contains "Unidentified"': '''SELECT COUNT(*) FROM realtors r 
-        WHERE r.duplicate = FALSE 
-        AND r.hidden = FALSE 
-        AND (r.name ILIKE '%Unidentified%' OR r.full_name ILIKE '%Unidentified%');''',
-    
-    'Realtors Name Contains "RMLS"': '''SELECT COUNT(*) FROM realtors r 
-        WHERE r.duplicate = FALSE 
-        AND r.hidden = FALSE 
-        AND (r.name ILIKE '%RMLS%' OR r.full_name ILIKE '%RMLS%');''',
-    
-    'Realtors Name Contains "Default"': '''SELECT COUNT(*) FROM realtors r 
-        WHERE r.duplicate = FALSE 
-        AND r.hidden = FALSE 
-        AND (r.name ILIKE '%Default%' OR r.full_name ILIKE '%Default%');''',
-    
-    'Realtors Name Contains "Subscriber"': '''SELECT COUNT(*) FROM realtors r 
-        WHERE r.duplicate = FALSE 
-        AND r.hidden = FALSE 
-        AND (r.name ILIKE '%Subscriber%' OR r.full_name ILIKE '%Subscriber%');''',
-    
-    'Realtors Name Contains "NON-MBR"': '''SELECT COUNT(*) FROM realtors r 
-        WHERE r.duplicate = FALSE 
-        AND r.hidden = FALSE 
-        AND (r.name ILIKE '%NON-MBR%' OR r.full_name ILIKE '%NON-MBR%');''',
-    
-    'Realtors Name Contains "Represented"': '''SELECT COUNT(*) FROM realtors r 
-        WHERE r.duplicate = FALSE 
-        AND r.hidden = FALSE 
-        AND (r.name ILIKE '%Represented%' OR r.full_name ILIKE '%Represented%');''',
-    
-    'Realtors Name Contains "listing"': '''SELECT COUNT(*) FROM realtors r 
-        WHERE r.duplicate = FALSE 
-        AND r.hidden = FALSE 
-        AND (r.name ILIKE '%listing%' OR r.full_name ILIKE '%listing%');''',
-    
-    'Realtors Name Contains "Participant"': '''SELECT COUNT(*) FROM realtors r 
-        WHERE r.duplicate = FALSE 
-        AND r.hidden = FALSE 
-        AND (r.name ILIKE '%Participant%' OR r.full_name ILIKE '%Participant%');'''
+    'Realtors Name Contains "null"': '%null %',
+    'Realtors Name Contains "AGENT"': '%AGENT%',
+    'Realtors Name Contains "Unidentified"': '%Unidentified%',
+    'Realtors Name Contains "RMLS"': '%RMLS%',
+    'Realtors Name Contains "Default"': '%Default%',
+    'Realtors Name Contains "Subscriber"': '%Subscriber%',
+    'Realtors Name Contains "NON-MBR"': '%NON-MBR%',
+    'Realtors Name Contains "Represented"': '%Represented%',
+    'Realtors Name Contains "listing"': '%listing%',
+    'Realtors Name Contains "Participant"': '%Participant%'
 }
 
+suspicious_realtor_patterns = {
+    description: f'''SELECT COUNT(*) FROM realtors 
+        WHERE {VISIBLE_REALTORS_FILTER} 
+        AND (name ILIKE '{pattern}' OR full_name ILIKE '{pattern}');'''
+    for description, pattern in SUSPICIOUS_REALTOR_NAME_PATTERNS.items()
+}
+
+# Last hs_history entry of every active home shopper, extracted once with plain ->-1
+# indexing. All active-buyer metrics share this CTE, so the query fusion planner
+# computes them in a single aggregate pass over it.
+ACTIVE_SHOPPER_LAST_ENTRY_CTE = '''WITH last_entry AS MATERIALIZED (
+            SELECT p.home_shopper -> 'hs_history' -> -1 AS elem
+            FROM properties p
+            WHERE p.home_shopper_active = TRUE
+        )'''
+
 active_buyer_completeness_report = {
     # Total Counts
-    'Total Active Home Shoppers': '''SELECT COUNT(*) FROM properties 
-        WHERE home_shopper_active = TRUE;''',
+    'Total Active Home Shoppers': f'''{ACTIVE_SHOPPER_LAST_ENTRY_CTE}
+        SELECT COUNT(*) FROM last_entry;''',
     
     # Owner Occupancy Status
-    'Owner Occupied: True': '''SELECT COUNT(*) FROM properties p,
-        LATERAL (
-          SELECT elem FROM jsonb_array_elements(p.home_shopper -> 'hs_history') WITH ORDINALITY AS t(elem, idx)
-          ORDER BY idx DESC LIMIT 1
-        ) last_entry
-        WHERE p.home_shopper_active = TRUE 
-        AND (last_entry.elem ->> 'owner_occupied')::boolean = TRUE;''',
-    
-    'Owner Occupied: False': '''SELECT COUNT(*) FROM properties p,
-        LATERAL (
-          SELECT elem FROM jsonb_array_elements(p.home_shopper -> 'hs_history') WITH ORDINALITY AS t(elem, idx)
-          ORDER BY idx DESC LIMIT 1
-        ) last_entry
-        WHERE p.home_shopper_active = TRUE 
-        AND (last_entry.elem ->> 'owner_occupied')::boolean = FALSE;''',
+    'Owner Occupied: True': f'''{ACTIVE_SHOPPER_LAST_ENTRY_CTE}
+        SELECT COUNT(*) FROM last_entry
+        WHERE (elem ->> 'owner_occupied')::boolean = TRUE;''',
+    
+    'Owner Occupied: False': f'''{ACTIVE_SHOPPER_LAST_ENTRY_CTE}
+        SELECT COUNT(*) FROM last_entry
+        WHERE (elem ->> 'owner_occupied')::boolean = FALSE;''',
     
     # Shopper Location Analysis
-    'In-State Shopper Only': '''SELECT COUNT(*) FROM properties p,
-        LATERAL (
-          SELECT elem FROM jsonb_array_elements(p.home_shopper -> 'hs_history') WITH ORDINALITY AS t(elem, idx)
-          ORDER BY idx DESC LIMIT 1
-        ) last_entry
-        WHERE p.home_shopper_active = TRUE
-        AND (last_entry.elem ->> 'in_state_shopper')::boolean = TRUE
-        AND (last_entry.elem ->> 'out_of_state_shopper')::boolean = FALSE;''',
-    
-    'Out-of-State Shopper Only': '''SELECT COUNT(*) FROM properties p,
-        LATERAL (
-          SELECT elem FROM jsonb_array_elements(p.home_shopper -> 'hs_history') WITH ORDINALITY AS t(elem, idx)
-          ORDER BY idx DESC LIMIT 1
-        ) last_entry
-        WHERE p.home_shopper_active = TRUE
-        AND (last_entry.elem ->> 'in_state_shopper')::boolean = FALSE
-        AND (last_entry.elem ->> 'out_of_state_shopper')::boolean = TRUE;''',
-    
-    'Both In-State and Out-of-State Shopper': '''SELECT COUNT(*) FROM properties p,
-        LATERAL (
-          SELECT elem FROM jsonb_array_elements(p.home_shopper -> 'hs_history') WITH ORDINALITY AS t(elem, idx)
-          ORDER BY idx DESC LIMIT 1
-        ) last_entry
-        WHERE p.home_shopper_active = TRUE
-        AND (last_entry.elem ->> 'in_state_shopper')::boolean = TRUE
-        AND (last_entry.elem ->> 'out_of_state_shopper')::boolean = TRUE;''',
+    'In-State Shopper Only': f'''{ACTIVE_SHOPPER_LAST_ENTRY_CTE}
+        SELECT COUNT(*) FROM last_entry
+        WHERE (elem ->> 'in_state_shopper')::boolean = TRUE
+        AND (elem ->> 'out_of_state_shopper')::boolean = FALSE;''',
+    
+    'Out-of-State Shopper Only': f'''{ACTIVE_SHOPPER_LAST_ENTRY_CTE}
+        SELECT COUNT(*) FROM last_entry
+        WHERE (elem ->> 'in_state_shopper')::boolean = FALSE
+        AND (elem ->> 'out_of_state_shopper')::boolean = TRUE;''',
+    
+    'Both In-State and Out-of-State Shopper': f'''{ACTIVE_SHOPPER_LAST_ENTRY_CTE}
+        SELECT COUNT(*) FROM last_entry
+        WHERE (elem ->> 'in_state_shopper')::boolean = TRUE
+        AND (elem ->> 'out_of_state_shopper')::boolean = TRUE;''',
     
     # Visit Frequency Analysis
-    'Visits > 1': '''SELECT COUNT(*) FROM properties p,
-        LATERAL (
-          SELECT elem FROM jsonb_array_elements(p.home_shopper -> 'hs_history') WITH ORDINALITY AS t(elem, idx)
-          ORDER BY idx DESC LIMIT 1
-        ) last_entry
-        WHERE p.home_shopper_active = TRUE 
-        AND (last_entry.elem ->> 'unique_obs_count')::int > 1;''',
-    
-    'Visits > 3': '''SELECT COUNT(*) FROM properties p,
-        LATERAL (
-          SELECT elem FROM jsonb_array_elements(p.home_shopper -> 'hs_history') WITH ORDINALITY AS t(elem, idx)
-          ORDER BY idx DESC LIMIT 1
-        ) last_entry
-        WHERE p.home_shopper_active = TRUE 
-        AND (last_entry.elem ->> 'unique_obs_count')::int > 3;''',
-    
-    'Visits > 5': '''SELECT COUNT(*) FROM properties p,
-        LATERAL (
-          SELECT elem FROM jsonb_array_elements(p.home_shopper -> 'hs_history') WITH ORDINALITY AS t(elem, idx)
-          ORDER BY idx DESC LIMIT 1
-        ) last_entry
-        WHERE p.home_shopper_active = TRUE 
-        AND (last_entry.elem ->> 'unique_obs_count')::int > 5;''',
-    
-    'Visits > 7': '''SELECT COUNT(*) FROM properties p,
-        LATERAL (
-          SELECT elem FROM jsonb_array_elements(p.home_shopper -> 'hs_history') WITH ORDINALITY AS t(elem, idx)
-          ORDER BY idx DESC LIMIT 1
-        ) last_entry
-        WHERE p.home_shopper_active = TRUE 
-        AND (last_entry.elem ->> 'unique_obs_count')::int > 7;''',
-    
-    'Visits > 9': '''SELECT COUNT(*) FROM properties p,
-        LATERAL (
-          SELECT elem FROM jsonb_array_elements(p.home_shopper -> 'hs_history') WITH ORDINALITY AS t(elem, idx)
-          ORDER BY idx DESC LIMIT 1
-        ) last_entry
-        WHERE p.home_shopper_active = TRUE 
-        AND (last_entry.elem ->> 'unique_obs_count')::int > 9;''',
+    'Visits > 1': f'''{ACTIVE_SHOPPER_LAST_ENTRY_CTE}
+        SELECT COUNT(*) FROM last_entry
+        WHERE (elem ->> 'unique_obs_count')::int > 1;''',
+    
+    'Visits > 3': f'''{ACTIVE_SHOPPER_LAST_ENTRY_CTE}
+        SELECT COUNT(*) FROM last_entry
+        WHERE (elem ->> 'unique_obs_count')::int > 3;''',
+    
+    'Visits > 5': f'''{ACTIVE_SHOPPER_LAST_ENTRY_CTE}
+        SELECT COUNT(*) FROM last_entry
+        WHERE (elem ->> 'unique_obs_count')::int > 5;''',
+    
+    'Visits > 7': f'''{ACTIVE_SHOPPER_LAST_ENTRY_CTE}
+        SELECT COUNT(*) FROM last_entry
+        WHERE (elem ->> 'unique_obs_count')::int > 7;''',
+    
+    'Visits > 9': f'''{ACTIVE_SHOPPER_LAST_ENTRY_CTE}
+        SELECT COUNT(*) FROM last_entry
+        WHERE (elem ->> 'unique_obs_count')::int > 9;''',
     
     # Recent Activity Analysis
-    'Last Visit Within 10 Days': '''SELECT COUNT(*) FROM properties p,
-        LATERAL (
-          SELECT elem FROM jsonb_array_elements(p.home_shopper -> 'hs_history') WITH ORDINALITY AS t(elem, idx)
-          ORDER BY idx DESC LIMIT 1
-        ) last_entry
-        WHERE p.home_shopper_active = TRUE 
-        AND (
-          (last_entry.elem ? 'last_observed' AND (last_entry.elem ->> 'last_observed')::timestamp >= CURRENT_DATE - INTERVAL '10 days') 
-          OR (NOT last_entry.elem ? 'last_observed' AND (last_entry.elem ->> 'recorded_date')::date >= CURRENT_DATE - INTERVAL '10 days')
+    'Last Visit Within 10 Days': f'''{ACTIVE_SHOPPER_LAST_ENTRY_CTE}
+        SELECT COUNT(*) FROM last_entry
+        WHERE (
+          (elem ? 'last_observed' AND (elem ->> 'last_observed')::timestamp >= CURRENT_DATE - INTERVAL '10 days') 
+          OR (NOT elem ? 'last_observed' AND (elem ->> 'recorded_date')::date >= CURRENT_DATE - INTERVAL '10 days')
         );''',
     
-    'Last Visit Within 30 Days': '''SELECT COUNT(*) FROM properties p,
-        LATERAL (
-          SELECT elem FROM jsonb_array_elements(p.home_shopper -> 'hs_history') WITH ORDINALITY AS t(elem, idx)
-          ORDER BY idx DESC LIMIT 1
-        ) last_entry
-        WHERE p.home_shopper_active = TRUE 
-        AND (
-          (last_entry.elem ? 'last_observed' AND (last_entry.elem ->> 'last_observed')::timestamp >= CURRENT_DATE - INTERVAL '30 days') 
-          OR (NOT last_entry.elem ? 'last_observed' AND (last_entry.elem ->> 'recorded_date')::date >= CURRENT_DATE - INTERVAL '30 days')
+    'Last Visit Within 30 Days': f'''{ACTIVE_SHOPPER_LAST_ENTRY_CTE}
+        SELECT COUNT(*) FROM last_entry
+        WHERE (
+          (elem ? 'last_observed' AND (elem ->> 'last_observed')::timestamp >= CURRENT_DATE - INTERVAL '30 days') 
+          OR (NOT elem ? 'last_observed' AND (elem ->> 'recorded_date')::date >= CURRENT_DATE - INTERVAL '30 days')
         );'''
 }
-
-
-
-
-
-
-
-
@@ -0,0 +1,141 @@
+"""
+Shared, vectorized address normalization for the CSV tools.
+
+- ``normalize_text``: lower-case, trim and collapse whitespace.
+- ``normalize_state``: full state names to USPS abbreviations.
+- ``normalize_zip``: the 5-digit zip code, also from "33101.0" or "33101-1234".
+- ``normalize_street``: ``normalize_text`` plus standard street suffixes ("Street" →
+  "st"), directionals ("North" → "n") and unit designators followed by a unit number
+  ("#4", "Apt 4", "Suite 4" → "unit 4"), so both spellings of an address compare equal
+  before any fuzzy scoring.
+- ``normalize_address``: several address columns joined into one normalized key. Only
+  the street column is standardized; state and zip columns are normalized as such.
+
+Everything runs as pandas string ops over whole columns. Token standardization only
+runs once per distinct value (``pd.factorize``), and its results are memoized in a
+bounded LRU cache shared across calls, so files full of repeated streets and cities
+cost little more than their distinct values.
+"""
+import re
+from functools import lru_cache, reduce
+
+import pandas as pd
+
+# === 🔧 CONFIGURATION ===
+VALUE_CACHE_SIZE = 500_000  # Distinct normalized values remembered across calls
+
+# === 📘 US STATE NORMALIZATION ===
+STATE_ABBREVIATIONS = {
+    'ALABAMA': 'AL', 'ALASKA': 'AK', 'ARIZONA': 'AZ', 'ARKANSAS': 'AR',
+    'CALIFORNIA': 'CA', 'COLORADO': 'CO', 'CONNECTICUT': 'CT', 'DELAWARE': 'DE',
+    'FLORIDA': 'FL', 'GEORGIA': 'GA', 'HAWAII': 'HI', 'IDAHO': 'ID', 'ILLINOIS': 'IL',
+    'INDIANA': 'IN', 'IOWA': 'IA', 'KANSAS': 'KS', 'KENTUCKY': 'KY', 'LOUISIANA': 'LA',
+    'MAINE': 'ME', 'MARYLAND': 'MD', 'MASSACHUSETTS': 'MA', 'MICHIGAN': 'MI',
+    'MINNESOTA': 'MN', 'MISSISSIPPI': 'MS', 'MISSOURI': 'MO', 'MONTANA': 'MT',
+    'NEBRASKA': 'NE', 'NEVADA': 'NV', 'NEW HAMPSHIRE': 'NH', 'NEW JERSEY': 'NJ',
+    'NEW MEXICO': 'NM', 'NEW YORK': 'NY', 'NORTH CAROLINA': 'NC', 'NORTH DAKOTA': 'ND',
+    'OHIO': 'OH', 'OKLAHOMA': 'OK', 'OREGON': 'OR', 'PENNSYLVANIA': 'PA',
+    'RHODE ISLAND': 'RI', 'SOUTH CAROLINA': 'SC', 'SOUTH DAKOTA': 'SD', 'TENNESSEE': 'TN',
+    'TEXAS': 'TX', 'UTAH': 'UT', 'VERMONT': 'VT', 'VIRGINIA': 'VA', 'WASHINGTON': 'WA',
+    'WEST VIRGINIA': 'WV', 'WISCONSIN': 'WI', 'WYOMING': 'WY'
+}
+
+# === 📘 STREET TOKENS (USPS Publication 28 abbreviations) ===
+STREET_SUFFIXES = {
+    'alley': 'aly', 'avenue': 'ave', 'av': 'ave', 'boulevard': 'blvd', 'circle': 'cir', 'court': 'ct',
+    'cove': 'cv', 'crossing': 'xing', 'drive': 'dr', 'expressway': 'expy', 'freeway': 'fwy',
+    'highway': 'hwy', 'lane': 'ln', 'loop': 'loop', 'parkway': 'pkwy', 'place': 'pl', 'plaza': 'plz',
+    'point': 'pt', 'road': 'rd', 'route': 'rte', 'square': 'sq', 'street': 'st', 'str': 'st',
+    'terrace': 'ter', 'trail': 'trl', 'turnpike': 'tpke', 'way': 'way',
+}
+DIRECTIONALS = {
+    'north': 'n', 'south': 's', 'east': 'e', 'west': 'w',
+    'northeast': 'ne', 'northwest': 'nw', 'southeast': 'se', 'southwest': 'sw',
+}
+UNIT_DESIGNATORS = {'#', 'apt', 'apartment', 'unit', 'ste', 'suite', 'rm', 'room', 'fl', 'floor', 'bldg', 'lot'}
+UNIT_TOKEN = 'unit'
+# "4", "4b", "b", "b4", "12-3": what may follow a designator for it to be one ("Lot Rd" is a street)
+UNIT_IDENTIFIER_PATTERN = re.compile(r'^(?:[a-z]|[a-z]?\d[a-z0-9-]*)$')
+STREET_TOKENS = {**STREET_SUFFIXES, **DIRECTIONALS}
+
+
+def normalize_text(series):
+    """Lower-case, trim and collapse whitespace."""
+    return series.astype(str).str.strip().str.lower().str.replace(r'\s+', ' ', regex=True)
+
+
+def normalize_state(series):
+    """Upper-cased state names replaced by their abbreviation; anything else is kept as is."""
+    states = series.astype(str).str.strip().str.upper()
+    return states.map(STATE_ABBREVIATIONS).fillna(states)
+
+
+def normalize_zip(series):
+    """First 3-5 digit run, zero-padded to 5 digits; empty when there is none."""
+    return series.astype(str).str.extract(r'(\d{3,5})', expand=False).str.zfill(5).fillna('')
+
+
+def is_unit_number(tokens, i):
+    """Whether ``tokens[i]`` is a unit number, possibly after another designator ("apt # 4")."""
+    if i >= len(tokens):
+        return False
+    if tokens[i] in UNIT_DESIGNATORS:
+        return is_unit_number(tokens, i + 1)
+    return bool(UNIT_IDENTIFIER_PATTERN.match(tokens[i]))
+
+
+@lru_cache(maxsize=VALUE_CACHE_SIZE)
+def standardize_tokens(text):
+    """Replace suffix, directional and unit tokens of one cleaned address; repeated units collapse."""
+    tokens = text.split()
+    standardized = []
+    for i, token in enumerate(tokens):
+        if token in UNIT_DESIGNATORS and is_unit_number(tokens, i + 1):
+            if standardized and standardized[-1] == UNIT_TOKEN:
+                continue
+            token = UNIT_TOKEN
+        standardized.append(STREET_TOKENS.get(token, token))
+    return ' '.join(standardized)
+
+
+def normalize_street(series):
+    """Street addresses in one canonical spelling, e.g. "12 North Main Street, #4" → "12 n main st unit 4"."""
+    cleaned = (
+        series.astype(str).str.lower()
+        .str.replace(r'[.,;]', ' ', regex=True)
+        .str.replace('#', ' # ', regex=False)
+        .str.replace(r'\s+', ' ', regex=True)
+        .str.strip()
+    )
+    codes, uniques = pd.factorize(cleaned)
+    standardized = pd.Index([standardize_tokens(value) for value in uniques])
+    return pd.Series(standardized.take(codes), index=series.index) if len(codes) else cleaned
+
+
+def normalize_address(df, cols):
+    """
+    One normalized key per row from the given address columns; missing columns and values are skipped.
+
+    The first column is the street and gets ``normalize_street``. Columns named like a
+    state or zip code get ``normalize_state`` (lower-cased) or ``normalize_zip``; the
+    rest (unit, city) only ``normalize_text``.
+    """
+    parts = []
+    for position, col in enumerate(cols):
+        if col not in df.columns:
+            continue
+        values = df[col].where(df[col].notna() & (df[col].astype(str) != 'NaT'), '').astype(str)
+        name = col.lower()
+        if position == 0:
+            values = normalize_street(values)
+        elif name == 'state':
+            values = normalize_state(values).str.lower()
+        elif 'zip' in name:
+            values = normalize_zip(values)
+        else:
+            values = normalize_text(values)
+        parts.append(values)
+    if not parts:
+        return pd.Series('', index=df.index)
+    # Joining empty parts leaves extra spaces
+    return normalize_text(reduce(lambda left, right: left + ' ' + right, parts))
@@ -1,200 +1,399 @@
+"""
+Look up the properties and sales behind a CSV of addresses.
+
+The CSV rows are bulk-loaded with ``COPY`` into a temporary table and joined to
+``properties`` on ``zip_code`` (and state), so 100k+ addresses cost one load and one
+join per chunk instead of an OR-term per row:
+
+- ``normalized``: street and city must be equal after lower-casing, trimming and
+  collapsing whitespace;
+- ``trigram``: a normalized match, or a street whose ``pg_trgm`` similarity reaches
+  ``TRIGRAM_THRESHOLD`` (falls back to ``normalized`` if the extension is missing).
+
+Sales are then matched on the CSV's ``clip`` column, each distinct clip once. Both
+results are streamed to CSV with ``COPY ... TO STDOUT``, so they are never held in
+memory.
+
+With ``--snapshot``, addresses in the states covered by a local
+``property_snapshot.py`` file are matched against it instead (fully standardized
+streets, no database round trip); only the remaining states and the sales query
+reach the database. Only states exported from the same ``--env`` are used, and
+snapshot matches are exact: ``trigram`` similarity only applies to the states
+looked up in the database. The covered states and their fingerprints are part of
+the checkpoint key, so a refresh between a failed run and its resume starts over.
+
+Large files are split into chunks of about ``CHUNK_ROWS`` rows along state and zip
+boundaries (a zip code never spans two chunks). Each chunk's property and sales
+lookups run concurrently on a connection pool. Every finished lookup is
+checkpointed as its own file, so a run that fails resumes with the lookups it hadn't
+finished; the chunk files are merged into the final CSVs at the end.
+"""
+import io
 import os
 import sys
+import shutil
+import hashlib
+import argparse
 import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import pandas as pd
-import psycopg2
-import boto3
 from datetime import datetime
-from dotenv import load_dotenv
+
+# Ensure module paths work when running as script
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Sibling modules are imported by bare name: run as a script, this folder's
+# tool_for_comparing_csv_data.py shadows the package of the same name
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from db_connection.connection_pool import get_pool, close_pools
+from db_connection.streaming_export import copy_to_file
+from address_normalization import normalize_text, normalize_state, normalize_zip
+from property_snapshot import PropertySnapshot, SNAPSHOT_PATH
 
 # === 📝 LOGGING SETUP ===
-logging.basicConfig(
-    level=logging.DEBUG,
-    format="%(asctime)s [%(levelname)s] %(message)s",
-    handlers=[
-        logging.StreamHandler(sys.stdout),
-        logging.FileHandler("bulk_address_query_log.txt", mode='w')
-    ]
-)
+LOG_PATH = 'bulk_address_query_log.txt'
 log = logging.getLogger(__name__)
 log.setLevel(logging.DEBUG)
 
+
+def setup_logging():
+    """Log to stdout and ``LOG_PATH``; only ``main()`` does this, so importing the module writes no file."""
+    logging.basicConfig(
+        level=logging.DEBUG,
+        format="%(asctime)s [%(levelname)s] %(message)s",
+        handlers=[
+            logging.StreamHandler(sys.stdout),
+            logging.FileHandler(LOG_PATH, mode='w')
+        ]
+    )
+
 # === 🔐 ENV CONFIGURATION ===
-load_dotenv()
+# Credentials come from .env, read by the connection pool on first connect
 ENV = 'lab'
-REGION = os.getenv('REGION')
-DB_HOST = os.getenv(f'{ENV.upper()}_DB_HOST')
-DB_NAME = os.getenv(f'{ENV.upper()}_DB_NAME')
-DB_USER = os.getenv(f'{ENV.upper()}_DB_USER')
-
-os.environ['AWS_ACCESS_KEY_ID'] = os.getenv(f'{ENV.upper()}_AWS_ACCESS_KEY_ID')
-os.environ['AWS_SECRET_ACCESS_KEY'] = os.getenv(f'{ENV.upper()}_AWS_SECRET_ACCESS_KEY')
-os.environ['AWS_SESSION_TOKEN'] = os.getenv(f'{ENV.upper()}_AWS_SESSION_TOKEN')
-
-# === 📦 DB CONNECTION ===
-def get_iam_token():
-    client = boto3.client('rds', region_name=REGION)
-    return client.generate_db_auth_token(
-        DBHostname=DB_HOST,
-        Port=5432,
-        DBUsername=DB_USER
-    )
 
-def connect_db():
-    return psycopg2.connect(
-        host=DB_HOST,
-        dbname=DB_NAME,
-        user=DB_USER,
-        password=get_iam_token(),
-        port=5432,
-        sslmode='require'
-    )
+# === 🔧 CONFIGURATION ===
+CSV_PATH = '/Users/dmytrokovalchuk/Desktop/homeIQ/query_executor/Michael Horwitz - carrie_lingo.csv' # 👈 Or pass --csv
+MATCH_MODE = 'trigram' # 👈 'normalized' for exact matches only
+TRIGRAM_THRESHOLD = 0.6
+CHUNK_ROWS = 5000 # 👈 Input rows per chunk (whole zip codes are kept together)
+MAX_WORKERS = 8 # Lookups in flight at once, one pooled connection each
+CHECKPOINT_DIR = 'find_unmatched_checkpoints' # Finished chunk results, kept until the run completes
 
-# === 📘 US STATE NORMALIZATION ===
-STATE_ABBREVIATIONS = {
-    'ALABAMA': 'AL', 'ALASKA': 'AK', 'ARIZONA': 'AZ', 'ARKANSAS': 'AR',
-    'CALIFORNIA': 'CA', 'COLORADO': 'CO', 'CONNECTICUT': 'CT', 'DELAWARE': 'DE',
-    'FLORIDA': 'FL', 'GEORGIA': 'GA', 'HAWAII': 'HI', 'IDAHO': 'ID', 'ILLINOIS': 'IL',
-    'INDIANA': 'IN', 'IOWA': 'IA', 'KANSAS': 'KS', 'KENTUCKY': 'KY', 'LOUISIANA': 'LA',
-    'MAINE': 'ME', 'MARYLAND': 'MD', 'MASSACHUSETTS': 'MA', 'MICHIGAN': 'MI',
-    'MINNESOTA': 'MN', 'MISSISSIPPI': 'MS', 'MISSOURI': 'MO', 'MONTANA': 'MT',
-    'NEBRASKA': 'NE', 'NEVADA': 'NV', 'NEW HAMPSHIRE': 'NH', 'NEW JERSEY': 'NJ',
-    'NEW MEXICO': 'NM', 'NEW YORK': 'NY', 'NORTH CAROLINA': 'NC', 'NORTH DAKOTA': 'ND',
-    'OHIO': 'OH', 'OKLAHOMA': 'OK', 'OREGON': 'OR', 'PENNSYLVANIA': 'PA',
-    'RHODE ISLAND': 'RI', 'SOUTH CAROLINA': 'SC', 'SOUTH DAKOTA': 'SD', 'TENNESSEE': 'TN',
-    'TEXAS': 'TX', 'UTAH': 'UT', 'VERMONT': 'VT', 'VIRGINIA': 'VA', 'WASHINGTON': 'WA',
-    'WEST VIRGINIA': 'WV', 'WISCONSIN': 'WI', 'WYOMING': 'WY'
+# === 🧾 SQL ===
+INPUT_TABLE_SQL = """
+    CREATE TEMP TABLE input_addresses (
+        row_num integer,
+        street text,
+        city text,
+        state text,
+        zip_code text,
+        clip text
+    ) ON COMMIT DROP;
+"""
+COPY_INPUT_SQL = "COPY input_addresses (row_num, street, city, state, zip_code, clip) FROM STDIN WITH (FORMAT csv)"
+INDEX_INPUT_SQL = """
+    CREATE INDEX ON input_addresses (zip_code);
+    ANALYZE input_addresses;
+"""
+
+NORMALIZED_STREET = "regexp_replace(lower(trim(p.street_address)), '\\s+', ' ', 'g')"
+NORMALIZED_CITY = "regexp_replace(lower(trim(p.city)), '\\s+', ' ', 'g')"
+FULL_ADDRESS = """CONCAT(p.street_address,
+                   CASE WHEN p.unit_number IS NOT NULL AND p.unit_number <> '' THEN ' ' || p.unit_number ELSE '' END,
+                   ', ', p.city, ', ', p.state, ' ', p.zip_code)"""
+
+STREET_MATCH = {
+    'normalized': f"{NORMALIZED_STREET} = a.street",
+    'trigram': f"({NORMALIZED_STREET} = a.street OR similarity({NORMALIZED_STREET}, a.street) >= %(threshold)s)",
 }
 
-def normalize_state(state_name):
-    return STATE_ABBREVIATIONS.get(state_name.strip().upper(), state_name.strip().upper())
+PROPERTY_QUERY = """
+    SELECT DISTINCT p.id AS property_id, {full_address} AS full_address
+    FROM input_addresses a
+    JOIN properties p ON p.zip_code = a.zip_code AND p.state = a.state
+    WHERE {street_match}
+      AND {city} = a.city;
+"""
 
-# === 🚀 MAIN EXECUTION ===
-def main():
-    log.info("📥 Loading CSV...")
-    csv_path = '/Users/dmytrokovalchuk/Desktop/homeIQ/query_executor/Michael Horwitz - carrie_lingo.csv'
+SALES_QUERY = f"""
+    SELECT s.duplicate, s.deleted,
+           s.listing_agent_id, s.listing_co_agent_id,
+           s.buyer_agent_id, s.buyer_co_agent_id,
+           {FULL_ADDRESS} AS full_address,
+           s.sale_date, s.sale_price, s.id AS sale_id,
+           p.clip AS property_clip, s.clip AS sale_clip, p.id AS property_id
+    FROM sales s
+    INNER JOIN properties p ON p.id = s.property_id
+    WHERE s.clip = ANY(%(clips)s)
+    ORDER BY p.street_address DESC;
+"""
+
+def load_addresses(csv_path):
+    """The CSV's address rows, normalized; None (after logging why) when unusable."""
     if not os.path.exists(csv_path):
         log.error(f"❌ File not found: {csv_path}")
-        return
+        return None
 
     try:
-        df = pd.read_csv(csv_path)
+        # Read everything as text so zip codes keep their leading zeros
+        df = pd.read_csv(csv_path, dtype=str)
     except Exception as e:
         log.error(f"❌ Failed to load CSV: {e}")
-        return
+        return None
 
     required_cols = ['Address', 'City', 'State', 'Zip Code']
     for col in required_cols:
         if col not in df.columns:
             log.error(f"❌ Missing required column: {col}")
-            return
+            return None
 
-    df = df[required_cols + [col for col in df.columns if col.strip().lower() == 'clip']]
-    df['State'] = df['State'].apply(normalize_state)
+    clip_column = next((col for col in df.columns if col.strip().lower() == 'clip'), None)
     df = df.dropna(subset=required_cols)
+    # Streets and cities are only cleaned, not standardized: the SQL side cleans the raw
+    # properties columns the same way before comparing. Zips are joined on equality, so
+    # "33101-1234", "33101.0" and "2101" all become the 5-digit code
+    return pd.DataFrame({
+        'row_num': range(len(df)),
+        'street': normalize_text(df['Address']).values,
+        'city': normalize_text(df['City']).values,
+        'state': normalize_state(df['State']).values,
+        'zip_code': normalize_zip(df['Zip Code']).values,
+        'clip': df[clip_column].str.strip().values if clip_column else None,
+    })
 
-    log.info("🧠 Building WHERE clauses...")
-    conditions = []
-    for _, row in df.iterrows():
-        city = row['City'].strip().lower()
-        zip_code = str(row['Zip Code']).strip()
-        street = row['Address'].strip().lower()
-        clause = f"(city ILIKE '%%{city}%%' AND zip_code = '{zip_code}' AND street_address ILIKE '%%{street}%%')"
-        conditions.append(clause)
-
-    state_list = "', '".join(sorted(set(df['State'].dropna())))
-    state_filter = f"state IN ('{state_list}')"
-    where_clause = " OR\n    ".join(conditions)
-    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
 
-    # === 🧾 First Query - Property Matching
-    property_query = f"""
-        SELECT id AS property_id,
-               CONCAT(p.street_address,
-                   CASE WHEN p.unit_number IS NOT NULL AND p.unit_number <> '' THEN ' ' || p.unit_number ELSE '' END,
-                   ', ', p.city, ', ', p.state, ' ', p.zip_code) AS full_address
-        FROM properties p
-        WHERE {state_filter}
-          AND (
-            {where_clause}
-          );
+def load_input_table(cur, addresses):
+    """COPY the addresses into a temporary table that lives until the transaction ends."""
+    buffer = io.StringIO()
+    addresses.to_csv(buffer, index=False, header=False)
+    buffer.seek(0)
+    cur.execute(INPUT_TABLE_SQL)
+    cur.copy_expert(COPY_INPUT_SQL, buffer)
+    cur.execute(INDEX_INPUT_SQL)
+
+
+def resolve_match_mode(env, match_mode):
+    if match_mode != 'trigram':
+        return match_mode
+    with get_pool(env).connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm';")
+            installed = cur.fetchone() is not None
+    if not installed:
+        log.warning("⚠️ pg_trgm is not installed, falling back to normalized matching")
+        return 'normalized'
+    return match_mode
+
+
+def property_query(match_mode):
+    return PROPERTY_QUERY.format(
+        full_address=FULL_ADDRESS, street_match=STREET_MATCH[match_mode], city=NORMALIZED_CITY
+    )
+
+
+# === ✂️ CHUNKING & CHECKPOINTS ===
+def split_into_chunks(addresses, chunk_rows=CHUNK_ROWS):
     """
-    property_query_file = f"executed_property_query_{timestamp}.sql"
-    with open(property_query_file, 'w') as f:
-        f.write(property_query)
+    ``[(chunk id, rows), ...]`` of about ``chunk_rows`` rows each, cut only between zip codes.
 
-    # === 🧾 Second Query - Sales Info by Clip
-    clip_column = next((col for col in df.columns if col.strip().lower() == 'clip'), None)
-    if not clip_column:
-        log.error("❌ No 'clip' column found in CSV. Cannot proceed with sales query.")
-        return
+    The split only depends on the input and ``chunk_rows``, so a resumed run sees the same chunks.
+    """
+    groups = addresses.sort_values(['state', 'zip_code', 'row_num']).groupby(['state', 'zip_code'], sort=False)
+    chunks, pending, size = [], [], 0
+    for _, group in groups:
+        pending.append(group)
+        size += len(group)
+        if size >= chunk_rows:
+            chunks.append(pd.concat(pending))
+            pending, size = [], 0
+    if pending:
+        chunks.append(pd.concat(pending))
+    return [(f"{i:05d}_{chunk['state'].iat[0]}_{chunk['zip_code'].iat[0]}".replace(os.sep, '-'), chunk)
+            for i, chunk in enumerate(chunks)]
 
-    clips = df[clip_column].dropna().astype(str).str.strip().unique()
-    if len(clips) == 0:
-        log.warning("⚠️ No valid clip values found in CSV for sales query.")
-        return
 
-    clip_str = ', '.join(f"'{c}'" for c in clips)
+def checkpoint_dir(env, csv_path, chunk_rows, match_mode, root=CHECKPOINT_DIR):
+    """Per-input checkpoint folder: the same file with the same settings resumes into the same folder."""
+    digest = hashlib.sha1(f'{env}:{chunk_rows}:{match_mode}:{TRIGRAM_THRESHOLD}:'.encode())
+    with open(csv_path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    name = os.path.splitext(os.path.basename(csv_path))[0]
+    return os.path.join(root, f'{name}_{digest.hexdigest()[:12]}')
 
-    sales_query = f"""
-        SELECT s.duplicate, s.deleted,
-               s.listing_agent_id, s.listing_co_agent_id,
-               s.buyer_agent_id, s.buyer_co_agent_id,
-               CONCAT(p.street_address,
-                   CASE WHEN p.unit_number IS NOT NULL AND p.unit_number <> '' THEN ' ' || p.unit_number ELSE '' END,
-                   ', ', p.city, ', ', p.state, ' ', p.zip_code
-               ) AS full_address,
-               s.sale_date, s.sale_price, s.id AS sale_id,
-               p.clip AS property_clip, s.clip AS sale_clip, p.id
-        FROM sales s
-        INNER JOIN properties p ON p.id = s.property_id
-        WHERE s.clip IN ({clip_str})
-        ORDER BY p.street_address DESC;
+
+def assign_clips(chunks):
+    """``{chunk id: clips}`` with every clip in the first chunk it appears in, so no sale is fetched twice."""
+    seen, assigned = set(), {}
+    for chunk_id, chunk in chunks:
+        clips = [clip for clip in chunk['clip'].dropna().unique().tolist() if clip not in seen]
+        seen.update(clips)
+        assigned[chunk_id] = clips
+    return assigned
+
+
+def run_lookup(env, kind, rows, match_mode, path):
+    """
+    Run one chunk's property or sales lookup into ``path``; written under a temporary name until complete.
+
+    ``rows`` is the chunk's addresses for the property lookup and its assigned clips for the sales lookup.
     """
-    sales_query_file = f"executed_sales_query_{timestamp}.sql"
-    with open(sales_query_file, 'w') as f:
-        f.write(sales_query)
+    partial = path + '.part'
+    with get_pool(env).connection() as conn:
+        if kind == 'properties':
+            with conn.cursor() as cur:
+                load_input_table(cur, rows)
+            copy_to_file(conn, property_query(match_mode), partial, {'threshold': TRIGRAM_THRESHOLD})
+        else:
+            copy_to_file(conn, SALES_QUERY, partial, {'clips': rows})
+    os.replace(partial, path)
 
-    log.info(f"📄 Property query saved: {os.path.abspath(property_query_file)}")
-    log.info(f"📄 Sales query saved: {os.path.abspath(sales_query_file)}")
 
-    # === 🧪 DB Execution
+def snapshot_fingerprints(env, snapshot_path, addresses):
+    """``{state: fingerprint}`` of the input's states that the snapshot covers for ``env``."""
+    snapshot = PropertySnapshot(snapshot_path)
     try:
-        with connect_db() as conn:
-            with conn.cursor() as cur:
-                # Property query execution
-                cur.execute(property_query)
-                df_props = pd.DataFrame(cur.fetchall(), columns=['property_id', 'full_address'])
-                prop_csv = f"matched_properties_by_address_{timestamp}.csv"
-                abs_prop_csv = os.path.abspath(prop_csv)
-                df_props.to_csv(abs_prop_csv, index=False)
-                log.info(f"✅ Property CSV saved at: {abs_prop_csv}")
-                print(f"\n✅ Property CSV saved at: {abs_prop_csv}")
-
-                # Show property SQL path in console
-                abs_property_query_path = os.path.abspath(property_query_file)
-                print(f"\n📄 Property SQL query saved to: {abs_property_query_path}")
-
-                # Sales query execution
-                cur.execute(sales_query)
-                sales_columns = [
-                    'duplicate', 'deleted', 'listing_agent_id', 'listing_co_agent_id',
-                    'buyer_agent_id', 'buyer_co_agent_id', 'full_address', 'sale_date',
-                    'sale_price', 'sale_id', 'property_clip', 'sale_clip', 'property_id'
-                ]
-                df_sales = pd.DataFrame(cur.fetchall(), columns=sales_columns)
-                sales_csv = f"matched_sales_by_clip_{timestamp}.csv"
-                abs_sales_csv = os.path.abspath(sales_csv)
-                df_sales.to_csv(abs_sales_csv, index=False)
-                log.info(f"✅ Sales CSV saved at: {abs_sales_csv}")
-                print(f"\n✅ Sales CSV saved at: {abs_sales_csv}")
-
-                # Show sales SQL path in console
-                abs_sales_query_path = os.path.abspath(sales_query_file)
-                print(f"\n📄 Sales SQL query saved to: {abs_sales_query_path}")
+        wanted = set(addresses['state'])
+        covered = {state: fp for state, fp in snapshot.fingerprints(env).items() if state in wanted}
+        other_env = (snapshot.covered_states() & wanted) - set(covered)
+    finally:
+        snapshot.close()
+    if other_env:
+        log.warning(f"⚠️ [{env}] Snapshot states exported from another environment, "
+                    f"looked up in the database instead: {', '.join(sorted(other_env))}")
+    return covered
+
+
+def match_from_snapshot(env, snapshot_path, states, addresses, path, match_mode):
+    """Match the rows in ``states`` against the snapshot into ``path``, unless a checkpoint already holds them."""
+    snapshot = PropertySnapshot(snapshot_path)
+    try:
+        if not os.path.exists(path):
+            local = addresses[addresses['state'].isin(states)]
+            matches = snapshot.lookup_addresses(local) if not local.empty else []
+            pd.DataFrame(matches, columns=['property_id', 'full_address']).to_csv(path + '.part', index=False)
+            os.replace(path + '.part', path)
+    finally:
+        snapshot.close()
+    log.info(f"📦 [{env}] {len(states)} state(s) matched from snapshot '{snapshot_path}'")
+    if states and match_mode == 'trigram':
+        log.warning(f"⚠️ [{env}] Snapshot states are matched on exact standardized streets, "
+                    f"without trigram similarity: {', '.join(sorted(states))}")
+
+
+def merge_csv_files(paths, output_path):
+    """Concatenate CSV files with identical headers, streaming, keeping the first header."""
+    with open(output_path, 'w', newline='') as out:
+        for i, path in enumerate(paths):
+            with open(path, newline='') as f:
+                header = f.readline()
+                if i == 0:
+                    out.write(header)
+                shutil.copyfileobj(f, out)
 
+
+def find_unmatched(env, csv_path, match_mode=MATCH_MODE, output_dir='.', chunk_rows=CHUNK_ROWS,
+                   max_workers=MAX_WORKERS, fresh=False, snapshot_path=None):
+    """Write the matched properties and sales CSVs; returns their paths, or None if the CSV is unusable."""
+    log.info("📥 Loading CSV...")
+    addresses = load_addresses(csv_path)
+    if addresses is None:
+        return None
+    if addresses['clip'].isna().all():
+        log.warning("⚠️ No 'clip' values found in CSV; the sales lookup will be empty.")
+
+    chunks = split_into_chunks(addresses, chunk_rows)
+    covered = snapshot_fingerprints(env, snapshot_path, addresses) if snapshot_path else {}
+    settings = f"{match_mode}{'+snapshot' if snapshot_path else ''}"
+    # A snapshot refresh between a failed run and its resume changes which rows are
+    # matched locally, so the covered states and their fingerprints key the checkpoints too
+    settings += ''.join(f':{state}={fingerprint}' for state, fingerprint in sorted(covered.items()))
+    checkpoints = checkpoint_dir(env, csv_path, chunk_rows, settings, os.path.join(output_dir, CHECKPOINT_DIR))
+    if fresh and os.path.isdir(checkpoints):
+        shutil.rmtree(checkpoints)
+    os.makedirs(checkpoints, exist_ok=True)
+
+    local_paths, local_states = [], set()
+    if snapshot_path:
+        local_path = os.path.join(checkpoints, 'properties_snapshot.csv')
+        local_states = set(covered)
+        match_from_snapshot(env, snapshot_path, local_states, addresses, local_path, match_mode)
+        local_paths.append(local_path)
+
+    tasks = []
+    clips = assign_clips(chunks)
+    for i, (chunk_id, chunk) in enumerate(chunks):
+        remote = chunk[~chunk['state'].isin(local_states)]
+        if not remote.empty:
+            tasks.append(('properties', chunk_id, remote, os.path.join(checkpoints, f'properties_{chunk_id}.csv')))
+        # The first chunk's lookup always runs so the merged sales CSV has its header
+        if clips[chunk_id] or i == 0:
+            tasks.append(('sales', chunk_id, clips[chunk_id], os.path.join(checkpoints, f'sales_{chunk_id}.csv')))
+    pending = [task for task in tasks if not os.path.exists(task[3])]
+    if len(pending) < len(tasks):
+        log.info(f"♻️ Resuming from '{checkpoints}': {len(tasks) - len(pending)} of {len(tasks)} lookups already done")
+    log.info(f"✂️ {len(addresses)} addresses in {len(chunks)} chunks, {len(pending)} lookups to run")
+
+    get_pool(env, max_size=max_workers)
+    try:
+        if any(task[0] == 'properties' for task in pending):
+            match_mode = resolve_match_mode(env, match_mode)
+        failed = 0
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {executor.submit(run_lookup, env, kind, rows, match_mode, path): (kind, chunk_id)
+                       for kind, chunk_id, rows, path in pending}
+            for done, future in enumerate(as_completed(futures), 1):
+                kind, chunk_id = futures[future]
+                try:
+                    future.result()
+                    log.info(f"✅ [{done}/{len(futures)}] {kind} lookup for chunk {chunk_id} checkpointed")
+                except Exception as e:
+                    failed += 1
+                    log.error(f"❌ [{done}/{len(futures)}] {kind} lookup for chunk {chunk_id} failed: {e}")
+    finally:
+        close_pools(env)
+    if failed:
+        raise RuntimeError(f"{failed} lookups failed; run again to resume from '{checkpoints}'")
+
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    prop_csv = os.path.abspath(os.path.join(output_dir, f"matched_properties_by_address_{timestamp}.csv"))
+    sales_csv = os.path.abspath(os.path.join(output_dir, f"matched_sales_by_clip_{timestamp}.csv"))
+    merge_csv_files(local_paths + [path for kind, _, _, path in tasks if kind == 'properties'], prop_csv)
+    merge_csv_files([path for kind, _, _, path in tasks if kind == 'sales'], sales_csv)
+    shutil.rmtree(checkpoints)
+    log.info(f"✅ Properties matched ({match_mode}), CSV saved at: {prop_csv}")
+    log.info(f"✅ Sales matched by clip, CSV saved at: {sales_csv}")
+    return prop_csv, sales_csv
+
+
+# === 🚀 MAIN EXECUTION ===
+def main():
+    parser = argparse.ArgumentParser(description="Match a CSV of addresses to properties and their sales.")
+    parser.add_argument('--csv', default=CSV_PATH, help="Input CSV with Address, City, State, Zip Code (and clip)")
+    parser.add_argument('--env', default=ENV, help="Database environment (default: %(default)s)")
+    parser.add_argument('--match-mode', choices=sorted(STREET_MATCH), default=MATCH_MODE,
+                        help="How streets are compared (default: %(default)s)")
+    parser.add_argument('--chunk-rows', type=int, default=CHUNK_ROWS,
+                        help="Input rows per chunk, split on zip code boundaries (default: %(default)s)")
+    parser.add_argument('--workers', type=int, default=MAX_WORKERS,
+                        help="Lookups run concurrently on pooled connections (default: %(default)s)")
+    parser.add_argument('--fresh', action='store_true',
+                        help="Discard the checkpoints of an earlier failed run instead of resuming it")
+    parser.add_argument('--snapshot', nargs='?', const=SNAPSHOT_PATH, default=None, metavar='PATH',
+                        help="Match addresses in states covered by a local property snapshot offline "
+                             "(default path: %(const)s)")
+    args = parser.parse_args()
+    setup_logging()
+
+    try:
+        outputs = find_unmatched(args.env, args.csv, args.match_mode, chunk_rows=args.chunk_rows,
+                                 max_workers=args.workers, fresh=args.fresh, snapshot_path=args.snapshot)
     except Exception as e:
         log.error(f"❌ Failed DB query execution: {e}")
+        return
+    if outputs:
+        print(f"\n✅ Property CSV saved at: {outputs[0]}")
+        print(f"\n✅ Sales CSV saved at: {outputs[1]}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,257 @@
+"""
+Local snapshot of ``properties`` for offline address and clip lookups.
+
+Every customer file checked with ``find_unmatched_transactions.py`` used to read the
+same states from production again. ``refresh`` exports id, clip, normalized address
+and zip per state into one SQLite file, clustered by zip code and memory-mapped on
+read. Only states whose fingerprint (row count, max id and a checksum of the address
+columns, computed server-side in one grouped query) changed since the last refresh
+are exported again.
+
+    python property_snapshot.py refresh --env prod --states CA,TX
+    python property_snapshot.py status
+    python property_snapshot.py lookup --csv customer.csv
+
+Lookups join the CSV against the snapshot with no database round trip. Streets are
+compared after full standardization (``address_normalization.normalize_street``),
+which the live SQL lookup can't do.
+"""
+import os
+import sys
+import sqlite3
+import argparse
+import pandas as pd
+from datetime import datetime
+
+# Ensure module paths work when running as script
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Sibling modules are imported by bare name: run as a script, this folder's
+# tool_for_comparing_csv_data.py shadows the package of the same name
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from address_normalization import normalize_text, normalize_state, normalize_street
+
+# === 🔧 CONFIGURATION ===
+ENV = 'lab' # 👈 Database the snapshot is taken from
+SNAPSHOT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'property_snapshot.sqlite3')
+MMAP_SIZE = 1 << 30  # Bytes of the snapshot memory-mapped for reads
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS properties (
+    zip_code TEXT NOT NULL,
+    id INTEGER NOT NULL,
+    state TEXT NOT NULL,
+    clip TEXT,
+    street TEXT,
+    city TEXT,
+    full_address TEXT,
+    PRIMARY KEY (zip_code, id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS properties_state ON properties (state);
+CREATE INDEX IF NOT EXISTS properties_clip ON properties (clip);
+
+CREATE TABLE IF NOT EXISTS snapshot_states (
+    state TEXT PRIMARY KEY,
+    fingerprint TEXT NOT NULL,
+    row_count INTEGER NOT NULL,
+    env TEXT NOT NULL,
+    refreshed_at TEXT NOT NULL
+);
+'''
+
+FINGERPRINT_SQL = '''
+    SELECT state,
+           COUNT(*),
+           COUNT(*) || ':' || MAX(id) || ':' ||
+           SUM(hashtext(concat_ws('|', id, clip, street_address, unit_number, city, zip_code))::bigint)
+    FROM properties
+    WHERE state IS NOT NULL AND (%(states)s::text[] IS NULL OR state = ANY(%(states)s::text[]))
+    GROUP BY state;
+'''
+
+EXPORT_SQL = '''
+    SELECT id, clip, street_address, city, zip_code,
+           CONCAT(street_address,
+               CASE WHEN unit_number IS NOT NULL AND unit_number <> '' THEN ' ' || unit_number ELSE '' END,
+               ', ', city, ', ', state, ' ', zip_code) AS full_address
+    FROM properties
+    WHERE state = %(state)s AND zip_code IS NOT NULL;
+'''
+
+
+class PropertySnapshot:
+    def __init__(self, path=SNAPSHOT_PATH):
+        self.path = path
+        self._db = sqlite3.connect(path)
+        self._db.execute(f'PRAGMA mmap_size = {MMAP_SIZE}')
+        self._db.executescript(SCHEMA)
+
+    # === 🔄 REFRESH ===
+    def fingerprints(self, env=None):
+        """``{state: fingerprint}``; with ``env``, only the states exported from that environment."""
+        if env is None:
+            return dict(self._db.execute('SELECT state, fingerprint FROM snapshot_states'))
+        return dict(self._db.execute('SELECT state, fingerprint FROM snapshot_states WHERE env = ?', (env,)))
+
+    def refresh(self, env, states=None, force=False):
+        """Re-export the states whose fingerprint changed; returns ``{state: rows}`` for those exported."""
+        from db_connection.connection_pool import connect_db
+        from db_connection.streaming_export import stream_query
+
+        known = {} if force else self.fingerprints()
+        refreshed = {}
+        conn = connect_db(env)
+        try:
+            with conn:
+                with conn.cursor() as cur:
+                    cur.execute(FINGERPRINT_SQL, {'states': states})
+                    current = {state: (rows, fingerprint) for state, rows, fingerprint in cur.fetchall()}
+
+                for state, (rows, fingerprint) in sorted(current.items()):
+                    if known.get(state) == fingerprint:
+                        continue
+                    print(f"🔄 [{env}] Exporting {state} ({rows} properties)...")
+                    with self._db:
+                        self._db.execute('DELETE FROM properties WHERE state = ?', (state,))
+                        for chunk in stream_query(conn, EXPORT_SQL, {'state': state}):
+                            self._insert_chunk(state, chunk)
+                        self._db.execute(
+                            'INSERT OR REPLACE INTO snapshot_states VALUES (?, ?, ?, ?, ?)',
+                            (state, fingerprint, rows, env, datetime.now().isoformat(timespec='seconds'))
+                        )
+                    refreshed[state] = rows
+        finally:
+            conn.close()
+
+        # States that disappeared from the database (only knowable on a full refresh)
+        if states is None:
+            for state in set(known) - set(current):
+                with self._db:
+                    self._db.execute('DELETE FROM properties WHERE state = ?', (state,))
+                    self._db.execute('DELETE FROM snapshot_states WHERE state = ?', (state,))
+        return refreshed
+
+    def _insert_chunk(self, state, chunk):
+        rows = zip(
+            chunk['zip_code'].astype(str).str.strip(),
+            chunk['id'].astype(int).tolist(),
+            [state] * len(chunk),
+            chunk['clip'],
+            normalize_street(chunk['street_address'].fillna('')),
+            normalize_text(chunk['city'].fillna('')),
+            chunk['full_address'],
+        )
+        self._db.executemany('INSERT OR REPLACE INTO properties VALUES (?, ?, ?, ?, ?, ?, ?)', rows)
+
+    def status(self):
+        return self._db.execute(
+            'SELECT state, row_count, env, refreshed_at FROM snapshot_states ORDER BY state'
+        ).fetchall()
+
+    # === 🔍 LOOKUPS ===
+    def _load_input(self, addresses):
+        self._db.execute('DROP TABLE IF EXISTS temp.input_addresses')
+        self._db.execute('CREATE TEMP TABLE input_addresses (zip_code TEXT, state TEXT, street TEXT, city TEXT, clip TEXT)')
+        self._db.executemany(
+            'INSERT INTO input_addresses VALUES (?, ?, ?, ?, ?)',
+            zip(addresses['zip_code'], addresses['state'], normalize_street(addresses['street']),
+                addresses['city'], addresses['clip'])
+        )
+        self._db.execute('CREATE INDEX temp.input_addresses_zip ON input_addresses (zip_code)')
+
+    def lookup_addresses(self, addresses):
+        """
+        ``[(property_id, full_address), ...]`` matching the rows of ``addresses``.
+
+        ``addresses`` is a DataFrame as built by ``find_unmatched_transactions.load_addresses``
+        (cleaned ``street``, ``city``, ``state``, ``zip_code``, ``clip``).
+        """
+        self._load_input(addresses)
+        return self._db.execute('''
+            SELECT DISTINCT p.id, p.full_address
+            FROM input_addresses a
+            JOIN properties p ON p.zip_code = a.zip_code AND p.state = a.state
+            WHERE p.street = a.street AND p.city = a.city
+            ORDER BY p.id
+        ''').fetchall()
+
+    def lookup_clips(self, clips):
+        """``[(property_id, clip, full_address), ...]`` for the given clips."""
+        self._db.execute('DROP TABLE IF EXISTS temp.input_clips')
+        self._db.execute('CREATE TEMP TABLE input_clips (clip TEXT PRIMARY KEY)')
+        self._db.executemany('INSERT OR IGNORE INTO input_clips VALUES (?)', ((clip,) for clip in clips))
+        return self._db.execute('''
+            SELECT p.id, p.clip, p.full_address
+            FROM properties p
+            JOIN input_clips c ON c.clip = p.clip
+            ORDER BY p.id
+        ''').fetchall()
+
+    def covered_states(self, env=None):
+        """States in the snapshot; with ``env``, only those exported from that environment."""
+        return set(self.fingerprints(env))
+
+    def close(self):
+        self._db.close()
+
+
+# === 🚀 COMMAND LINE ===
+def main():
+    parser = argparse.ArgumentParser(description="Local properties snapshot for offline address and clip lookups.")
+    parser.add_argument('--path', default=SNAPSHOT_PATH, help="Snapshot file (default: %(default)s)")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    refresh = commands.add_parser('refresh', help="Export the states that changed since the last refresh")
+    refresh.add_argument('--env', default=ENV)
+    refresh.add_argument('--states', type=lambda value: [normalize_state_name(s) for s in value.split(',') if s.strip()],
+                         help="Comma-separated states (default: every state)")
+    refresh.add_argument('--force', action='store_true', help="Export even states whose fingerprint is unchanged")
+
+    commands.add_parser('status', help="Show the states in the snapshot")
+
+    lookup = commands.add_parser('lookup', help="Match a CSV of addresses (and clips) against the snapshot")
+    lookup.add_argument('--csv', required=True, help="Input CSV with Address, City, State, Zip Code (and clip)")
+
+    args = parser.parse_args()
+    snapshot = PropertySnapshot(args.path)
+    try:
+        if args.command == 'refresh':
+            refreshed = snapshot.refresh(args.env, args.states, args.force)
+            print(f"✅ {len(refreshed)} state(s) exported, {sum(refreshed.values())} properties; "
+                  f"snapshot at '{snapshot.path}'")
+        elif args.command == 'status':
+            for state, rows, env, refreshed_at in snapshot.status():
+                print(f"{state}: {rows} properties from {env}, refreshed {refreshed_at}")
+        else:
+            lookup_csv(snapshot, args.csv)
+    finally:
+        snapshot.close()
+
+
+def normalize_state_name(state):
+    return normalize_state(pd.Series([state])).iat[0]
+
+
+def lookup_csv(snapshot, csv_path):
+    # Imported here: find_unmatched_transactions imports this module
+    from find_unmatched_transactions import load_addresses
+
+    addresses = load_addresses(csv_path)
+    if addresses is None:
+        return
+    missing = set(addresses['state']) - snapshot.covered_states()
+    if missing:
+        print(f"⚠️ States not in the snapshot (refresh them first): {', '.join(sorted(missing))}")
+
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    prop_csv = os.path.abspath(f"matched_properties_by_address_{timestamp}.csv")
+    clip_csv = os.path.abspath(f"matched_properties_by_clip_{timestamp}.csv")
+    pd.DataFrame(snapshot.lookup_addresses(addresses), columns=['property_id', 'full_address']).to_csv(prop_csv, index=False)
+    pd.DataFrame(snapshot.lookup_clips(addresses['clip'].dropna()),
+                 columns=['property_id', 'clip', 'full_address']).to_csv(clip_csv, index=False)
+    print(f"✅ Property CSV saved at: {prop_csv}")
+    print(f"✅ Clip CSV saved at: {clip_csv}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,20 @@
+import os
+import sys
+import argparse
+import numpy as np
 import pandas as pd
-from rapidfuzz import fuzz
+from rapidfuzz import fuzz, process
 from datetime import datetime, timedelta
 import logging
 
+# Ensure module paths work when running as script
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Sibling modules are imported by bare name: run as a script, this folder's
+# tool_for_comparing_csv_data.py shadows the package of the same name
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from address_normalization import normalize_address, normalize_state, normalize_text
+
 # === 🔧 CONFIGURATION ===
 file1_path = '/Users/dmytrokovalchuk/Desktop/homeIQ/query_executor/ted_livit_prod.csv'
 file2_path = '/Users/dmytrokovalchuk/Desktop/homeIQ/query_executor/Michael Horwitz - ted_livit_missed.csv'
@@ -16,24 +28,30 @@ comparison_keys = [
     (['sale_date'], ['Sale Date'])
 ]
 
+# Only pairs sharing at least one blocking key (or the house number) are scored
+use_blocking = True  # 👈 Set to False to compare every row with every row
+CPDIST_CHUNK_PAIRS = 1_000_000  # Candidate pairs scored per cpdist call; bounds the memory they take
+blocking_keys = {
+    'zip': (['zip_code'], ['Zip Code']),
+    'state_city': (['state', 'city'], ['State', 'City']),
+}
+
 # === 📜 LOGGING SETUP ===
 log_filename = 'matching_log.txt'
-logging.basicConfig(
-    filename=log_filename,
-    filemode='w',
-    level=logging.DEBUG,
-    format='%(asctime)s - %(levelname)s - %(message)s'
-)
 log = logging.getLogger()
 
-# === 🛠️ HELPERS ===
 
-def normalize_address(row, cols):
-    return ' '.join(
-        str(row[col]).strip().lower()
-        for col in cols if col in row and pd.notnull(row[col]) and row[col] != 'NaT'
+def setup_logging():
+    """Log everything to ``log_filename``; only ``main()`` does this, so importing the module writes no file."""
+    logging.basicConfig(
+        filename=log_filename,
+        filemode='w',
+        level=logging.DEBUG,
+        format='%(asctime)s - %(levelname)s - %(message)s'
     )
 
+# === 🛠️ HELPERS ===
+
 def normalize_dates(df, columns):
     for col in columns:
         if col in df.columns:
@@ -102,72 +120,175 @@ def prepare_df(df, key_sets, file_label):
         if all('date' in c.lower() for c in cols):
             df[f'match_key_{i}'] = df[cols[0]] if cols[0] in df.columns else pd.NaT
         else:
-            df[f'match_key_{i}'] = df.apply(lambda row: normalize_address(row, cols), axis=1)
+            df[f'match_key_{i}'] = normalize_address(df, cols)
 
     df['__source'] = file_label
     return df
 
+# === 🧱 BLOCKING ===
+def build_blocking_keys(df, key_columns):
+    """
+    One column per blocking key ('zip', 'state_city', 'house'); empty where a row has no value.
+
+    ``key_columns`` maps 'zip' and 'state_city' to this file's column names.
+    """
+    keys = pd.DataFrame(index=df.index)
+    zip_cols = [c for c in key_columns.get('zip', []) if c in df.columns]
+    if zip_cols:
+        keys['zip'] = df[zip_cols[0]].astype(str).str.extract(r'(\d{3,5})', expand=False).str.zfill(5)
+    state_city = [c for c in key_columns.get('state_city', []) if c in df.columns]
+    if len(state_city) == 2:
+        state = normalize_state(df[state_city[0]].fillna(''))
+        city = normalize_text(df[state_city[1]].fillna(''))
+        keys['state_city'] = (state + '|' + city).where((state != '') & (city != ''))
+    keys['house'] = df['match_key_0'].astype(str).str.extract(r'^(\d+)\b', expand=False)
+    return keys
+
+
+def candidate_blocks(keys1, keys2):
+    """``[(file1 positions, file2 positions), ...]``, one block per shared blocking key value."""
+    def long_form(keys):
+        stacked = keys.reset_index(drop=True).stack().dropna()
+        stacked = stacked[stacked.astype(str) != '']
+        return pd.DataFrame({
+            'position': stacked.index.get_level_values(0),
+            'key': stacked.index.get_level_values(1) + ':' + stacked.astype(str).values,
+        })
+
+    left, right = long_form(keys1), long_form(keys2)
+    right = right[right['key'].isin(set(left['key']))]
+    positions2 = right.groupby('key')['position'].agg(list)
+    return [(rows1, positions2[key]) for key, rows1 in left.groupby('key')['position'].agg(list).items()
+            if key in positions2.index]
+
+
 # === 🔍 MATCHING ===
-def match_data(df1, df2, num_keys, threshold=90):
+def address_cutoff(threshold, num_keys):
+    """Lowest address score that can still reach ``threshold`` when every other key scores 100."""
+    return max(0, threshold * num_keys - 100 * (num_keys - 1))
+
+
+def candidate_pairs(blocks, num_rows1, chunk_pairs=CPDIST_CHUNK_PAIRS):
+    """
+    Yield ``(file1 positions, file2 positions)`` arrays of distinct candidate pairs, in
+    row order and about ``chunk_pairs`` at a time.
+
+    Each file1 row is paired with the union of the file2 rows of every block it is in,
+    so a pair that shares its zip, state and city, and house number is still scored once.
+    """
+    memberships = [[] for _ in range(num_rows1)]
+    for block, (rows1, _) in enumerate(blocks):
+        for row in rows1:
+            memberships[row].append(block)
+    block_rows2 = [np.asarray(rows2, dtype=np.int64) for _, rows2 in blocks]
+
+    rows, cols, pending = [], [], 0
+    for row, membership in enumerate(memberships):
+        if not membership:
+            continue
+        if len(membership) == 1:
+            candidates = block_rows2[membership[0]]
+        else:
+            candidates = np.unique(np.concatenate([block_rows2[block] for block in membership]))
+        rows.append(np.full(len(candidates), row, dtype=np.int64))
+        cols.append(candidates)
+        pending += len(candidates)
+        if pending >= chunk_pairs:
+            yield np.concatenate(rows), np.concatenate(cols)
+            rows, cols, pending = [], [], 0
+    if rows:
+        yield np.concatenate(rows), np.concatenate(cols)
+
+
+def score_addresses(addresses1, addresses2, blocks, cutoff):
+    """
+    Sparse address score matrix as ``(file1 positions, file2 positions, scores)`` arrays,
+    plus the number of pairs scored.
+
+    The distinct candidate pairs are scored in bulk with ``process.cpdist`` (native,
+    all cores, RapidFuzz 3.6+); scores below ``cutoff`` are dropped.
+    """
+    rows, cols, scores, compared = [], [], [], 0
+    for pair_rows, pair_cols in candidate_pairs(blocks, len(addresses1)):
+        compared += len(pair_rows)
+        pair_scores = process.cpdist(addresses1[pair_rows], addresses2[pair_cols], scorer=fuzz.token_sort_ratio,
+                                     score_cutoff=cutoff, dtype=np.float64, workers=-1)
+        keep = pair_scores >= cutoff
+        rows.append(pair_rows[keep])
+        cols.append(pair_cols[keep])
+        scores.append(pair_scores[keep])
+
+    if not rows:
+        return np.array([], dtype=np.int64), np.array([], dtype=np.int64), np.array([]), compared
+    return np.concatenate(rows), np.concatenate(cols), np.concatenate(scores), compared
+
+
+def key_score(val1, val2):
+    """Score of one non-address key: date tolerance for two dates, token sort ratio otherwise."""
+    if isinstance(val1, pd.Timestamp) and isinstance(val2, pd.Timestamp):
+        if pd.isnull(val1) or pd.isnull(val2):
+            return 0
+        return 100 if abs((val1 - val2).days) <= date_tolerance_days else 0
+    return fuzz.token_sort_ratio(str(val1), str(val2))
+
+
+def match_data(df1, df2, num_keys, threshold=90, blocking=None):
+    """
+    Every (file1, file2) pair whose average key score reaches ``threshold``.
+
+    With ``blocking`` (``{key: (file1 columns, file2 columns)}``) only pairs sharing a
+    zip code, a state and city, or a house number are scored, instead of every pair.
+    Address similarity (``match_key_0``) is computed once per distinct candidate pair
+    with ``process.cpdist`` into a sparse matrix; only pairs whose address score leaves
+    the threshold reachable get their other keys (e.g. the date) scored.
+    """
     matched = []
-    unmatched_rows_file1 = []
 
     original_file1_cols = [col for col in df1.columns if not col.startswith('match_key') and col != '__source']
     original_file2_cols = [col for col in df2.columns if not col.startswith('match_key') and col != '__source']
 
-    for idx1, row1 in df1.iterrows():
-        found_match = False
-        log.debug(f"\n🔍 Matching row {idx1} from file1:")
-        log.debug(f"   Address key: {row1['match_key_0']}")
-        log.debug(f"   Date key   : {row1['match_key_1']}")
-
-        for idx2, row2 in df2.iterrows():
-            scores = []
-
-            for i in range(num_keys):
-                val1 = row1[f'match_key_{i}']
-                val2 = row2[f'match_key_{i}']
-
-                if isinstance(val1, pd.Timestamp) or isinstance(val2, pd.Timestamp):
-                    log.debug(f"🛠️ Date comparison check: file1={val1}, file2={val2}")
-
-                if isinstance(val1, pd.Timestamp) and isinstance(val2, pd.Timestamp):
-                    if pd.isnull(val1) or pd.isnull(val2):
-                        log.debug(f"⚠️ Null date — file1: {val1}, file2: {val2}")
-                        scores.append(0)
-                    else:
-                        days_diff = abs((val1 - val2).days)
-                        log.debug(f"📅 Comparing dates — file1: {val1.date()}, file2: {val2.date()}, diff: {days_diff} days")
-                        scores.append(100 if days_diff <= date_tolerance_days else 0)
-                else:
-                    score = fuzz.token_sort_ratio(str(val1), str(val2))
-                    if i == 0:
-                        log.debug(f"🏠 Address score: {score} → file1: '{val1}' vs file2: '{val2}'")
-                    scores.append(score)
-
-            avg_score = sum(scores) / len(scores)
-
-            if avg_score >= threshold:
-                found_match = True
-                log.debug(f"✅ Match found — Similarity: {avg_score}")
-                log.debug(f"    Matched address: file2[{idx2}] → {row2['match_key_0']}")
-                log.debug(f"    Matched date: file1={row1['match_key_1']}, file2={row2['match_key_1']}")
-
-                match = {
-                    f'file1_{col}': row1.get(col, '') for col in original_file1_cols
-                }
-                match.update({
-                    f'file2_{col}': row2.get(col, '') for col in original_file2_cols
-                })
-                match['similarity'] = round(avg_score, 2)
-                matched.append(match)
-
-        if not found_match:
-            unmatched_rows_file1.append(row1)
-            log.debug("❌ No match found for this row.\n")
+    if blocking:
+        blocks = candidate_blocks(
+            build_blocking_keys(df1, {key: cols[0] for key, cols in blocking.items()}),
+            build_blocking_keys(df2, {key: cols[1] for key, cols in blocking.items()}),
+        )
+    else:
+        blocks = [(list(range(len(df1))), list(range(len(df2))))]
+
+    cutoff = address_cutoff(threshold, num_keys)
+    addresses1 = df1['match_key_0'].astype(str).to_numpy()
+    addresses2 = df2['match_key_0'].astype(str).to_numpy()
+    rows, cols, address_scores, compared = score_addresses(addresses1, addresses2, blocks, cutoff)
+    if blocking:
+        log.info(f"🧱 Blocking: {len(blocks)} blocks, {compared} distinct pair scores instead of {len(df1) * len(df2)}")
+    log.info(f"🏠 {len(rows)} pairs with an address score of at least {cutoff}")
+
+    # Combine the sparse address scores with the other keys, pair by pair. tolist() keeps
+    # dates as pd.Timestamp (to_numpy() would give numpy.datetime64, which key_score
+    # would then compare as strings instead of by date_tolerance_days)
+    other_keys = [(df1[f'match_key_{i}'].tolist(), df2[f'match_key_{i}'].tolist()) for i in range(1, num_keys)]
+    matched_rows1 = set()
+    for row, col, address_score in zip(rows, cols, address_scores):
+        scores = [address_score] + [key_score(values1[row], values2[col]) for values1, values2 in other_keys]
+        avg_score = sum(scores) / len(scores)
+        if avg_score < threshold:
+            continue
+
+        row1, row2 = df1.iloc[row], df2.iloc[col]
+        log.debug(f"✅ Match found — Similarity: {avg_score}")
+        log.debug(f"    Address: file1[{df1.index[row]}] '{row1['match_key_0']}' → file2[{df2.index[col]}] '{row2['match_key_0']}'")
+        match = {
+            f'file1_{c}': row1.get(c, '') for c in original_file1_cols
+        }
+        match.update({
+            f'file2_{c}': row2.get(c, '') for c in original_file2_cols
+        })
+        match['similarity'] = round(float(avg_score), 2)
+        matched.append(match)
+        matched_rows1.add(row)
 
     # All unmatched from file1
-    unmatched_df1 = pd.DataFrame(unmatched_rows_file1)
+    unmatched_df1 = df1.iloc[[i for i in range(len(df1)) if i not in matched_rows1]].copy()
     unmatched_df1.drop(columns=[c for c in unmatched_df1.columns if c.startswith('match_key') or c == '__source'], inplace=True, errors='ignore')
 
     # Optional: remove matched rows from file2 to create unmatched_df2
@@ -185,9 +306,19 @@ def match_data(df1, df2, num_keys, threshold=90):
 
 # === 🚀 MAIN EXECUTION ===
 def main():
+    parser = argparse.ArgumentParser(description="Fuzzy-match the sales of two CSV files on address and sale date.")
+    parser.add_argument('--file1', default=file1_path, help="Database export (default: %(default)s)")
+    parser.add_argument('--file2', default=file2_path, help="Customer file (default: %(default)s)")
+    parser.add_argument('--threshold', type=float, default=similarity_threshold,
+                        help="Average similarity a pair needs to match (default: %(default)s)")
+    parser.add_argument('--no-blocking', dest='blocking', action='store_false', default=use_blocking,
+                        help="Compare every row with every row instead of only pairs sharing a blocking key")
+    args = parser.parse_args()
+    setup_logging()
+
     print("📥 Loading CSVs...")
-    df1 = pd.read_csv(file1_path)
-    df2 = pd.read_csv(file2_path)
+    df1 = pd.read_csv(args.file1)
+    df2 = pd.read_csv(args.file2)
 
     file1_keys = [pair[0] for pair in comparison_keys]
     file2_keys = [pair[1] for pair in comparison_keys]
@@ -203,7 +334,8 @@ def main():
     log.debug(df2_prepared[['Sale Date']].dropna().head().to_string(index=False))
 
     print("🔍 Matching...")
-    matched_df, unmatched_df1, unmatched_df2 = match_data(df1_prepared, df2_prepared, len(comparison_keys), similarity_threshold)
+    matched_df, unmatched_df1, unmatched_df2 = match_data(df1_prepared, df2_prepared, len(comparison_keys),
+                                                          args.threshold, blocking_keys if args.blocking else None)
 
     # === 📤 OUTPUT FILES ===
     timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
@@ -1,53 +1,35 @@
 import os
 import sys
 import json
-import boto3
-import psycopg2
+import argparse
 import pandas as pd
-from dotenv import load_dotenv
 from datetime import timedelta
 
-# Add project root to path
+# Add project root and the shared Intelligence_IQI modules to path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'Intelligence_IQI'))
 
-# Load environment
-load_dotenv()
+from collections import Counter
+
+from db_connection.connection_pool import connect_db
+from db_connection.streaming_export import stream_query, ChunkWriter, ITERSIZE
+
+# Credentials come from .env, read by the connection pool on first connect
 ENV = 'PROD_HIQ'
+OUTPUT_FORMAT = 'csv' # 👈 Or 'parquet'
 
-REGION = os.getenv('REGION')
-DB_HOST = os.getenv(f'{ENV}_DB_HOST')
-DB_NAME = os.getenv(f'{ENV}_DB_NAME')
-DB_USER = os.getenv(f'{ENV}_DB_USER')
-
-os.environ['AWS_ACCESS_KEY_ID'] = os.getenv(f'{ENV}_AWS_ACCESS_KEY_ID')
-os.environ['AWS_SECRET_ACCESS_KEY'] = os.getenv(f'{ENV}_AWS_SECRET_ACCESS_KEY')
-os.environ['AWS_SESSION_TOKEN'] = os.getenv(f'{ENV}_AWS_SESSION_TOKEN')
-
-def get_iam_token():
-    client = boto3.client('rds', region_name=REGION)
-    return client.generate_db_auth_token(
-        DBHostname=DB_HOST,
-        Port=5432,
-        DBUsername=DB_USER
-    )
-
-def connect_db():
-    return psycopg2.connect(
-        host=DB_HOST,
-        dbname=DB_NAME,
-        user=DB_USER,
-        password=get_iam_token(),
-        port=5432,
-        sslmode='require'
-    )
-
-def fetch_home_shopper_data():
+def iter_home_shopper_data(itersize=ITERSIZE, env=ENV):
+    """Yield active home shoppers in chunks of ``itersize`` rows from a server-side cursor."""
     query = "SELECT id, home_shopper FROM properties WHERE home_shopper_active = true;"
-    with connect_db() as conn:
-        return pd.read_sql_query(query, conn)
-
-def classify_shoppers(df):
-    today = pd.Timestamp.utcnow()  # ✅ timezone-aware UTC
+    conn = connect_db(env)
+    try:
+        with conn:
+            yield from stream_query(conn, query, itersize=itersize)
+    finally:
+        conn.close()
+
+def classify_shoppers(df, today=None):
+    today = today or pd.Timestamp.utcnow()  # ✅ timezone-aware UTC
     results = []
 
     for _, row in df.iterrows():
@@ -121,21 +103,41 @@ def classify_shoppers(df):
 
     return pd.DataFrame(results)
 
+def export_classified_shoppers(output_path, itersize=ITERSIZE, env=ENV):
+    """
+    Stream active home shoppers chunk by chunk, appending each classified chunk to ``output_path``.
+
+    Returns ``(records processed, records per category)``.
+    """
+    today = pd.Timestamp.utcnow()  # One reference time for every chunk
+    processed = 0
+    categories = Counter()
+    with ChunkWriter(output_path) as writer:
+        for chunk in iter_home_shopper_data(itersize, env):
+            processed += len(chunk)
+            shopper_df = classify_shoppers(chunk, today)
+            if not shopper_df.empty:
+                writer.write(shopper_df)
+                categories.update(shopper_df['category'])
+    return processed, categories
 
 
 def main():
-    print("🚀 Fetching home shopper data...")
-    df = fetch_home_shopper_data()
-
-    print(f"🔍 Processing {len(df)} records...")
-    shopper_df = classify_shoppers(df)
-
-    if not shopper_df.empty:
-        output_path = f"home_shoppers_classified_{ENV}.csv"
-        shopper_df.to_csv(output_path, index=False)
-        print(f"✅ Saved {len(shopper_df)} classified records to: {output_path}")
+    parser = argparse.ArgumentParser(description="Label active home shoppers by how recently and often they were seen.")
+    parser.add_argument('--env', default=ENV, help="Database environment (default: %(default)s)")
+    parser.add_argument('--format', choices=['csv', 'parquet'], default=OUTPUT_FORMAT,
+                        help="Output file format (default: %(default)s)")
+    args = parser.parse_args()
+
+    print("🚀 Streaming home shopper data...")
+    output_path = f"home_shoppers_classified_{args.env}.{args.format}"
+    processed, categories = export_classified_shoppers(output_path, env=args.env)
+    print(f"🔍 Processed {processed} records")
+
+    if categories:
+        print(f"✅ Saved {sum(categories.values())} classified records to: {output_path}")
         print("\n📊 Category Breakdown:")
-        print(shopper_df['category'].value_counts())
+        print(pd.Series(categories, name='count').sort_values(ascending=False))
     else:
         print("✅ No home shopper records classified.")
 
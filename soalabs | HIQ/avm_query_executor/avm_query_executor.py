@@ -1,58 +1,39 @@
 import os
 import sys
 import json
-import boto3
-import psycopg2
+import argparse
 import pandas as pd
-from dotenv import load_dotenv
 
-# Add project root to path
+# Add project root and the shared Intelligence_IQI modules to path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'Intelligence_IQI'))
 
-# Load environment
-load_dotenv()
+from collections import Counter
+
+from db_connection.connection_pool import connect_db
+from db_connection.streaming_export import stream_query, ChunkWriter, ITERSIZE
+
+# Credentials come from .env, read by the connection pool on first connect
 ENV = 'PROD_HIQ'
+OUTPUT_FORMAT = 'csv' # 👈 Or 'parquet'
 
-REGION = os.getenv('REGION')
-DB_HOST = os.getenv(f'{ENV}_DB_HOST')
-DB_NAME = os.getenv(f'{ENV}_DB_NAME')
-DB_USER = os.getenv(f'{ENV}_DB_USER')
-
-os.environ['AWS_ACCESS_KEY_ID'] = os.getenv(f'{ENV}_AWS_ACCESS_KEY_ID')
-os.environ['AWS_SECRET_ACCESS_KEY'] = os.getenv(f'{ENV}_AWS_SECRET_ACCESS_KEY')
-os.environ['AWS_SESSION_TOKEN'] = os.getenv(f'{ENV}_AWS_SESSION_TOKEN')
-
-def get_iam_token():
-    client = boto3.client('rds', region_name=REGION)
-    return client.generate_db_auth_token(
-        DBHostname=DB_HOST,
-        Port=5432,
-        DBUsername=DB_USER
-    )
-
-def connect_db():
-    return psycopg2.connect(
-        host=DB_HOST,
-        dbname=DB_NAME,
-        user=DB_USER,
-        password=get_iam_token(),
-        port=5432,
-        sslmode='require'
-    )
-
-def fetch_properties_with_avm():
+def iter_properties_with_avm(itersize=ITERSIZE, env=ENV):
+    """Yield ``properties`` (id, avm_history) in chunks of ``itersize`` rows from a server-side cursor."""
     query = "SELECT id, avm_history FROM properties;"
-    with connect_db() as conn:
-        df = pd.read_sql_query(query, conn)
-    return df
+    conn = connect_db(env)
+    try:
+        with conn:
+            yield from stream_query(conn, query, itersize=itersize)
+    finally:
+        conn.close()
 
 import pandas as pd
 
 import pandas as pd
 
-def analyze_disparity(df, threshold=0.2):
+def flag_disparities(df, threshold=0.2):
     """
-    Analyze property AVM disparities.
+    Find property AVM disparities.
 
     Parameters:
         df (pd.DataFrame): DataFrame with `id` and `avm_history`.
@@ -107,33 +88,69 @@ def analyze_disparity(df, threshold=0.2):
         results_df = results_df.sort_values(by='month', ascending=False)
         results_df = results_df.drop_duplicates(subset='property_id', keep='first')
 
-        zillow_bigger_count = results_df[results_df['higher_value_source'] == 'zillow']['property_id'].nunique()
-        corelogic_bigger_count = results_df[results_df['higher_value_source'] == 'corelogic']['property_id'].nunique()
+    return results_df
 
-        print(f"📊 Unique properties where Zillow is higher: {zillow_bigger_count}")
-        print(f"📊 Unique properties where CoreLogic is higher: {corelogic_bigger_count}")
-        print(f"📦 Total unique properties with >{int(threshold * 100)}% disparity: {len(results_df)}")
+
+def print_disparity_summary(higher_counts, threshold=0.2):
+    """``higher_counts``: flagged properties per ``higher_value_source``."""
+    total = sum(higher_counts.values())
+    if total:
+        print(f"📊 Unique properties where Zillow is higher: {higher_counts.get('zillow', 0)}")
+        print(f"📊 Unique properties where CoreLogic is higher: {higher_counts.get('corelogic', 0)}")
+        print(f"📦 Total unique properties with >{int(threshold * 100)}% disparity: {total}")
     else:
         print(f"✅ No disparities greater than {int(threshold * 100)}% found.")
 
+
+def analyze_disparity(df, threshold=0.2):
+    """Flag the disparities of an in-memory DataFrame and print the summary."""
+    results_df = flag_disparities(df, threshold)
+    higher = results_df['higher_value_source'].value_counts().to_dict() if not results_df.empty else {}
+    print_disparity_summary(higher, threshold)
     return results_df
 
 
+def export_disparities(output_path, threshold=0.2, itersize=ITERSIZE, env=ENV):
+    """
+    Stream ``properties`` chunk by chunk, appending each chunk's disparities to ``output_path``.
 
+    Every property is one row, so per-chunk de-duplication is exact; the file is
+    sorted by month within each chunk. Returns ``(properties scanned, flagged per source)``.
+    """
+    scanned = 0
+    higher = Counter()
+    with ChunkWriter(output_path) as writer:
+        for chunk in iter_properties_with_avm(itersize, env):
+            scanned += len(chunk)
+            results_df = flag_disparities(chunk, threshold)
+            if not results_df.empty:
+                writer.write(results_df)
+                higher.update(results_df['higher_value_source'])
+    return scanned, higher
 
 
 
 
-def main():
-    print("🚀 Fetching data from DB...")
-    properties_df = fetch_properties_with_avm()
-    print(f"🔍 Analyzing {len(properties_df)} property records...")
 
-    results_df = analyze_disparity(properties_df)
 
-    if not results_df.empty:
-        results_df.to_csv(f"avm_disparity_{ENV}.csv", index=False)
-        print(f"✅ Saved {len(results_df)} discrepancies to 'avm_disparity_{ENV}.csv'")
+
+def main():
+    parser = argparse.ArgumentParser(description="Flag properties whose Zillow and CoreLogic AVMs disagree.")
+    parser.add_argument('--env', default=ENV, help="Database environment (default: %(default)s)")
+    parser.add_argument('--format', choices=['csv', 'parquet'], default=OUTPUT_FORMAT,
+                        help="Output file format (default: %(default)s)")
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help="Minimum relative difference to flag, e.g. 0.3 = 30%% (default: %(default)s)")
+    args = parser.parse_args()
+
+    print("🚀 Streaming property records from DB...")
+    output_path = f"avm_disparity_{args.env}.{args.format}"
+    scanned, higher = export_disparities(output_path, args.threshold, env=args.env)
+    print(f"🔍 Analyzed {scanned} property records")
+
+    print_disparity_summary(higher, args.threshold)
+    if sum(higher.values()):
+        print(f"✅ Saved {sum(higher.values())} discrepancies to '{output_path}'")
     else:
         print("✅ No AVM disparities over 50% found.")
 